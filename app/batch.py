@@ -0,0 +1,176 @@
+import codecs
+import html
+import re
+import shlex
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.router_client import RouterResponse
+
+# Разделители доменов в сообщении или файле: перевод строки, запятая, пробел
+DOMAIN_SEPARATORS = re.compile(r'[\s,;]+')
+
+# Максимальный размер загружаемого файла со списком доменов
+MAX_UPLOAD_SIZE = 1024 * 1024
+
+# Размер фрагмента при разборе загруженного файла
+PARSE_CHUNK_SIZE = 64 * 1024
+
+# Маркер конца вывода отдельной команды в пакетном запуске
+BATCH_MARKER = '@@kvasbot-done@@'
+
+
+def split_domains(text: str) -> List[str]:
+    """Разбор списка доменов с удалением повторов (порядок сохраняется)."""
+    domains = (item.strip().lower() for item in DOMAIN_SEPARATORS.split(text))
+    return list(dict.fromkeys(domain for domain in domains if domain))
+
+
+def iter_domains(chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Потоковый разбор файла со списком доменов.
+
+    Байты декодируются по фрагментам (UTF-8), строки разбираются по мере
+    поступления: ни весь текст файла, ни список всех строк в памяти не
+    собираются. Все после "#" до конца строки считается комментарием.
+
+    Raises:
+        UnicodeDecodeError: Файл не в кодировке UTF-8
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    tail = ''
+    for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split('\n')
+        # Последняя строка фрагмента может быть оборвана
+        tail = lines.pop()
+        yield from _line_domains(lines)
+    yield from _line_domains([tail + decoder.decode(b'', final=True)])
+
+
+def chunked(data: bytes, size: int = PARSE_CHUNK_SIZE) -> Iterator[memoryview]:
+    """Фрагменты загруженных данных без копирования."""
+    view = memoryview(data)
+    for start in range(0, len(view), size):
+        yield view[start:start + size]
+
+
+def _line_domains(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        line = line.split('#', 1)[0]
+        for item in DOMAIN_SEPARATORS.split(line):
+            item = item.strip().lower()
+            if item:
+                yield item
+
+
+def preview_items(items: List[str], max_length: int = 500) -> str:
+    """Перечисление доменов для сообщения, не длиннее max_length символов."""
+    shown = []
+    length = 0
+    for item in items:
+        if length + len(item) > max_length:
+            break
+        shown.append(item)
+        length += len(item) + 2
+    text = ', '.join(shown)
+    if len(shown) < len(items):
+        text += f" и еще {len(items) - len(shown)}"
+    return text
+
+
+def build_batch_command(verb: str, domains: Iterable[str]) -> str:
+    """
+    Сборка одной shell-команды для пакета `kvas add/del`.
+
+    После каждой команды печатается маркер с доменом, чтобы разделить
+    общий вывод по доменам. stderr объединяется с stdout.
+    """
+    parts = []
+    for domain in domains:
+        quoted = shlex.quote(domain)
+        parts.append(f"kvas {verb} {quoted} -y 2>&1; echo {BATCH_MARKER} {quoted}")
+    return '; '.join(parts)
+
+
+def parse_batch_output(output: str) -> Dict[str, str]:
+    """Разделение общего вывода пакета по доменам."""
+    results = {}
+    chunk = []
+    for line in output.split('\n'):
+        if line.startswith(BATCH_MARKER):
+            domain = line[len(BATCH_MARKER):].strip()
+            results[domain] = '\n'.join(chunk).strip()
+            chunk = []
+        else:
+            chunk.append(line)
+    return results
+
+
+def classify_result(verb: str, output: str) -> Optional[bool]:
+    """
+    Результат `kvas add/del` для одного домена.
+
+    Returns:
+        Optional[bool]: True - список изменен, False - изменять было нечего
+            (домен уже есть или его нет в списке), None - ошибка
+    """
+    text = output.lower()
+    if verb == 'add':
+        if RouterResponse.ADD_SUCCESS.lower() in text:
+            return True
+        if 'уже' in text:
+            return False
+    else:
+        if RouterResponse.DELETE_NOT_FOUND.lower() in text:
+            return False
+        if RouterResponse.DELETE_SUCCESS.lower() in text:
+            return True
+    return None
+
+
+class BatchSummary:
+    """Итог пакетного добавления или удаления сайтов."""
+
+    def __init__(self, verb: str, total: int):
+        self.verb = verb
+        self.total = total
+        self.done: List[str] = []
+        self.skipped: List[str] = []
+        self.invalid: List[str] = []
+        self.failed: List[str] = []
+
+    @property
+    def processed(self) -> int:
+        return len(self.done) + len(self.skipped) + len(self.invalid) + len(self.failed)
+
+    def record(self, domain: str, output: str) -> Optional[bool]:
+        """Классификация результата команды для одного домена (см. classify_result)."""
+        changed = classify_result(self.verb, output)
+        if changed is None:
+            self.failed.append(domain)
+        elif changed:
+            self.done.append(domain)
+        else:
+            self.skipped.append(domain)
+        return changed
+
+    def render(self, finished: bool = True) -> str:
+        """Текст сводки для сообщения в чате."""
+        if self.verb == 'add':
+            title = "➕ Пакетное добавление"
+            done_label, skipped_label = "✅ Добавлено", "☑️ Уже в списке"
+        else:
+            title = "➖ Пакетное удаление"
+            done_label, skipped_label = "✅ Удалено", "☑️ Не было в списке"
+
+        status = "завершено" if finished else f"обработано {self.processed} из {self.total}"
+        lines = [f"<b>{title}</b>: {status}", ""]
+        for label, items in (
+            (done_label, self.done),
+            (skipped_label, self.skipped),
+            ("⚠️ Некорректные", self.invalid),
+            ("❌ Ошибки", self.failed),
+        ):
+            lines.append(f"{label}: {len(items)}")
+            if items and finished:
+                lines.append(html.escape(preview_items(items)))
+        return '\n'.join(lines)
@@ -1,28 +1,111 @@
+import gc
+import html
 import re
 import asyncio
-from typing import Optional
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable, Optional
 
-from telegram import Update, ReplyKeyboardMarkup
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update, ReplyKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import (
     Application, 
+    ApplicationHandlerStop,
+    CallbackQueryHandler,
     CommandHandler, 
     MessageHandler, 
     ConversationHandler, 
     ContextTypes, 
+    TypeHandler,
     filters,
 )
 
+from app.batch import (
+    MAX_UPLOAD_SIZE,
+    BatchSummary,
+    build_batch_command,
+    chunked,
+    iter_domains,
+    parse_batch_output,
+    split_domains,
+)
+from app.coalescer import MutationCoalescer
 from app.config import Config
 from app.formatter import OutputFormatter
+from app.health import HealthSampler, sparkline
+from app.http_server import HTTPRequest, HTTPResponse, LocalHTTPServer
+from app.list_document import ListDocument
+from app.log_tail import tail_records
+from app.list_source import KvasListFile
+from app.memory import MemoryMonitor, read_rss, top_allocations
 from app.messages import MESSAGES
+from app.metrics import CONTENT_TYPE, HANDLER_ERRORS, HANDLER_SECONDS, METRICS, timed
+from app.paginator import TELEGRAM_MESSAGE_LIMIT, ListPaginator
+from app.progress import ProgressReporter
+from app.rate_limiter import TokenBucketLimiter
+from app.retry import CircuitOpenError
 from app.router_client import RouterLocalClient
-from app.logger import get_logger
+from app.site_cache import SiteListCache
+from app.sync import SYNC_MAX_UPLOAD_SIZE, SyncPlan
+from app.telegram_request import InstrumentedRequest
+from app.update_processor import ChatOrderedUpdateProcessor
+from app.logger import ACCESS_LOGGER, get_logger, log_file_path
+
+# Количество последних строк вывода команды, показываемых при ошибке
+OUTPUT_TAIL_LINES = 10
+
+# Имя файла выгрузки списка (/export)
+EXPORT_FILENAME = 'kvas-list.txt'
+
+# Максимальная длина строки поиска
+FIND_QUERY_MAX_LENGTH = 100
+
+# Действия, запускающие команды на роутере (отдельный, более строгий лимит запросов)
+COSTLY_ACTIONS = re.compile(
+    r"^(📜 Список сайтов|➕ Добавить сайт|➖ Удалить сайт|🔄 Перезагрузить роутер|/refresh|/export|/mem|/logs)"
+)
+
+# Действия, читающие список разблокировки: обращаются к роутеру, если кэш
+# списка устарел, и тогда ограничиваются как COSTLY_ACTIONS
+LIST_ACTIONS = re.compile(r"^(/find|/sync)")
+LIST_CALLBACKS = re.compile(r"^(sites|find):")
+
+# Мест выделения памяти в ответе /mem
+MEM_TOP_ALLOCATIONS = 10
+
+# Записей журнала в ответе /logs: по умолчанию и максимум
+LOGS_DEFAULT_RECORDS = 20
+LOGS_MAX_RECORDS = 500
+
+# Предел чтения журнала для /logs (при отборе по редкому уровню или логгеру)
+LOGS_MAX_SCAN_BYTES = 16 * 1024 * 1024
+
+# Клавиатуры: объекты Telegram неизменяемы, поэтому создаются один раз и используются всеми ответами
+MENU_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        ["📜 Список сайтов", "🔍 Найти"],
+        ["➕ Добавить сайт", "➖ Удалить сайт"],
+        ["🆘 Помощь"],
+        ["🔄 Перезагрузить роутер"],
+    ],
+    resize_keyboard=True,
+    one_time_keyboard=False
+)
+CANCEL_KEYBOARD = ReplyKeyboardMarkup([['Отмена']], resize_keyboard=True)
+REBOOT_CONFIRM_KEYBOARD = ReplyKeyboardMarkup([["Да", "Нет"]], resize_keyboard=True)
+SYNC_CONFIRM_KEYBOARD = InlineKeyboardMarkup([[
+    InlineKeyboardButton("✅ Применить", callback_data="sync:apply"),
+    InlineKeyboardButton("❌ Отмена", callback_data="sync:cancel"),
+]])
 
 # Enum-like states for clearer state management
 class ConversationStates:
     ADD_SITE = 0        # Добавление сайта
     DELETE_SITE = 1     # Удаление сайта
     REBOOT_ROUTER = 2   # Перезагрузка роутера
+    FIND_SITE = 3       # Поиск сайта
+    SYNC_FILE = 4       # Ожидание файла для синхронизации
 
 class VPNBot:
     def __init__(self, config: Config, router_client: RouterLocalClient):
@@ -30,21 +113,96 @@ class VPNBot:
         self.router_client = router_client
         self.output_formatter = OutputFormatter()
         self.logger = get_logger(__name__)
+        # Проверки доступа - отдельный логгер, чтобы их можно было прореживать
+        self.access_logger = get_logger(ACCESS_LOGGER)
+        self.site_cache = SiteListCache(self._load_sites, ttl=config.LIST_CACHE_TTL)
+        # Файл списка читается напрямую, только если бот работает на самом роутере
+        self.list_file = (
+            KvasListFile(config.KVAS_LIST_FILE)
+            if config.KVAS_LIST_FILE and not config.ROUTER_HOST
+            else None
+        )
+        self._paginator: Optional[ListPaginator] = None
+        # Одиночные добавления и удаления от всех пользователей собираются в пакеты
+        self.mutations: Optional[MutationCoalescer] = None
+        if config.MUTATION_WINDOW > 0:
+            self.mutations = MutationCoalescer(
+                router_client,
+                window=config.MUTATION_WINDOW,
+                timeout=config.COMMAND_TIMEOUT,
+                is_listed=self._is_listed,
+                list_file=self.list_file,
+                apply_command=config.KVAS_APPLY_COMMAND,
+            )
         
         self.application: Optional[Application] = None
+        self.update_processor = ChatOrderedUpdateProcessor(config.UPDATE_CONCURRENCY)
+        self.webhook_server: Optional[LocalHTTPServer] = None
+        self.health_sampler: Optional[HealthSampler] = None
+        if config.HEALTH_INTERVAL > 0:
+            self.health_sampler = HealthSampler(
+                router_client,
+                interval=config.HEALTH_INTERVAL,
+                max_interval=config.HEALTH_MAX_INTERVAL,
+                history=config.HEALTH_HISTORY,
+                vpn_command=config.VPN_CHECK_COMMAND,
+                busy_load=config.HEALTH_BUSY_LOAD,
+                # Очередь изменяющих команд - роутер занят запросами пользователей
+                is_busy=lambda: router_client.scheduler.queue_depth > 0,
+            )
+        self.metrics_server: Optional[LocalHTTPServer] = None
+
+        # Контроль памяти: при превышении бюджета сначала освобождается то,
+        # что быстро строится заново, в последнюю очередь - сам кэш списка
+        self.memory_monitor = MemoryMonitor(
+            config.MEMORY_CHECK_INTERVAL, budget_kb=config.MEMORY_BUDGET_MB * 1024
+        )
+        self.memory_monitor.add_trimmer('derived list data', self._trim_derived_data)
+        self.memory_monitor.add_trimmer('user search results', self._trim_user_data)
+        self.memory_monitor.add_trimmer('list cache', self._trim_list_cache)
+
+        # Состояние компонентов, выгружаемое вместе с метриками
+        METRICS.collector('kvasbot_list_cache', self.site_cache.stats)
+        if self.list_file:
+            METRICS.collector('kvasbot_list_file', self.list_file.stats)
+        METRICS.collector('kvasbot_scheduler', router_client.scheduler.stats)
+        METRICS.collector('kvasbot_retry', router_client.retry_policy.stats)
+        METRICS.collector('kvasbot_updates', self.update_processor.stats)
+        METRICS.collector('kvasbot_memory', self.memory_monitor.stats)
+        if self.mutations:
+            METRICS.collector('kvasbot_mutations', self.mutations.stats)
+        executor_stats = getattr(router_client.executor, 'stats', None)
+        if executor_stats:
+            METRICS.collector('kvasbot_executor', executor_stats)
         
-        # Усовершенствованное ограничение запросов
-        self.user_request_counters = {}
-        self.MAX_REQUESTS_PER_MINUTE = 10
-        self.request_cooldown = 60  # секунд
+        # Ограничение частоты запросов: отдельно для дорогих и дешевых действий
+        self.rate_limiters = {
+            'costly': TokenBucketLimiter(
+                config.RATE_LIMIT_COSTLY_PER_MINUTE, burst=config.RATE_LIMIT_COSTLY_BURST
+            ),
+            'cheap': TokenBucketLimiter(
+                config.RATE_LIMIT_CHEAP_PER_MINUTE, burst=config.RATE_LIMIT_CHEAP_BURST
+            ),
+        }
+
+    async def initialize(self, on_request: Optional[Callable[[str], None]] = None):
+        """
+        Initialize the bot application.
 
-    async def initialize(self):
-        """Initialize the bot application."""
+        Args:
+            on_request: Необязательный обработчик начала каждого запроса к Bot API
+                (используется профилировщиком запуска)
+        """
         try:
             # Create application
             self.application = (
                 Application.builder()
                 .token(self.config.BOT_TOKEN)
+                # Параметры пулов соединений - как у клиентов по умолчанию
+                .request(InstrumentedRequest(connection_pool_size=256, on_request=on_request))
+                .get_updates_request(InstrumentedRequest(connection_pool_size=1, on_request=on_request))
+                # Разные чаты - параллельно, обновления одного чата - по порядку
+                .concurrent_updates(self.update_processor)
                 .build()
             )
             
@@ -61,22 +219,36 @@ class VPNBot:
         if not self.application:
             return
 
+        # Ограничение частоты запросов до всех остальных обработчиков
+        self.application.add_handler(self._instrument(TypeHandler(Update, self._guard_update)), group=-1)
+
         # Создание расширенного ConversationHandler
         conversation_handler = ConversationHandler(
             entry_points=[
                 MessageHandler(filters.Regex(r"➕ Добавить сайт"), self.ask_add_site),
                 MessageHandler(filters.Regex(r"➖ Удалить сайт"), self.ask_delete_site),
-                MessageHandler(filters.Regex(r"🔄 Перезагрузить роутер"), self.ask_reboot_router)
+                MessageHandler(filters.Regex(r"🔄 Перезагрузить роутер"), self.ask_reboot_router),
+                MessageHandler(filters.Regex(r"🔍 Найти"), self.ask_find_site),
+                CommandHandler("find", self.cmd_find),
+                CommandHandler("sync", self.ask_sync_file)
             ],
             states={
                 ConversationStates.ADD_SITE: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.add_site)
+                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.add_site),
+                    MessageHandler(filters.Document.ALL, self.add_sites_file)
                 ],
                 ConversationStates.DELETE_SITE: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.delete_site)
+                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.delete_site),
+                    MessageHandler(filters.Document.ALL, self.delete_sites_file)
                 ],
                 ConversationStates.REBOOT_ROUTER: [
                     MessageHandler(filters.Regex(r"^(Да|Нет)$"), self.reboot_router)
+                ],
+                ConversationStates.FIND_SITE: [
+                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.find_site)
+                ],
+                ConversationStates.SYNC_FILE: [
+                    MessageHandler(filters.Document.ALL, self.sync_file)
                 ]
             },
             fallbacks=[CommandHandler('cancel', self.cancel_operation)],
@@ -86,15 +258,42 @@ class VPNBot:
         # Главные обработчики
         handlers = [
             CommandHandler("start", self.cmd_start),
+            CommandHandler("refresh", self.refresh_sites),
+            CommandHandler("stats", self.cmd_stats),
+            CommandHandler("status", self.cmd_status),
+            CommandHandler("mem", self.cmd_mem),
+            CommandHandler("logs", self.cmd_logs),
 
             MessageHandler(filters.Regex(r"📜 Список сайтов"), self.list_sites),
+            CallbackQueryHandler(self.list_sites_page, pattern=r"^sites:"),
+            CallbackQueryHandler(self.find_page, pattern=r"^find:"),
+            CallbackQueryHandler(self.sync_apply, pattern=r"^sync:"),
+            CommandHandler("export", self.cmd_export),
             MessageHandler(filters.Regex(r"🆘 Помощь"), self.cmd_help),
         ]
 
         # Добавление обработчиков
         for handler in handlers:
-            self.application.add_handler(handler)
-        self.application.add_handler(conversation_handler)
+            self.application.add_handler(self._instrument(handler))
+        self.application.add_handler(self._instrument(conversation_handler))
+
+    def _instrument(self, handler):
+        """Учет времени работы обработчика (и вложенных в ConversationHandler) в метриках."""
+        if isinstance(handler, ConversationHandler):
+            nested = [*handler.entry_points, *handler.fallbacks]
+            for state_handlers in handler.states.values():
+                nested.extend(state_handlers)
+            for child in nested:
+                self._instrument(child)
+            return handler
+
+        name = getattr(handler.callback, '__name__', type(handler).__name__)
+        handler.callback = timed(
+            HANDLER_SECONDS.labels(name),
+            HANDLER_ERRORS.labels(name),
+            ignore=(ApplicationHandlerStop,),
+        )(handler.callback)
+        return handler
 
     async def start(self):
         """Start bot with comprehensive error handling."""
@@ -110,19 +309,22 @@ class VPNBot:
                 except Exception as stop_error:
                     self.logger.warning(f"Error stopping existing updater: {stop_error}")
 
-            # Удаление вебхука
-            await self.application.bot.delete_webhook(drop_pending_updates=True)
-            
-            # Инициализация приложения
-            await self.application.initialize()
-            await self.application.start()
-            
-            # Запуск polling
-            await self.application.updater.start_polling(
-                poll_interval=1.0,   
-                timeout=20,           
-                drop_pending_updates=True  
-            )
+            if self.config.UPDATE_MODE == 'webhook':
+                await self._start_webhook()
+            else:
+                await self._start_polling()
+
+            if self.config.METRICS_PORT:
+                self.metrics_server = LocalHTTPServer(
+                    self.config.METRICS_LISTEN,
+                    self.config.METRICS_PORT,
+                    routes={'/metrics': self._serve_metrics},
+                )
+                await self.metrics_server.start()
+
+            if self.health_sampler:
+                self.health_sampler.start()
+            self.memory_monitor.start()
 
             # Бесконечный цикл
             while True:
@@ -135,6 +337,17 @@ class VPNBot:
         finally:
             # Безопасная остановка
             try:
+                if self.health_sampler:
+                    await self.health_sampler.stop()
+                await self.memory_monitor.stop()
+                if self.mutations:
+                    await self.mutations.close()
+                if self.webhook_server:
+                    await self.webhook_server.stop()
+                    self.webhook_server = None
+                if self.metrics_server:
+                    await self.metrics_server.stop()
+                    self.metrics_server = None
                 if self.application and self.application.updater.running:
                     await self.application.updater.stop()
                 if self.application and self.application.running:
@@ -143,6 +356,45 @@ class VPNBot:
             except Exception as shutdown_error:
                 self.logger.error(f"Error during shutdown: {shutdown_error}")
 
+    async def _start_polling(self):
+        """Получение обновлений через long polling."""
+        # Инициализация приложения
+        await self.application.initialize()
+        await self.application.start()
+        
+        # Запуск polling (вебхук удаляется самим start_polling вместе с
+        # ожидающими обновлениями, отдельный запрос не нужен)
+        await self.application.updater.start_polling(
+            poll_interval=1.0,   
+            timeout=20,           
+            drop_pending_updates=True  
+        )
+
+    async def _start_webhook(self):
+        """Получение обновлений через вебхук на локальный HTTP-сервер."""
+        # Импорт только в режиме вебхука
+        from app.webhook import WebhookReceiver
+
+        await self.application.initialize()
+        await self.application.start()
+
+        receiver = WebhookReceiver(self.application, self.config.WEBHOOK_SECRET)
+        self.webhook_server = LocalHTTPServer(
+            self.config.WEBHOOK_LISTEN,
+            self.config.WEBHOOK_PORT,
+            routes={self.config.WEBHOOK_PATH: receiver.handle},
+        )
+        await self.webhook_server.start()
+
+        # Регистрация вебхука только после того, как сервер готов принимать запросы
+        await self.application.bot.set_webhook(
+            url=self.config.WEBHOOK_URL,
+            secret_token=self.config.WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=True,
+        )
+        self.logger.info(f"Webhook mode enabled: {self.config.WEBHOOK_URL}")
+
     async def cmd_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Start command handler."""
         if not await self._is_user_allowed(update.effective_user.id):
@@ -170,22 +422,435 @@ class VPNBot:
             parse_mode="HTML"
         )
 
+    async def cmd_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Сводка метрик для администраторов."""
+        if update.effective_user.id not in self.config.ADMIN_USERS:
+            await update.message.reply_text(MESSAGES['access_denied'])
+            return
+
+        text = '\n'.join(METRICS.summary()) or "Нет данных"
+        # Сводка ограничена числом обработчиков, команд и методов API, но на
+        # всякий случай обрезается до лимита сообщения
+        await update.message.reply_text(
+            f"📊 <b>Статистика</b>\n<pre>{html.escape(text[:3800])}</pre>",
+            parse_mode="HTML",
+        )
+
+    async def cmd_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Состояние роутера по последнему фоновому замеру (команды не запускаются)."""
+        if not await self._is_user_allowed(update.effective_user.id):
+            await update.message.reply_text(MESSAGES['access_denied'])
+            return
+        if not self.health_sampler:
+            await update.message.reply_text(MESSAGES['status_disabled'])
+            return
+        if not self.health_sampler.last:
+            await update.message.reply_text(MESSAGES['status_unavailable'])
+            return
+        await update.message.reply_text(self._render_status(), parse_mode="HTML")
+
+    def _render_status(self) -> str:
+        """Текст /status: последний замер и тренды по истории."""
+        sampler = self.health_sampler
+        sample = sampler.last
+        samples = sampler.samples
+        age = int(time.monotonic() - sample.taken_at)
+
+        days, rest = divmod(int(sample.uptime), 86400)
+        hours, rest = divmod(rest, 3600)
+        uptime = f"{days} д {hours} ч {rest // 60} мин" if days else f"{hours} ч {rest // 60} мин"
+
+        load = ' '.join(f"{value:.2f}" for value in sample.load)
+        available_mb = sample.mem_available / 1024
+        total_mb = sample.mem_total / 1024
+        vpn = {True: "✅ работает", False: "❌ не работает", None: "нет данных"}[sample.vpn_up]
+
+        lines = [
+            f"📡 <b>Состояние роутера</b> (замер {age} с назад)",
+            "",
+            f"⏱ Аптайм: {uptime}",
+            f"📈 Нагрузка: {load}  {sparkline(s.load[0] for s in samples)}",
+            f"💾 Память: доступно {available_mb:.1f} из {total_mb:.1f} МБ  "
+            f"{sparkline(s.mem_available for s in samples)}",
+            f"🔐 VPN: {vpn}",
+            f"🔄 Интервал опроса: {int(sampler.interval)} с",
+        ]
+        if sampler.last_error:
+            lines.append(f"⚠️ Последний замер не удался: {html.escape(sampler.last_error[:200])}")
+        return '\n'.join(lines)
+
+    async def cmd_mem(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Память бота и места наибольших выделений (для администраторов)."""
+        if update.effective_user.id not in self.config.ADMIN_USERS:
+            await update.message.reply_text(MESSAGES['access_denied'])
+            return
+        await update.message.reply_text(self._render_memory(), parse_mode="HTML")
+
+    async def cmd_logs(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/logs [N] [уровень|логгер]: последние записи журнала (для администраторов)."""
+        if update.effective_user.id not in self.config.ADMIN_USERS:
+            await update.message.reply_text(MESSAGES['access_denied'])
+            return
+
+        path = log_file_path()
+        if not path:
+            await update.message.reply_text("📄 Журнал в файл не пишется (ENV не PROD и не DEV).")
+            return
+
+        limit, spec = LOGS_DEFAULT_RECORDS, None
+        for arg in context.args or ():
+            if arg.isdigit():
+                limit = min(max(1, int(arg)), LOGS_MAX_RECORDS)
+            else:
+                spec = arg
+
+        try:
+            # Чтение с конца файла: объем зависит от числа записей, а не от размера журнала
+            lines, read = await asyncio.to_thread(
+                tail_records, path, limit, spec, LOGS_MAX_SCAN_BYTES
+            )
+        except OSError as e:
+            self.logger.error(f"Ошибка чтения журнала: {e}")
+            await update.message.reply_text("❌ Не удалось прочитать журнал.")
+            return
+
+        title = f"📄 Журнал{f' ({html.escape(spec)})' if spec else ''}"
+        if not lines:
+            await update.message.reply_text(f"{title}: записей не найдено.", parse_mode="HTML")
+            return
+
+        body = html.escape('\n'.join(lines))
+        text = f"{title}:\n<pre>{body}</pre>"
+        if len(text) <= TELEGRAM_MESSAGE_LIMIT:
+            await update.message.reply_text(text, parse_mode="HTML")
+            return
+        with ListDocument(lines, 'router_bot.log') as document:
+            await update.message.reply_document(
+                document=document.file,
+                filename=document.filename,
+                caption=f"📄 Журнал: {len(lines)} строк, прочитано {read // 1024} КБ",
+            )
+
+    def _render_memory(self) -> str:
+        """Текст /mem."""
+        rss, peak = read_rss()
+        budget_kb = self.memory_monitor.budget_kb
+        budget = f"{budget_kb / 1024:.0f} МБ" if budget_kb else "не задан"
+        cache = self.site_cache.stats()
+        lines = [
+            "🧠 <b>Память</b>",
+            "",
+            f"RSS: {rss / 1024:.1f} МБ (пик {peak / 1024:.1f} МБ), бюджет: {budget}",
+            f"Очисток по бюджету: {self.memory_monitor.trims}",
+            f"Кэш списка: {cache['size']} записей, пользователей с данными: "
+            f"{len(self.application.user_data) if self.application else 0}",
+            f"Объектов Python: {len(gc.get_objects())}",
+        ]
+
+        top = top_allocations(MEM_TOP_ALLOCATIONS)
+        if not top:
+            lines.append("")
+            lines.append("Трассировка выделений выключена (MEMORY_TRACE).")
+            return '\n'.join(lines)
+
+        current, traced_peak = tracemalloc.get_traced_memory()
+        lines.append(f"Выделено Python: {current / 1048576:.1f} МБ (пик {traced_peak / 1048576:.1f} МБ)")
+        table = '\n'.join(f"{size / 1024:8.1f} КБ {count:7} {place}" for place, size, count in top)
+        lines.append(f"<pre>{html.escape(table)}</pre>")
+        return '\n'.join(lines)
+
+    def _trim_derived_data(self):
+        """Индекс поиска, отсортированная копия списка и страницы - строятся заново по запросу."""
+        self.site_cache.trim()
+        self._paginator = None
+
+    def _trim_user_data(self):
+        """Результаты поиска и планы синхронизации пользователей (кнопки покажут, что данные устарели)."""
+        if not self.application:
+            return
+        for user_data in self.application.user_data.values():
+            user_data.pop('find_paginator', None)
+            user_data.pop('sync_plan', None)
+
+    def _trim_list_cache(self):
+        """Сам кэш списка: следующий запрос перечитает список с роутера."""
+        self.site_cache.invalidate()
+        self._paginator = None
+        if self.list_file:
+            self.list_file.forget()
+
+    async def _serve_metrics(self, request: HTTPRequest) -> HTTPResponse:
+        """Выгрузка метрик для Prometheus."""
+        if request.method != 'GET':
+            return 405, 'text/plain', b'Method Not Allowed'
+        return 200, CONTENT_TYPE, METRICS.render().encode()
+
     async def list_sites(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Вывод списка заблокированных сайтов."""
         if not await self._is_user_allowed(update.effective_user.id):
             await update.message.reply_text(MESSAGES['access_denied'])
             return
         try:
-            sites_raw = await self.router_client.execute_command("kvas list")
-            sites_formatted = self.output_formatter.clean_terminal_output(sites_raw)
-            await update.message.reply_text(
-                f"📋 Список заблокированных сайтов:\n\n{sites_formatted or MESSAGES['site_list_empty']}",
-                parse_mode="HTML",
-            )
+            if self.site_cache.is_fresh:
+                await self._send_site_list(update, await self.site_cache.get())
+            else:
+                await self._load_and_send_site_list(update, self.site_cache.get)
+        except CircuitOpenError as e:
+            await update.message.reply_text(f"⏳ {e}")
         except Exception as e:
             self.logger.error(f"Ошибка получения списка сайтов: {e}", exc_info=True)
             await update.message.reply_text("❌ Не удалось получить список сайтов.")
 
+    async def refresh_sites(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Принудительное обновление кэша списка сайтов."""
+        if not await self._is_user_allowed(update.effective_user.id):
+            await update.message.reply_text(MESSAGES['access_denied'])
+            return
+        try:
+            await self._load_and_send_site_list(update, self.site_cache.refresh)
+        except CircuitOpenError as e:
+            await update.message.reply_text(f"⏳ {e}")
+        except Exception as e:
+            self.logger.error(f"Ошибка обновления списка сайтов: {e}", exc_info=True)
+            await update.message.reply_text("❌ Не удалось обновить список сайтов.")
+
+    async def list_sites_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Переключение страницы списка сайтов."""
+        query = update.callback_query
+        if not await self._is_user_allowed(update.effective_user.id):
+            await query.answer(MESSAGES['access_denied'], show_alert=True)
+            return
+        if query.data.endswith(':noop'):
+            await query.answer()
+            return
+
+        try:
+            paginator = self._get_paginator(await self.site_cache.get())
+        except Exception as e:
+            self.logger.error(f"Ошибка переключения страницы списка: {e}", exc_info=True)
+            await query.answer("❌ Не удалось получить список сайтов.", show_alert=True)
+            return
+        await self._show_page(query, paginator)
+
+    async def _show_page(self, query, paginator: ListPaginator):
+        """Показ страницы из callback-данных "<префикс>:<номер страницы>"."""
+        data = query.data.split(':', 1)[1]
+        if data == 'noop':
+            await query.answer()
+            return
+
+        try:
+            page = paginator.clamp(int(data))
+            await query.answer()
+            await query.edit_message_text(
+                paginator.render(page),
+                parse_mode="HTML",
+                reply_markup=paginator.keyboard(page),
+            )
+        except BadRequest as e:
+            # Страница не изменилась (повторное нажатие)
+            self.logger.debug(f"Failed to edit list page: {e}")
+        except Exception as e:
+            self.logger.error(f"Ошибка переключения страницы: {e}", exc_info=True)
+            await query.answer("❌ Не удалось показать страницу.", show_alert=True)
+
+    async def _load_and_send_site_list(self, update: Update, load):
+        """Загрузка списка с роутера с отображением хода чтения."""
+        status_message = await update.message.reply_text(
+            "<i>Загрузка списка сайтов...</i>",
+            parse_mode="HTML"
+        )
+        progress = ProgressReporter(status_message, self.config.PROGRESS_EDIT_INTERVAL)
+        entries = await load(
+            lambda count: progress.update(f"<i>Загрузка списка сайтов... получено записей: {count}</i>")
+        )
+        await self._send_site_list(update, entries, progress)
+
+    async def _send_site_list(self, update: Update, entries, progress: Optional[ProgressReporter] = None):
+        """Отправка первой страницы разобранного списка сайтов (длинного - файлом)."""
+        self.logger.debug(f"Кэш списка сайтов: {self.site_cache.stats()}")
+        threshold = self.config.LIST_DOCUMENT_THRESHOLD
+        if threshold and len(entries) >= threshold:
+            await self._send_list_document(update, entries, progress)
+            return
+        if not entries:
+            text, reply_markup = MESSAGES['site_list_empty'], None
+        else:
+            paginator = self._get_paginator(entries)
+            text, reply_markup = paginator.render(0), paginator.keyboard(0)
+
+        # Статусное сообщение загрузки превращается в первую страницу списка
+        if progress and await progress.finish(text, reply_markup=reply_markup):
+            return
+        await update.message.reply_text(text, parse_mode="HTML", reply_markup=reply_markup)
+
+    async def _send_list_document(self, update: Update, entries, progress: Optional[ProgressReporter] = None):
+        """Отправка списка файлом: .txt или .txt.gz, если сжатый меньше."""
+        text = f"📋 Список разблокировки содержит {len(entries)} записей, отправляю файлом."
+        if not (progress and await progress.finish(text)):
+            await update.message.reply_text(text, reply_markup=self._get_menu_keyboard())
+
+        # Сжатие большого списка заметно нагружает процессор - вне цикла событий
+        document = await asyncio.to_thread(ListDocument, entries, EXPORT_FILENAME)
+        with document:
+            self.logger.debug(
+                f"Файл списка: {document.entries} записей, {document.raw_size} байт, "
+                f"отправляется {document.size} байт ({document.filename})"
+            )
+            await update.message.reply_document(
+                document=document.file,
+                filename=document.filename,
+                caption=f"📋 Список разблокировки: {document.entries} записей",
+            )
+
+    def _get_paginator(self, entries) -> ListPaginator:
+        """Пагинатор для текущего снимка списка (пересоздается только при его изменении)."""
+        if self._paginator is None or self._paginator.entries is not entries:
+            self._paginator = ListPaginator(entries, max_page_size=self.config.LIST_PAGE_SIZE)
+        return self._paginator
+
+    async def _load_sites(self, progress=None):
+        """Чтение списка разблокировки: из файла КВАС, а без него - потоково из `kvas list`."""
+        if self.list_file:
+            entries = await self.list_file.read()
+            if entries is not None:
+                if progress:
+                    await progress(len(entries))
+                return entries
+
+        entries = set()
+        async for line in self.router_client.stream_command("kvas list"):
+            entry = self.output_formatter.extract_entry(line)
+            if entry:
+                entries.add(entry)
+                if progress:
+                    await progress(len(entries))
+        return entries
+
+    async def _stream_with_progress(self, command: str, success_marker: str, progress: ProgressReporter, title: str):
+        """
+        Выполнение команды с выводом последней строки в статусное сообщение.
+
+        Returns:
+            Tuple[bool, str]: Найден ли признак успеха и последние строки вывода
+        """
+        succeeded = False
+        tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        async for line in self.router_client.stream_command(command):
+            cleaned = self.output_formatter.clean_line(line)
+            if not cleaned:
+                continue
+            if success_marker in cleaned.lower():
+                succeeded = True
+            tail.append(cleaned)
+            await progress.update(f"<i>{title}...</i>\n{cleaned}")
+        return succeeded, '\n'.join(tail)
+
+    async def _mutate_site(self, verb: str, site: str, success_marker: str, progress: ProgressReporter, title: str):
+        """
+        `kvas add/del` для одного сайта: в составе общего пакета изменений
+        (MUTATION_WINDOW) или отдельной командой.
+
+        Returns:
+            Tuple[bool, str]: Найден ли признак успеха и последние строки вывода
+        """
+        if self.mutations is None:
+            return await self._stream_with_progress(f"kvas {verb} {site} -y", success_marker, progress, title)
+
+        async def show(line: str):
+            cleaned = self.output_formatter.clean_line(line)
+            if cleaned:
+                await progress.update(f"<i>{title}...</i>\n{cleaned}")
+
+        output = await self.mutations.submit(verb, site, on_line=show)
+        lines = [cleaned for cleaned in map(self.output_formatter.clean_line, output.split('\n')) if cleaned]
+        succeeded = any(success_marker in line.lower() for line in lines)
+        return succeeded, '\n'.join(lines[-OUTPUT_TAIL_LINES:])
+
+    def _is_listed(self, domain: str) -> Optional[bool]:
+        """Есть ли домен в списке отдельной записью (None - кэш не загружен)."""
+        known = self.site_cache.lookup(domain)
+        return None if known is None else known[0] == 'exact'
+
+    def _mutation_pending(self, domain: str) -> bool:
+        """Ждет ли домен применения в пакете изменений (тогда кэш о нем еще не знает)."""
+        return self.mutations is not None and self.mutations.pending_state(domain) is not None
+
+    async def ask_find_site(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Запрос строки поиска."""
+        if not await self._is_user_allowed(update.effective_user.id):
+            await update.message.reply_text(MESSAGES['access_denied'])
+            return ConversationHandler.END
+        await update.message.reply_text(MESSAGES['find_prompt'], parse_mode="HTML")
+        return ConversationStates.FIND_SITE
+
+    async def cmd_find(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/find <текст>: поиск сразу, без аргумента - запрос строки поиска."""
+        if not context.args:
+            return await self.ask_find_site(update, context)
+        if not await self._is_user_allowed(update.effective_user.id):
+            await update.message.reply_text(MESSAGES['access_denied'])
+            return ConversationHandler.END
+        await self._send_find_results(update, context, ' '.join(context.args))
+        return ConversationHandler.END
+
+    async def find_site(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Поиск по введенной строке."""
+        await self._send_find_results(update, context, update.message.text)
+        return ConversationHandler.END
+
+    async def find_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Переключение страницы результатов поиска."""
+        query = update.callback_query
+        if not await self._is_user_allowed(update.effective_user.id):
+            await query.answer(MESSAGES['access_denied'], show_alert=True)
+            return
+        paginator = context.user_data.get('find_paginator')
+        if paginator is None:
+            await query.answer(MESSAGES['find_expired'], show_alert=True)
+            return
+        await self._show_page(query, paginator)
+
+    async def _send_find_results(self, update: Update, context: ContextTypes.DEFAULT_TYPE, text: str):
+        """Поиск по списку разблокировки и отправка первой страницы результатов."""
+        text = text.strip()[:FIND_QUERY_MAX_LENGTH]
+        if not text.strip('*'):
+            await update.message.reply_text(MESSAGES['find_prompt'], parse_mode="HTML")
+            return
+
+        try:
+            await self.site_cache.get()
+        except CircuitOpenError as e:
+            await update.message.reply_text(f"⏳ {e}", reply_markup=self._get_menu_keyboard())
+            return
+        except Exception as e:
+            self.logger.error(f"Ошибка получения списка сайтов для поиска: {e}", exc_info=True)
+            await update.message.reply_text(
+                "❌ Не удалось получить список сайтов.", reply_markup=self._get_menu_keyboard()
+            )
+            return
+
+        found, total = self.site_cache.find(text, self.config.FIND_MAX_RESULTS)
+        if not found:
+            await update.message.reply_text(
+                MESSAGES['find_nothing'].format(query=html.escape(text)),
+                parse_mode="HTML",
+                reply_markup=self._get_menu_keyboard(),
+            )
+            return
+
+        title = f"🔍 Поиск «{html.escape(text)}»"
+        if total > len(found):
+            title += f": найдено {total}, показаны первые"
+        paginator = ListPaginator(
+            found, max_page_size=self.config.LIST_PAGE_SIZE, callback_prefix='find', title=title
+        )
+        # Последние результаты поиска пользователя - для переключения страниц
+        context.user_data['find_paginator'] = paginator
+        await update.message.reply_text(
+            paginator.render(0), parse_mode="HTML", reply_markup=paginator.keyboard(0)
+        )
+
     async def ask_add_site(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Запрос на добавление сайта с улучшенной обработкой."""
         if not await self._is_user_allowed(update.effective_user.id):
@@ -194,7 +859,7 @@ class VPNBot:
 
         await update.message.reply_text(
             MESSAGES['site_add_prompt'], 
-            reply_markup=ReplyKeyboardMarkup([['Отмена']], resize_keyboard=True)
+            reply_markup=CANCEL_KEYBOARD
         )
         return ConversationStates.ADD_SITE
 
@@ -207,7 +872,13 @@ class VPNBot:
             )
             return ConversationHandler.END
 
-        site = update.message.text.strip().lower()
+        domains = split_domains(update.message.text)
+        if len(domains) > 1:
+            await self._apply_bulk(update.message, 'add', domains)
+            return ConversationHandler.END
+
+        # Разделители и повторы уже отброшены split_domains ("google.com," -> google.com)
+        site = domains[0] if domains else ''
 
         if not self._validate_domain(site):
             await update.message.reply_text(
@@ -216,38 +887,40 @@ class VPNBot:
             )
             return ConversationHandler.END
 
+        known = None if self._mutation_pending(site) else self.site_cache.lookup(site)
+        if known and known[0]:
+            kind, entry = known
+            await update.message.reply_text(
+                f"☑️ Сайт {site} уже есть в списке ({entry})."
+                if kind == 'exact'
+                else f"☑️ Сайт {site} уже разблокирован записью {entry}.",
+                reply_markup=self._get_menu_keyboard()
+            )
+            return ConversationHandler.END
+
         try:
             status_message = await update.message.reply_text(
                 "<i>Добавление сайта...</i>",
                 parse_mode="HTML",
                 reply_markup=self._get_menu_keyboard()
             )
-            
-            output = await self.router_client.execute_command(f"kvas add {site} -y")
-            if "добавлен" in output.lower():
-                try:
-                    await status_message.edit_text(
-                        f"✅ Сайт {site} успешно добавлен.",
-                        reply_markup=self._get_menu_keyboard()
-                    )
-                except Exception as edit_error:
-                    self.logger.warning(f"Failed to edit message: {edit_error}")
-                    await update.message.reply_text(
-                        f"✅ Сайт {site} успешно добавлен.",
-                        reply_markup=self._get_menu_keyboard()
-                    )
+            progress = ProgressReporter(status_message, self.config.PROGRESS_EDIT_INTERVAL)
+
+            added, output = await self._mutate_site(
+                'add', site, "добавлен", progress, "Добавление сайта"
+            )
+            if added:
+                self.site_cache.add(site)
+                message_text = f"✅ Сайт {site} успешно добавлен."
             else:
-                try:
-                    await status_message.edit_text(
-                        f"❌ Не удалось добавить сайт. Ответ: {output}",
-                        reply_markup=self._get_menu_keyboard()
-                    )
-                except Exception as edit_error:
-                    self.logger.warning(f"Failed to edit message: {edit_error}")
-                    await update.message.reply_text(
-                        f"❌ Не удалось добавить сайт. Ответ: {output}",
-                        reply_markup=self._get_menu_keyboard()
-                    )
+                message_text = f"❌ Не удалось добавить сайт. Ответ: {output}"
+
+            if not await progress.finish(message_text):
+                await update.message.reply_text(
+                    message_text,
+                    parse_mode="HTML",
+                    reply_markup=self._get_menu_keyboard()
+                )
         except Exception as e:
             self.logger.error(f"Error adding site: {e}")
             await update.message.reply_text(
@@ -265,7 +938,7 @@ class VPNBot:
 
         await update.message.reply_text(
             MESSAGES['site_delete_prompt'], 
-            reply_markup=ReplyKeyboardMarkup([['Отмена']], resize_keyboard=True)
+            reply_markup=CANCEL_KEYBOARD
         )
         return ConversationStates.DELETE_SITE
 
@@ -278,7 +951,13 @@ class VPNBot:
             )
             return ConversationHandler.END
 
-        site = update.message.text.strip().lower()
+        domains = split_domains(update.message.text)
+        if len(domains) > 1:
+            await self._apply_bulk(update.message, 'del', domains)
+            return ConversationHandler.END
+
+        # Разделители и повторы уже отброшены split_domains ("google.com," -> google.com)
+        site = domains[0] if domains else ''
 
         if not self._validate_domain(site):
             await update.message.reply_text(
@@ -287,6 +966,17 @@ class VPNBot:
             )
             return ConversationHandler.END
 
+        known = None if self._mutation_pending(site) else self.site_cache.lookup(site)
+        if known and known[0] != 'exact':
+            kind, entry = known
+            await update.message.reply_text(
+                f"☑️ Сайта {site} нет в списке (он разблокирован записью {entry})."
+                if kind == 'covered'
+                else f"☑️ Сайта {site} нет в списке.",
+                reply_markup=self._get_menu_keyboard()
+            )
+            return ConversationHandler.END
+
         try:
             # Отправляем начальное сообщение
             status_message = await update.message.reply_text(
@@ -294,28 +984,26 @@ class VPNBot:
                 parse_mode="HTML",
                 reply_markup=self._get_menu_keyboard()
             )
+            progress = ProgressReporter(status_message, self.config.PROGRESS_EDIT_INTERVAL)
             
             # Выполняем команду удаления
-            output = await self.router_client.execute_command(f"kvas del {site} -y")
+            deleted, output = await self._mutate_site(
+                'del', site, "удален", progress, "Удаление сайта"
+            )
             
             # Определяем текст результата
-            message_text = (
-                f"✅ Сайт {site} успешно удален."
-                if "удален" in output.lower()
-                else f"❌ Не удалось удалить сайт. Ответ: {output}"
-            )
+            if deleted:
+                self.site_cache.discard(site)
+                message_text = f"✅ Сайт {site} успешно удален."
+            else:
+                message_text = f"❌ Не удалось удалить сайт. Ответ: {output}"
             
             # Пытаемся редактировать сообщение
-            try:
-                await status_message.edit_text(
-                    message_text,
-                    reply_markup=self._get_menu_keyboard()
-                )
-            except Exception as edit_error:
+            if not await progress.finish(message_text):
                 # Если редактирование не удалось, отправляем новое сообщение
-                self.logger.warning(f"Failed to edit message: {edit_error}")
                 await update.message.reply_text(
                     message_text,
+                    parse_mode="HTML",
                     reply_markup=self._get_menu_keyboard()
                 )
         except Exception as e:
@@ -328,6 +1016,242 @@ class VPNBot:
 
         return ConversationHandler.END
 
+    async def add_sites_file(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Пакетное добавление сайтов из .txt файла."""
+        return await self._bulk_from_document(update, 'add')
+
+    async def delete_sites_file(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Пакетное удаление сайтов из .txt файла."""
+        return await self._bulk_from_document(update, 'del')
+
+    async def _bulk_from_document(self, update: Update, verb: str):
+        """Чтение списка доменов из загруженного файла и пакетная обработка."""
+        document = update.message.document
+        if document.file_size and document.file_size > MAX_UPLOAD_SIZE:
+            await update.message.reply_text(
+                MESSAGES['bulk_file_too_large'],
+                reply_markup=self._get_menu_keyboard()
+            )
+            return ConversationHandler.END
+
+        try:
+            file = await document.get_file()
+            data = await file.download_as_bytearray()
+            domains = list(dict.fromkeys(iter_domains(chunked(data))))
+        except UnicodeDecodeError:
+            await update.message.reply_text(
+                MESSAGES['bulk_file_invalid'],
+                reply_markup=self._get_menu_keyboard()
+            )
+            return ConversationHandler.END
+        except Exception as e:
+            self.logger.error(f"Ошибка загрузки файла со списком: {e}", exc_info=True)
+            await update.message.reply_text(
+                f"❌ Произошла ошибка: {str(e)}",
+                reply_markup=self._get_menu_keyboard()
+            )
+            return ConversationHandler.END
+
+        await self._apply_bulk(update.message, verb, domains)
+        return ConversationHandler.END
+
+    async def _apply_bulk(self, message, verb: str, domains):
+        """
+        Пакетное добавление или удаление доменов (сводка - ответом на message).
+
+        Домены проверяются и отправляются на роутер пачками по BULK_CHUNK_SIZE,
+        каждая пачка выполняется одним вызовом. Сводка обновляется после каждой пачки.
+        """
+        if not domains:
+            await message.reply_text(
+                MESSAGES['bulk_empty'],
+                reply_markup=self._get_menu_keyboard()
+            )
+            return
+
+        summary = BatchSummary(verb, len(domains))
+        valid = []
+        # Домены, о которых ответил сам роутер: только они записываются в кэш
+        confirmed = []
+        for domain in domains:
+            if not self._validate_domain(domain):
+                summary.invalid.append(domain)
+                continue
+            # Дубликаты и отсутствующие домены отсеиваются по кэшу без вызова kvas
+            known = self.site_cache.lookup(domain)
+            if known and (known[0] if verb == 'add' else known[0] != 'exact'):
+                summary.skipped.append(domain)
+                continue
+            valid.append(domain)
+
+        status_message = await message.reply_text(
+            summary.render(finished=False),
+            parse_mode="HTML",
+            reply_markup=self._get_menu_keyboard()
+        )
+
+        chunk_size = max(1, self.config.BULK_CHUNK_SIZE)
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            try:
+                output = await self.router_client.execute_command(
+                    build_batch_command(verb, chunk),
+                    timeout=self.config.COMMAND_TIMEOUT * len(chunk)
+                )
+                results = parse_batch_output(output)
+            except Exception as e:
+                self.logger.error(f"Ошибка пакетной обработки ({verb}): {e}")
+                results = {}
+
+            for domain in chunk:
+                if domain not in results:
+                    summary.failed.append(domain)
+                elif summary.record(domain, results[domain]) is not None:
+                    confirmed.append(domain)
+
+            if start + chunk_size < len(valid):
+                await self._edit_status(status_message, summary.render(finished=False))
+
+        # Сквозная запись в кэш списка. Пропущенные по самому кэшу домены
+        # не записываются: покрытый записью "*.youtube.com" домен не должен
+        # превращаться в отдельную запись, которой на роутере нет
+        for domain in confirmed:
+            if verb == 'add':
+                self.site_cache.add(domain)
+            else:
+                self.site_cache.discard(domain)
+
+        self.logger.info(
+            f"Пакетная обработка ({verb}) завершена: {len(summary.done)} успешно, "
+            f"{len(summary.skipped)} пропущено, {len(summary.invalid)} некорректно, "
+            f"{len(summary.failed)} с ошибкой"
+        )
+        await self._edit_status(status_message, summary.render())
+
+    async def ask_sync_file(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Запрос файла с желаемым списком для синхронизации."""
+        if not await self._is_user_allowed(update.effective_user.id):
+            await update.message.reply_text(MESSAGES['access_denied'])
+            return ConversationHandler.END
+        await update.message.reply_text(MESSAGES['sync_prompt'], parse_mode="HTML")
+        return ConversationStates.SYNC_FILE
+
+    async def sync_file(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Расчет разницы между загруженным и текущим списком и предпросмотр."""
+        document = update.message.document
+        if document.file_size and document.file_size > SYNC_MAX_UPLOAD_SIZE:
+            await update.message.reply_text(
+                MESSAGES['bulk_file_too_large'],
+                reply_markup=self._get_menu_keyboard()
+            )
+            return ConversationHandler.END
+
+        try:
+            # Текущий список перечитывается: план должен учитывать изменения,
+            # сделанные на роутере в обход бота
+            current = await self.site_cache.refresh()
+            file = await document.get_file()
+            data = await file.download_as_bytearray()
+            plan = SyncPlan(iter_domains(chunked(data)), current, self._validate_domain)
+        except UnicodeDecodeError:
+            await update.message.reply_text(
+                MESSAGES['bulk_file_invalid'],
+                reply_markup=self._get_menu_keyboard()
+            )
+            return ConversationHandler.END
+        except CircuitOpenError as e:
+            await update.message.reply_text(f"⏳ {e}", reply_markup=self._get_menu_keyboard())
+            return ConversationHandler.END
+        except Exception as e:
+            self.logger.error(f"Ошибка подготовки синхронизации: {e}", exc_info=True)
+            await update.message.reply_text(
+                f"❌ Произошла ошибка: {str(e)}",
+                reply_markup=self._get_menu_keyboard()
+            )
+            return ConversationHandler.END
+
+        if plan.is_empty:
+            context.user_data.pop('sync_plan', None)
+            await update.message.reply_text(
+                MESSAGES['sync_no_changes'],
+                reply_markup=self._get_menu_keyboard()
+            )
+            return ConversationHandler.END
+
+        # План применяется только по кнопке (последний предпросмотр пользователя)
+        context.user_data['sync_plan'] = plan
+        await update.message.reply_text(
+            plan.render_preview(),
+            parse_mode="HTML",
+            reply_markup=SYNC_CONFIRM_KEYBOARD,
+        )
+        return ConversationHandler.END
+
+    async def sync_apply(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Применение или отмена плана синхронизации."""
+        query = update.callback_query
+        if not await self._is_user_allowed(update.effective_user.id):
+            await query.answer(MESSAGES['access_denied'], show_alert=True)
+            return
+
+        plan = context.user_data.pop('sync_plan', None)
+        if plan is None:
+            await query.answer(MESSAGES['sync_expired'], show_alert=True)
+            return
+        await query.answer()
+
+        try:
+            # Кнопки убираются, чтобы план нельзя было применить дважды
+            await query.edit_message_reply_markup(reply_markup=None)
+        except BadRequest as e:
+            self.logger.debug(f"Failed to remove sync buttons: {e}")
+
+        if query.data != 'sync:apply':
+            await query.message.reply_text(MESSAGES['sync_cancelled'], reply_markup=self._get_menu_keyboard())
+            return
+
+        self.logger.info(
+            f"Синхронизация списка пользователем {update.effective_user.id}: "
+            f"+{len(plan.add)} -{len(plan.delete)}"
+        )
+        # Сначала удаление: добавляемый поддомен может быть покрыт удаляемой записью
+        if plan.delete:
+            await self._apply_bulk(query.message, 'del', plan.delete)
+        if plan.add:
+            await self._apply_bulk(query.message, 'add', plan.add)
+
+    async def cmd_export(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Выгрузка текущего списка разблокировки файлом."""
+        if not await self._is_user_allowed(update.effective_user.id):
+            await update.message.reply_text(MESSAGES['access_denied'])
+            return
+        try:
+            entries = await self.site_cache.get()
+        except CircuitOpenError as e:
+            await update.message.reply_text(f"⏳ {e}")
+            return
+        except Exception as e:
+            self.logger.error(f"Ошибка выгрузки списка сайтов: {e}", exc_info=True)
+            await update.message.reply_text("❌ Не удалось получить список сайтов.")
+            return
+
+        if not entries:
+            await update.message.reply_text(MESSAGES['site_list_empty'])
+            return
+        # Без сжатия: выгрузку можно сразу загрузить обратно через /sync
+        with ListDocument(entries, EXPORT_FILENAME, compress=False) as document:
+            await update.message.reply_document(
+                document=document.file,
+                filename=document.filename,
+                caption=f"📋 Список разблокировки: {document.entries} записей",
+            )
+
+    async def _edit_status(self, status_message, text: str):
+        """Обновление статусного сообщения с обработкой ошибок редактирования."""
+        try:
+            await status_message.edit_text(text, parse_mode="HTML")
+        except BadRequest as edit_error:
+            self.logger.warning(f"Failed to edit message: {edit_error}")
 
     async def ask_reboot_router(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Вопрос на перезагрузку роутера."""
@@ -336,7 +1260,7 @@ class VPNBot:
             return ConversationHandler.END
         await update.message.reply_text(
             "🤔 Вы действительно хотите перезагрузить роутер?",
-            reply_markup=ReplyKeyboardMarkup([["Да", "Нет"]], resize_keyboard=True),
+            reply_markup=REBOOT_CONFIRM_KEYBOARD,
         )
         return ConversationStates.REBOOT_ROUTER
 
@@ -358,6 +1282,48 @@ class VPNBot:
         await update.message.reply_text("Операция отменена.")
         return ConversationHandler.END
 
+    async def _guard_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Единая точка ограничения частоты запросов для всех обработчиков."""
+        user = update.effective_user
+        # Чужие пользователи получают отказ в самих обработчиках
+        if user is None or user.id not in self.config.ALLOWED_USERS:
+            return
+
+        category = self._request_category(update)
+        limiter = self.rate_limiters[category]
+        if limiter.allow(user.id):
+            return
+
+        retry_after = max(1, int(limiter.retry_after(user.id)) + 1)
+        self.logger.warning(f"Rate limit ({category}) exceeded for user {user.id}")
+        text = f"⏳ Слишком много запросов. Повторите через {retry_after} с."
+        if update.callback_query:
+            await update.callback_query.answer(text, show_alert=True)
+        elif update.effective_message:
+            await update.effective_message.reply_text(text)
+        raise ApplicationHandlerStop
+
+    def _request_category(self, update: Update) -> str:
+        """Категория запроса для ограничения частоты: 'costly' или 'cheap'."""
+        # Пока кэш свеж, поиск и листание обходятся без роутера
+        stale = not self.site_cache.is_fresh
+        query = update.callback_query
+        if query is not None:
+            if query.data == 'sync:apply':
+                return 'costly'
+            if stale and query.data and LIST_CALLBACKS.match(query.data):
+                return 'costly'
+        message = update.message
+        if message is None:
+            return 'cheap'
+        if message.document is not None:
+            return 'costly'
+        if message.text and COSTLY_ACTIONS.match(message.text):
+            return 'costly'
+        if stale and message.text and LIST_ACTIONS.match(message.text):
+            return 'costly'
+        return 'cheap'
+
     def _validate_domain(self, domain: str) -> bool:
         """Enhanced domain validation."""
         if not domain or len(domain) > 255:
@@ -369,27 +1335,17 @@ class VPNBot:
 
     async def _is_user_allowed(self, user_id: int) -> bool:
         """Enhanced user access control."""
-        # Debugging print
-        self.logger.info(f"Checking access for user {user_id}")
+        # Вызывается на каждое нажатие кнопки: по умолчанию не пишется
+        self.access_logger.debug("Checking access for user %s", user_id)
         
         # Check if user is in allowed list
         is_allowed = user_id in self.config.ALLOWED_USERS
         
         if not is_allowed:
-            self.logger.warning(f"Access denied for user {user_id}")
+            self.access_logger.warning("Access denied for user %s", user_id)
         
         return is_allowed
 
     def _get_menu_keyboard(self) -> ReplyKeyboardMarkup:
-        """Create menu keyboard."""
-        keyboard = [
-            ["📜 Список сайтов"],
-            ["➕ Добавить сайт", "➖ Удалить сайт"],
-            ["🆘 Помощь"],
-            ["🔄 Перезагрузить роутер"],
-        ]
-        return ReplyKeyboardMarkup(
-            keyboard=keyboard, 
-            resize_keyboard=True, 
-            one_time_keyboard=False
-        )
\ No newline at end of file
+        """Menu keyboard (shared instance)."""
+        return MENU_KEYBOARD
\ No newline at end of file
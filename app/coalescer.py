@@ -0,0 +1,318 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Set
+
+from app.batch import BATCH_MARKER, build_batch_command, classify_result
+from app.list_source import KvasListFile
+from app.logger import get_logger
+from app.router_client import RouterLocalClient, RouterResponse
+
+
+class _Mutation(NamedTuple):
+    verb: str  # 'add' или 'del'
+    future: asyncio.Future
+    on_line: Optional[Callable[[str], Awaitable[None]]]
+
+
+class MutationCoalescer:
+    """
+    Объединение изменений списка разблокировки от всех пользователей.
+
+    Каждый `kvas add/del` заставляет роутер заново применять список (ipset,
+    dnsmasq). Изменения, поступившие в течение window секунд после первого,
+    собираются вместе и отправляются на роутер одной пакетной командой -
+    одним изменяющим вызовом вместо очереди отдельных.
+
+    Для каждого домена на роутере выполняется только последняя операция:
+    итоговое состояние определяется ею. Если состояние домена до пакета
+    известно (is_listed, обычно по кэшу списка) и последняя операция его
+    не меняет - например, добавление и удаление одного домена, - домен
+    на роутер не отправляется вовсе. Каждый ожидающий получает результат
+    своей операции так, как если бы операции выполнялись по очереди
+    в порядке поступления.
+
+    Пакеты применяются строго по одному. Изменения, поступившие во время
+    применения пакета, попадают в следующий; для доменов предыдущего пакета
+    следующий опирается на подтвержденный роутером итог, а не на кэш.
+
+    Если доступен файл списка КВАС (list_file) и задана команда применения
+    (apply_command), итог пакета записывается в файл и применяется одной
+    командой - ipset/dnsmasq перестраиваются один раз на весь пакет. Иначе,
+    а также если применение не удалось (файл при этом откатывается), каждый
+    домен пакета - отдельный `kvas add/del` внутри одной команды роутера.
+    """
+
+    def __init__(
+        self,
+        router_client: RouterLocalClient,
+        window: float,
+        timeout: float,
+        is_listed: Optional[Callable[[str], Optional[bool]]] = None,
+        list_file: Optional[KvasListFile] = None,
+        apply_command: str = '',
+    ):
+        self.router_client = router_client
+        self.window = window
+        self.timeout = timeout  # На один домен пакета
+        self._is_listed = is_listed or (lambda domain: None)
+        self.list_file = list_file
+        self.apply_command = apply_command
+        self.logger = get_logger(__name__)
+
+        # Домен -> операции в порядке поступления
+        self._pending: Dict[str, List[_Mutation]] = {}
+        # Применяемый сейчас пакет
+        self._batch: Dict[str, List[_Mutation]] = {}
+        # Домен -> есть ли он в списке после предыдущего пакета (по ответу роутера)
+        self._settled: Dict[str, bool] = {}
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Статистика
+        self.submitted = 0
+        self.batches = 0
+        self.applied = 0
+        self.cancelled = 0
+        self.list_applies = 0  # Пакетов, примененных через файл списка
+
+    async def submit(
+        self,
+        verb: str,
+        domain: str,
+        on_line: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> str:
+        """
+        Добавление или удаление домена в составе ближайшего пакета.
+
+        Args:
+            verb (str): 'add' или 'del'
+            domain (str): Домен
+            on_line: Необязательный обработчик строк вывода `kvas` для этого домена
+
+        Returns:
+            str: Вывод `kvas` для домена (или равнозначный ему ответ, если
+                результат операции определен без обращения к роутеру)
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(domain, []).append(_Mutation(verb, future, on_line))
+        self.submitted += 1
+        if self._timer is None:
+            self._timer = self._spawn(self._flush_later())
+        return await future
+
+    def pending_state(self, domain: str) -> Optional[bool]:
+        """
+        Будет ли домен в списке после ожидающих и применяемых сейчас операций
+        (None - операций нет).
+        """
+        mutations = self._pending.get(domain) or self._batch.get(domain)
+        if not mutations:
+            return None
+        return mutations[-1].verb == 'add'
+
+    def stats(self) -> dict:
+        """Статистика для метрик."""
+        return {
+            'pending': sum(len(mutations) for mutations in self._pending.values()),
+            'applying': sum(len(mutations) for mutations in self._batch.values()),
+            'submitted': self.submitted,
+            'batches': self.batches,
+            'applied': self.applied,
+            'cancelled': self.cancelled,
+            'list_applies': self.list_applies,
+        }
+
+    async def close(self):
+        """Немедленное применение ожидающих изменений."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._spawn(self._flush())
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.window)
+        except asyncio.CancelledError:
+            # Таймер отменен не через close (например, при остановке цикла):
+            # собранные изменения больше никто не применит
+            if self._timer is asyncio.current_task():
+                self._timer = None
+                self._cancel_pending()
+            raise
+        self._timer = None
+        await self._flush()
+
+    async def _flush(self):
+        try:
+            await self._lock.acquire()
+        except asyncio.CancelledError:
+            if self._timer is None:
+                self._cancel_pending()
+            raise
+        # Изменения, поступившие во время выполнения пакета, попадут в следующий
+        batch, self._pending = self._pending, {}
+        settled, self._settled = self._settled, {}
+        self._batch = batch
+        try:
+            await self._apply(batch, settled)
+        except Exception as e:
+            self.logger.error(f"Ошибка применения пакета изменений: {e}")
+            self._fail(batch, e)
+        finally:
+            self._batch = {}
+            # Отмененный посреди применения пакет: ожидающие получают отмену, а не зависают
+            self._fail(batch, None)
+            self._lock.release()
+
+    def _cancel_pending(self):
+        batch, self._pending = self._pending, {}
+        self._fail(batch, None)
+
+    @staticmethod
+    def _fail(batch: Dict[str, List[_Mutation]], error: Optional[BaseException]):
+        """Завершение ожидающих без результата: с ошибкой error или отменой (None)."""
+        for mutations in batch.values():
+            for mutation in mutations:
+                if mutation.future.done():
+                    continue
+                if error is None:
+                    mutation.future.cancel()
+                else:
+                    mutation.future.set_exception(error)
+
+    async def _apply(self, batch: Dict[str, List[_Mutation]], settled: Dict[str, bool]):
+        # Домен -> операция, выполняемая на роутере
+        commands: Dict[str, str] = {}
+        for domain, mutations in batch.items():
+            final = mutations[-1].verb
+            # Итогу предыдущего пакета можно верить и для одной операции,
+            # кэшу - только для сокращения нескольких
+            listed = settled.get(domain)
+            if listed is None and len(mutations) > 1:
+                listed = self._is_listed(domain)
+            if listed is not None and listed == (final == 'add'):
+                self.cancelled += len(mutations)
+                self._resolve(domain, mutations, listed)
+            else:
+                commands[domain] = final
+
+        if not commands:
+            return
+
+        self.batches += 1
+        self.applied += len(commands)
+        self.logger.info(
+            f"Применение пакета изменений: {len(commands)} доменов, "
+            f"{sum(len(batch[domain]) for domain in commands)} операций"
+        )
+        if self.list_file is not None and self.apply_command:
+            if await self._apply_list_file(batch, commands):
+                return
+
+        # Вывод пакета разбирается на лету: строки до маркера относятся
+        # к текущему домену (команды выполняются в порядке перечисления)
+        order = list(commands)
+        outputs: Dict[str, str] = {}
+        lines: List[str] = []
+        position = 0
+        command = '; '.join(
+            build_batch_command(verb, [domain]) for domain, verb in commands.items()
+        )
+        async for line in self.router_client.stream_command(command, timeout=self.timeout * len(order)):
+            if line.startswith(BATCH_MARKER):
+                domain = line[len(BATCH_MARKER):].strip()
+                outputs[domain] = '\n'.join(lines).strip()
+                self._finish(domain, commands[domain], batch[domain], outputs[domain])
+                lines = []
+                position += 1
+                continue
+            lines.append(line)
+            if position < len(order):
+                for mutation in batch[order[position]]:
+                    await self._notify(mutation, line)
+
+        for domain in order:
+            if domain not in outputs:
+                self._finish(domain, commands[domain], batch[domain], '')
+
+    async def _apply_list_file(self, batch: Dict[str, List[_Mutation]], commands: Dict[str, str]) -> bool:
+        """
+        Применение пакета одним циклом КВАС: правка файла списка и apply_command.
+
+        Returns:
+            bool: False - файл недоступен или применение не удалось (файл откачен),
+                пакет нужно выполнить командами `kvas add/del`
+        """
+        async def edit_and_apply(run) -> Optional[Dict[str, bool]]:
+            try:
+                changed, previous = await self.list_file.apply(commands)
+            except OSError as e:
+                self.logger.warning(f"Файл списка недоступен, изменения отправляются в kvas: {e}")
+                return None
+            if previous is None:
+                # Список не изменился - применять нечего
+                return changed
+            try:
+                await run()
+            except Exception as e:
+                self.logger.warning(f"Ошибка применения списка, файл восстановлен: {e}")
+                await self.list_file.restore(previous)
+                return None
+            self.list_applies += 1
+            return changed
+
+        changed = await self.router_client.execute_locked(
+            self.apply_command, edit_and_apply, timeout=self.timeout * len(commands)
+        )
+        if changed is None:
+            return False
+        for domain, verb in commands.items():
+            # Состояние до пакета следует из того, изменила ли его последняя операция
+            self._resolve(domain, batch[domain], changed[domain] != (verb == 'add'))
+        return True
+
+    def _finish(self, domain: str, verb: str, mutations: List[_Mutation], output: str):
+        """Раздача результата выполненной на роутере операции ожидающим."""
+        changed = classify_result(verb, output)
+        if changed is not None:
+            self._settled[domain] = verb == 'add'
+        if len(mutations) == 1 or changed is None:
+            for mutation in mutations:
+                if not mutation.future.done():
+                    mutation.future.set_result(output)
+            return
+        # Промежуточные операции пропущены, поэтому последняя видела
+        # состояние до пакета: из ее результата оно и восстанавливается
+        listed = changed != (verb == 'add')
+        self._resolve(domain, mutations, listed)
+
+    def _resolve(self, domain: str, mutations: List[_Mutation], listed: bool):
+        """Результаты операций, выполненных по очереди от состояния listed."""
+        self._settled[domain] = mutations[-1].verb == 'add'
+        for mutation in mutations:
+            adding = mutation.verb == 'add'
+            changed = adding != listed
+            listed = adding
+            if mutation.future.done():
+                continue
+            if adding:
+                output = f"{domain} {RouterResponse.ADD_SUCCESS}" if changed else f"{domain} уже есть в списке"
+            else:
+                output = f"{domain} {RouterResponse.DELETE_SUCCESS}" if changed else RouterResponse.DELETE_NOT_FOUND
+            mutation.future.set_result(output)
+
+    async def _notify(self, mutation: _Mutation, line: str):
+        if mutation.on_line is None or mutation.future.done():
+            return
+        try:
+            await mutation.on_line(line)
+        except Exception as e:
+            self.logger.warning(f"Ошибка обработчика вывода: {e}")
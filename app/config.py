@@ -1,7 +1,21 @@
 import os
 import re
+import secrets
 from enum import Enum, auto
-from dotenv import load_dotenv
+from urllib.parse import urlparse
+
+_env_loaded = False
+
+
+def load_env():
+    """Загрузка переменных окружения из .env файла (один раз за процесс)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    _env_loaded = True
+
 
 # Расширенное управление конфигурацией
 class ConfigError(Exception):
@@ -15,18 +29,90 @@ class ConnectionMode(Enum):
 class Config:
     def __init__(self):
         # Load environment variables from .env file
-        load_dotenv()
+        load_env()
 
         # Проверка критической конфигурации
         self.validate_config()
 
         self.BOT_TOKEN = self._get_env('BOT_TOKEN')
         self.ALLOWED_USERS = set(map(int, self._get_env('ALLOWED_USERS').split(',')))
+        # Администраторы (служебные команды, например /stats); по умолчанию - все разрешенные
+        admin_users = os.getenv('ADMIN_USERS')
+        self.ADMIN_USERS = set(map(int, admin_users.split(','))) if admin_users else set(self.ALLOWED_USERS)
+
+        # Способ получения обновлений: polling или webhook
+        self.UPDATE_MODE = self._get_env_choice('UPDATE_MODE', ('polling', 'webhook'))
+        self.WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+        self.WEBHOOK_PATH = urlparse(self.WEBHOOK_URL).path or '/'
+        self.WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+        self.WEBHOOK_PORT = self._get_env_int('WEBHOOK_PORT', 8443)
+        # Без явного секрета используется случайный: вебхук переустанавливается при каждом запуске
+        self.WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET') or secrets.token_urlsafe(32)
+
+        # Выгрузка метрик в формате Prometheus (0 - отключена)
+        self.METRICS_LISTEN = os.getenv('METRICS_LISTEN', '127.0.0.1')
+        self.METRICS_PORT = self._get_env_int('METRICS_PORT', 0)
+
+        # Удаленный роутер: команды выполняются по SSH (пустой ROUTER_HOST - на этом же роутере)
+        self.ROUTER_HOST = os.getenv('ROUTER_HOST', '')
+        self.ROUTER_PORT = self._get_env_int('ROUTER_PORT', 22)
+        self.ROUTER_USER = os.getenv('ROUTER_USER', 'root')
+        self.ROUTER_CONNECTION_MODE = ConnectionMode[self._get_env_choice('ROUTER_AUTH', ('key', 'password')).upper()]
+        self.ROUTER_PASSWORD = os.getenv('ROUTER_PASSWORD', '')
+        self.ROUTER_KEY_FILE = os.getenv('ROUTER_KEY_FILE', '')  # Пусто - ключи по умолчанию и агент
+        # Файл известных ключей роутера; "none" отключает проверку
+        known_hosts = os.getenv('ROUTER_KNOWN_HOSTS', '~/.ssh/known_hosts')
+        self.ROUTER_KNOWN_HOSTS = '' if known_hosts.lower() == 'none' else known_hosts
+        self.SSH_POOL_SIZE = self._get_env_int('SSH_POOL_SIZE', 2)  # Постоянных соединений
+        self.SSH_MAX_SESSIONS = self._get_env_int('SSH_MAX_SESSIONS', 4)  # Команд на соединение одновременно
+        self.SSH_KEEPALIVE = self._get_env_float('SSH_KEEPALIVE', 30)  # Секунды
+        self.SSH_CONNECT_TIMEOUT = self._get_env_float('SSH_CONNECT_TIMEOUT', 10)  # Секунды
 
         # Конфигурация безопасности и повторных попыток
-        self.MAX_RETRIES = 3
-        self.RETRY_DELAY = 2  # Базовая задержка в секундах
+        self.MAX_RETRIES = self._get_env_int('MAX_RETRIES', 3)
+        self.RETRY_DELAY = self._get_env_float('RETRY_DELAY', 2)  # Базовая задержка в секундах
+        self.RETRY_MAX_DELAY = self._get_env_float('RETRY_MAX_DELAY', 30)  # Секунды
+        self.BREAKER_THRESHOLD = self._get_env_int('BREAKER_THRESHOLD', 3)  # Таймаутов подряд
+        self.BREAKER_RESET_TIMEOUT = self._get_env_float('BREAKER_RESET_TIMEOUT', 60)  # Секунды
         self.COMMAND_TIMEOUT = 120  # Секунды 
+        self.PROGRESS_EDIT_INTERVAL = self._get_env_int('PROGRESS_EDIT_INTERVAL', 3)  # Секунды между правками статуса
+        self.COMMAND_EXECUTOR = self._get_env_choice('COMMAND_EXECUTOR', ('oneshot', 'session'))
+        self.COMMAND_QUEUE_SIZE = self._get_env_int('COMMAND_QUEUE_SIZE', 20)  # Изменяющих команд в очереди
+        self.UPDATE_CONCURRENCY = max(1, self._get_env_int('UPDATE_CONCURRENCY', 8))  # Чатов обрабатывается одновременно
+
+        # Ограничение частоты запросов пользователя
+        self.RATE_LIMIT_COSTLY_PER_MINUTE = self._get_env_int('RATE_LIMIT_COSTLY_PER_MINUTE', 10)
+        self.RATE_LIMIT_COSTLY_BURST = self._get_env_int('RATE_LIMIT_COSTLY_BURST', 5)
+        self.RATE_LIMIT_CHEAP_PER_MINUTE = self._get_env_int('RATE_LIMIT_CHEAP_PER_MINUTE', 60)
+        self.RATE_LIMIT_CHEAP_BURST = self._get_env_int('RATE_LIMIT_CHEAP_BURST', 20)
+
+        # Кэш списка разблокировки
+        self.LIST_CACHE_TTL = self._get_env_int('LIST_CACHE_TTL', 300)  # Секунды
+        self.LIST_PAGE_SIZE = self._get_env_int('LIST_PAGE_SIZE', 50)  # Записей на странице
+        self.FIND_MAX_RESULTS = self._get_env_int('FIND_MAX_RESULTS', 200)  # Результатов поиска
+        # Список длиннее этого отправляется файлом, а не страницами; 0 - всегда страницами
+        self.LIST_DOCUMENT_THRESHOLD = self._get_env_int('LIST_DOCUMENT_THRESHOLD', 2000)  # Записей
+        # Файл списка КВАС; если его нет (или значение пустое) - используется `kvas list`
+        self.KVAS_LIST_FILE = os.getenv('KVAS_LIST_FILE', '/opt/etc/hosts.list')
+
+        # Фоновый сбор состояния роутера для /status (0 - отключен)
+        self.HEALTH_INTERVAL = self._get_env_int('HEALTH_INTERVAL', 60)  # Секунды
+        self.HEALTH_MAX_INTERVAL = self._get_env_int('HEALTH_MAX_INTERVAL', 600)  # Секунды
+        self.HEALTH_HISTORY = self._get_env_int('HEALTH_HISTORY', 60)  # Замеров в истории
+        self.HEALTH_BUSY_LOAD = self._get_env_float('HEALTH_BUSY_LOAD', 1.0)  # Нагрузка на ядро
+        self.VPN_CHECK_COMMAND = os.getenv('VPN_CHECK_COMMAND', 'pidof ss-redir')
+
+        # Контроль памяти
+        self.MEMORY_CHECK_INTERVAL = self._get_env_int('MEMORY_CHECK_INTERVAL', 300)  # Секунды; 0 - отключен
+        self.MEMORY_BUDGET_MB = self._get_env_int('MEMORY_BUDGET_MB', 0)  # 0 - без бюджета
+        self.MEMORY_TRACE = self._get_env_int('MEMORY_TRACE', 0)  # Глубина трассировки выделений; 0 - выключена
+
+        # Пакетное добавление и удаление
+        self.BULK_CHUNK_SIZE = self._get_env_int('BULK_CHUNK_SIZE', 20)  # Доменов на вызов роутера
+        # Окно сбора изменений от всех пользователей в один пакет; 0 - каждое отдельно
+        self.MUTATION_WINDOW = self._get_env_float('MUTATION_WINDOW', 1.0)  # Секунды
+        # Команда КВАС, применяющая файл списка после пакета изменений; пустая - `kvas add/del` на домен
+        self.KVAS_APPLY_COMMAND = os.getenv('KVAS_APPLY_COMMAND', 'kvas ipset refill')
 
     def _get_env(self, key: str) -> str:
         """Безопасное получение переменных окружения с проверкой."""
@@ -35,6 +121,33 @@ class Config:
             raise ConfigError(f"Missing critical ENV configuration: {key}")
         return value
 
+    def _get_env_int(self, key: str, default: int) -> int:
+        """Получение необязательной целочисленной переменной окружения."""
+        value = os.getenv(key)
+        if not value:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ConfigError(f"Invalid integer ENV configuration: {key}={value}")
+
+    def _get_env_float(self, key: str, default: float) -> float:
+        """Получение необязательной дробной переменной окружения."""
+        value = os.getenv(key)
+        if not value:
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            raise ConfigError(f"Invalid number ENV configuration: {key}={value}")
+
+    def _get_env_choice(self, key: str, choices: tuple) -> str:
+        """Получение необязательной переменной окружения из набора значений (первое - по умолчанию)."""
+        value = (os.getenv(key) or choices[0]).lower()
+        if value not in choices:
+            raise ConfigError(f"Invalid ENV configuration: {key}={value}, expected one of {choices}")
+        return value
+
     def validate_config(self):
         """Всесторонняя проверка конфигурации."""
         required_vars = ['BOT_TOKEN', 'ALLOWED_USERS']
@@ -45,4 +158,17 @@ class Config:
 
         # Проверка токена
         if not re.match(r'^\d{10,12}:[A-Za-z0-9_-]{34,36}$', os.getenv('BOT_TOKEN', '')):
-            raise ConfigError("Invalid Telegram bot token")
\ No newline at end of file
+            raise ConfigError("Invalid Telegram bot token")
+
+        # Проверка настроек подключения к удаленному роутеру
+        if os.getenv('ROUTER_HOST') and (os.getenv('ROUTER_AUTH') or '').lower() == 'password':
+            if not os.getenv('ROUTER_PASSWORD'):
+                raise ConfigError("ROUTER_PASSWORD is required when ROUTER_AUTH=password")
+
+        # Проверка настроек вебхука
+        if (os.getenv('UPDATE_MODE') or '').lower() == 'webhook':
+            if not os.getenv('WEBHOOK_URL', '').startswith('https://'):
+                raise ConfigError("WEBHOOK_URL must be an https:// URL in webhook mode")
+            secret = os.getenv('WEBHOOK_SECRET')
+            if secret and not re.match(r'^[A-Za-z0-9_-]{1,256}$', secret):
+                raise ConfigError("Invalid WEBHOOK_SECRET: allowed characters are A-Z, a-z, 0-9, _ and -")
\ No newline at end of file
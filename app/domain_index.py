@@ -0,0 +1,172 @@
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Длина n-грамм для поиска по подстроке
+NGRAM = 3
+
+# Верхняя граница для поиска по префиксу в отсортированном массиве
+HIGHEST = '\U0010ffff'
+
+
+class DomainIndex:
+    """
+    Индекс списка разблокировки для поиска.
+
+    Домены (без префикса "*.") хранятся в двух отсортированных массивах:
+    прямом - для поиска по началу, и из перевернутых строк - для поиска
+    по окончанию; оба запроса - два деления пополам. Для поиска по подстроке
+    ведется индекс триграмм: для каждой триграммы - массив номеров доменов
+    (4 байта на вхождение); кандидаты - пересечение массивов триграмм
+    запроса, начиная с самого короткого, с последующей проверкой.
+
+    Добавление и удаление записи обновляют индекс без перестроения: новый
+    домен получает следующий номер (массивы остаются упорядоченными),
+    удаленный помечается пустым местом и пропускается при поиске; когда
+    пустых мест становится больше половины, индекс триграмм пересобирается.
+    """
+
+    def __init__(self, entries: Iterable[str] = ()):
+        # Домен -> запись ("*.домен" и/или "домен"); кортеж, только если записей несколько
+        self._forms: Dict[str, Union[str, Tuple[str, ...]]] = {}
+        for entry in entries:
+            self._add_form(entry)
+        self._forward: List[str] = sorted(self._forms)
+        self._backward: List[str] = sorted(domain[::-1] for domain in self._forward)
+        self._rebuild_grams()
+
+    def __len__(self) -> int:
+        return len(self._forward)
+
+    def add(self, entry: str):
+        domain = self._add_form(entry)
+        if domain is None:
+            return
+        insort(self._forward, domain)
+        insort(self._backward, domain[::-1])
+        self._add_grams(domain)
+
+    def remove(self, entry: str):
+        domain = self._bare(entry)
+        forms = self._forms.get(domain)
+        if forms is None:
+            return
+        if isinstance(forms, tuple):
+            if entry in forms:
+                rest = tuple(form for form in forms if form != entry)
+                self._forms[domain] = rest[0] if len(rest) == 1 else rest
+            return
+        if forms != entry:
+            return
+
+        del self._forms[domain]
+        self._forward.pop(bisect_left(self._forward, domain))
+        self._backward.pop(bisect_left(self._backward, domain[::-1]))
+        self._domains[self._ids.pop(domain)] = None
+        self._dead += 1
+        if self._dead > len(self._forward):
+            self._rebuild_grams()
+
+    def search(self, query: str, limit: int) -> Tuple[List[str], int]:
+        """
+        Поиск записей.
+
+        "goo*" - домены, начинающиеся с "goo"; "*.ru" или "*ru" - оканчивающиеся
+        на ".ru" ("ru"); любой другой запрос - поиск по подстроке.
+
+        Returns:
+            Tuple[List[str], int]: Не более limit записей и общее число найденных
+        """
+        query = query.strip().lower()
+        if query.startswith('*'):
+            domains = self._by_suffix(query[1:])
+        elif query.endswith('*'):
+            domains = self._by_prefix(query[:-1])
+        else:
+            domains = self._by_substring(query)
+
+        found = []
+        for domain in domains:
+            forms = self._forms[domain]
+            if isinstance(forms, tuple):
+                found.extend(forms)
+            else:
+                found.append(forms)
+        return found[:limit], len(found)
+
+    def _by_prefix(self, prefix: str) -> List[str]:
+        start = bisect_left(self._forward, prefix)
+        end = bisect_left(self._forward, prefix + HIGHEST, start)
+        return self._forward[start:end]
+
+    def _by_suffix(self, suffix: str) -> List[str]:
+        reversed_suffix = suffix[::-1]
+        start = bisect_left(self._backward, reversed_suffix)
+        end = bisect_left(self._backward, reversed_suffix + HIGHEST, start)
+        return sorted(domain[::-1] for domain in self._backward[start:end])
+
+    def _by_substring(self, needle: str) -> List[str]:
+        if not needle:
+            return []
+        if len(needle) < NGRAM:
+            return [domain for domain in self._forward if needle in domain]
+
+        postings = []
+        for gram in self._ngrams(needle):
+            ids = self._grams.get(gram)
+            if ids is None:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                return []
+        domains = self._domains
+        return sorted(
+            domain for domain in map(domains.__getitem__, candidates)
+            if domain is not None and needle in domain
+        )
+
+    def _add_form(self, entry: str) -> Optional[str]:
+        """Запоминание записи; возвращает домен, если он новый для индекса."""
+        domain = self._bare(entry)
+        forms = self._forms.get(domain)
+        if forms is None:
+            self._forms[domain] = entry
+            return domain
+        if isinstance(forms, tuple):
+            if entry not in forms:
+                self._forms[domain] = forms + (entry,)
+        elif forms != entry:
+            self._forms[domain] = (forms, entry)
+        return None
+
+    def _rebuild_grams(self):
+        self._domains: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._grams: Dict[str, array] = {}
+        self._dead = 0
+        for domain in self._forward:
+            self._add_grams(domain)
+
+    def _add_grams(self, domain: str):
+        domain_id = len(self._domains)
+        self._domains.append(domain)
+        self._ids[domain] = domain_id
+        grams = self._grams
+        for gram in self._ngrams(domain):
+            ids = grams.get(gram)
+            if ids is None:
+                ids = grams[gram] = array('I')
+            ids.append(domain_id)
+
+    @staticmethod
+    def _ngrams(text: str) -> set:
+        return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+    @staticmethod
+    def _bare(entry: str) -> str:
+        return (entry[2:] if entry.startswith('*.') else entry).lower()
@@ -0,0 +1,135 @@
+from typing import Iterable, Optional, Tuple
+
+# Флаги узла: запись "*.домен" (домен и все поддомены) и запись без префикса
+WILDCARD = 1
+EXACT = 2
+
+# Ключ флагов в словаре узла (пустых меток в доменах не бывает)
+FLAGS = ''
+
+
+class DomainTrie:
+    """
+    Суффиксное дерево доменов по меткам в обратном порядке.
+
+    "img.youtube.com" хранится по пути com -> youtube -> img. Поиск проходит
+    по меткам проверяемого домена от зоны верхнего уровня и за время,
+    пропорциональное числу меток, находит точное совпадение или запись
+    "*.родитель", уже покрывающую домен.
+
+    Для экономии памяти лист хранится просто числом-флагами; словарь
+    дочерних меток заводится только у узлов с потомками (флаги такого узла
+    лежат в нем под ключом FLAGS).
+    """
+
+    def __init__(self, entries: Iterable[str] = ()):
+        self._root: dict = {}
+        self._size = 0
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, entry: str):
+        """Добавление записи ("*.youtube.com" или "youtube.com")."""
+        flag, labels = self._split(entry)
+        node = self._root
+        for label in labels[:-1]:
+            child = node.get(label)
+            if child is None:
+                child = node[label] = {}
+            elif type(child) is int:
+                child = node[label] = {FLAGS: child}
+            node = child
+
+        last = labels[-1]
+        child = node.get(last, 0)
+        flags = child if type(child) is int else child.get(FLAGS, 0)
+        if flags & flag:
+            return
+        if type(child) is int:
+            node[last] = flags | flag
+        else:
+            child[FLAGS] = flags | flag
+        self._size += 1
+
+    def remove(self, entry: str):
+        """Удаление записи с очисткой опустевших узлов."""
+        flag, labels = self._split(entry)
+        path = [self._root]
+        for label in labels[:-1]:
+            child = path[-1].get(label)
+            if type(child) is not dict:
+                return
+            path.append(child)
+
+        node, last = path[-1], labels[-1]
+        child = node.get(last, 0)
+        flags = child if type(child) is int else child.get(FLAGS, 0)
+        if not flags & flag:
+            return
+        self._size -= 1
+        flags &= ~flag
+
+        if type(child) is int:
+            if flags:
+                node[last] = flags
+            else:
+                del node[last]
+        elif flags:
+            child[FLAGS] = flags
+        else:
+            del child[FLAGS]
+            if len(child) == 0:
+                del node[last]
+
+        # Снизу вверх: опустевшие узлы удаляются, узлы без потомков снова хранятся числом
+        for label, parent, child in zip(reversed(labels[:-1]), reversed(path[:-1]), reversed(path[1:])):
+            if not child:
+                del parent[label]
+            elif len(child) == 1 and FLAGS in child:
+                parent[label] = child[FLAGS]
+            else:
+                break
+
+    def lookup(self, domain: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Проверка домена по списку.
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: ('exact', запись), если домен уже
+                есть в списке; ('covered', "*.родитель"), если его покрывает запись
+                родительского домена; (None, None), если домена в списке нет
+        """
+        _, labels = self._split(domain)
+        last_depth = len(labels) - 1
+        node = self._root
+        covered_by = None
+        for depth, label in enumerate(labels):
+            child = node.get(label)
+            if child is None:
+                break
+            flags = child if type(child) is int else child.get(FLAGS, 0)
+            if depth == last_depth and flags:
+                bare = '.'.join(reversed(labels))
+                return 'exact', f"*.{bare}" if flags & WILDCARD else bare
+            if flags & WILDCARD and covered_by is None:
+                covered_by = '*.' + '.'.join(reversed(labels[:depth + 1]))
+            if type(child) is int:
+                break
+            node = child
+
+        if covered_by:
+            return 'covered', covered_by
+        return None, None
+
+    @staticmethod
+    def _split(entry: str) -> Tuple[int, list]:
+        if entry.startswith('*.'):
+            flag, entry = WILDCARD, entry[2:]
+        else:
+            flag = EXACT
+        labels = entry.lower().split('.')
+        labels.reverse()
+        return flag, labels
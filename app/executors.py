@@ -0,0 +1,282 @@
+import asyncio
+import os
+import signal
+import uuid
+from typing import AsyncIterator, Optional, Tuple
+
+from app.logger import get_logger
+
+# Размер блока чтения из канала командной оболочки
+READ_CHUNK_SIZE = 64 * 1024
+
+# Максимальная длина строки при потоковом чтении
+STREAM_LINE_LIMIT = 1024 * 1024
+
+
+class StderrOutput(Exception):
+    """Команда, выполненная в потоковом режиме, вывела данные в stderr."""
+
+    def __init__(self, stderr: str):
+        super().__init__(stderr)
+        self.stderr = stderr
+
+
+class OneShotExecutor:
+    """Запуск каждой команды в отдельном процессе `/bin/sh`."""
+
+    async def run(self, command: str, timeout: float) -> Tuple[str, str]:
+        """
+        Выполнение команды.
+
+        Returns:
+            Tuple[str, str]: stdout и stderr команды
+
+        Raises:
+            asyncio.TimeoutError: Команда не завершилась за timeout секунд
+        """
+        proc = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.communicate()
+            raise
+
+        return stdout.decode(), stderr.decode()
+
+    async def stream(self, command: str, timeout: float) -> AsyncIterator[str]:
+        """
+        Потоковое выполнение команды: строки stdout отдаются по мере поступления.
+
+        Raises:
+            asyncio.TimeoutError: Команда не завершилась за timeout секунд
+            StderrOutput: Команда вывела данные в stderr
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        proc = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LINE_LIMIT
+        )
+        stderr_task = asyncio.ensure_future(proc.stderr.read())
+        finished = False
+        try:
+            while True:
+                line = await asyncio.wait_for(proc.stdout.readline(), deadline - loop.time())
+                if not line:
+                    break
+                yield line.decode().rstrip('\n')
+            stderr = await asyncio.wait_for(stderr_task, deadline - loop.time())
+            await proc.wait()
+            finished = True
+        finally:
+            if not finished:
+                stderr_task.cancel()
+                if proc.returncode is None:
+                    proc.kill()
+                await proc.wait()
+
+        if stderr:
+            raise StderrOutput(stderr.decode())
+
+    async def close(self):
+        pass
+
+
+class ShellSessionExecutor:
+    """
+    Выполнение команд в одной долгоживущей командной оболочке.
+
+    Команды передаются оболочке через stdin по одной. Конец stdout и stderr
+    каждой команды отмечается уникальным маркером, после маркера stdout
+    оболочка печатает код возврата. Если оболочка завершилась, при следующей
+    команде она запускается заново; при превышении таймаута или отмене
+    команды оболочка уничтожается вместе с дочерними процессами, чтобы
+    недочитанный вывод не достался следующей команде.
+    """
+
+    def __init__(self, shell: str = '/bin/sh'):
+        self.shell = shell
+        self.logger = get_logger(__name__)
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._lock = asyncio.Lock()
+        self._started = False
+        self.restarts = 0
+
+    async def run(self, command: str, timeout: float) -> Tuple[str, str]:
+        """
+        Выполнение команды в постоянной оболочке.
+
+        Returns:
+            Tuple[str, str]: stdout и stderr команды
+
+        Raises:
+            asyncio.TimeoutError: Команда не завершилась за timeout секунд
+        """
+        async with self._lock:
+            marker = f"__kvasbot_{uuid.uuid4().hex}__".encode()
+            frames = None
+            finished = False
+            try:
+                proc = await self._send(self._frame(command, marker))
+                frames = asyncio.gather(
+                    self._read_frame(proc.stdout, marker),
+                    self._read_frame(proc.stderr, marker),
+                )
+                (stdout, exit_code), (stderr, _) = await asyncio.wait_for(frames, timeout=timeout)
+                finished = True
+            except ConnectionResetError as e:
+                raise RuntimeError(f"Командная оболочка завершилась во время выполнения: {e}")
+            finally:
+                if not finished:
+                    if frames is not None:
+                        # Ошибка чтения прерванной команды уже не нужна
+                        frames.add_done_callback(lambda future: future.cancelled() or future.exception())
+                    # Таймаут или отмена: остаток вывода команды попал бы
+                    # в вывод следующей, оболочка перезапускается
+                    self._kill()
+
+        self.logger.debug(f"Команда {command} завершилась с кодом {exit_code.decode().strip()}")
+        return stdout.decode(), stderr.decode()
+
+    async def stream(self, command: str, timeout: float) -> AsyncIterator[str]:
+        """
+        Потоковое выполнение команды в постоянной оболочке.
+
+        Raises:
+            asyncio.TimeoutError: Команда не завершилась за timeout секунд
+            StderrOutput: Команда вывела данные в stderr
+        """
+        async with self._lock:
+            marker = f"__kvasbot_{uuid.uuid4().hex}__".encode()
+            proc = await self._send(self._frame(command, marker))
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            stderr_task = asyncio.ensure_future(self._read_frame(proc.stderr, marker))
+            finished = False
+            try:
+                # Строка перед маркером придерживается: перевод строки перед
+                # маркером добавлен оболочкой и в вывод команды не входит
+                held = None
+                while True:
+                    line = await asyncio.wait_for(proc.stdout.readline(), deadline - loop.time())
+                    if not line:
+                        raise ConnectionResetError("канал командной оболочки закрыт")
+                    if line.startswith(marker):
+                        if held is not None and held != b'\n':
+                            yield held.decode().rstrip('\n')
+                        break
+                    if held is not None:
+                        yield held.decode().rstrip('\n')
+                    held = line
+                stderr, _ = await asyncio.wait_for(stderr_task, deadline - loop.time())
+                finished = True
+            except ConnectionResetError as e:
+                raise RuntimeError(f"Командная оболочка завершилась во время выполнения: {e}")
+            finally:
+                if not finished:
+                    # Вывод прерванной команды не дочитан, оболочку придется перезапустить
+                    stderr_task.cancel()
+                    self._kill()
+
+        if stderr:
+            raise StderrOutput(stderr.decode())
+
+    async def close(self):
+        """Завершение оболочки."""
+        async with self._lock:
+            if self._proc is not None and self._proc.returncode is None:
+                self._proc.stdin.close()
+                try:
+                    await asyncio.wait_for(self._proc.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    self._kill()
+            self._proc = None
+
+    @staticmethod
+    def _frame(command: str, marker: bytes) -> bytes:
+        """Скрипт для оболочки: команда в подоболочке и маркеры конца вывода."""
+        return (
+            f"( {command}\n) </dev/null\n"
+            f"printf '\\n%s %d\\n' {marker.decode()} $?\n"
+            f"printf '\\n%s\\n' {marker.decode()} >&2\n"
+        ).encode()
+
+    async def _send(self, script: bytes) -> asyncio.subprocess.Process:
+        """Передача команды оболочке; если оболочка мертва, она перезапускается."""
+        proc = await self._ensure_shell()
+        try:
+            proc.stdin.write(script)
+            await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # Команда еще не начала выполняться, повтор безопасен
+            self._kill()
+            proc = await self._ensure_shell()
+            proc.stdin.write(script)
+            await proc.stdin.drain()
+        return proc
+
+    async def _ensure_shell(self) -> asyncio.subprocess.Process:
+        if self._proc is not None and self._proc.returncode is None:
+            return self._proc
+
+        if self._proc is not None:
+            self.logger.warning(
+                f"Командная оболочка завершилась (код {self._proc.returncode}), перезапуск"
+            )
+            self._proc = None
+        if self._started:
+            self.restarts += 1
+        self._started = True
+        self._proc = await asyncio.create_subprocess_exec(
+            self.shell,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+            limit=STREAM_LINE_LIMIT,
+        )
+        return self._proc
+
+    def _kill(self):
+        """Уничтожение оболочки и всех запущенных ею процессов."""
+        proc, self._proc = self._proc, None
+        if proc is None or proc.returncode is not None:
+            return
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    async def _read_frame(reader: asyncio.StreamReader, marker: bytes) -> Tuple[bytes, bytes]:
+        """
+        Чтение вывода команды до строки с маркером.
+
+        Returns:
+            Tuple[bytes, bytes]: Вывод команды и остаток строки маркера
+        """
+        needle = b'\n' + marker
+        buffer = bytearray()
+        search_from = 0
+        while True:
+            index = buffer.find(needle, search_from)
+            if index != -1:
+                end = buffer.find(b'\n', index + len(needle))
+                if end != -1:
+                    return bytes(buffer[:index]), bytes(buffer[index + len(needle):end])
+            else:
+                search_from = max(0, len(buffer) - len(needle))
+
+            chunk = await reader.read(READ_CHUNK_SIZE)
+            if not chunk:
+                raise ConnectionResetError("канал командной оболочки закрыт")
+            buffer += chunk
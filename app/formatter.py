@@ -1,40 +1,76 @@
 import html
 import re
+from typing import Iterable, Union
+
+# Терминальные escape-последовательности и разделители вывода КВАС
+ANSI_ESCAPE = re.compile(r'\x1B[@-_][0-?]*[ -/]*[@-~]')
+COLOR_ESCAPE = re.compile(r'\x1b\[[0-9;]*[mz]')
+COUNT_REGEX = re.compile(r'содержит\s+(\d+)\s+записей')
+
+# Строка списка: необязательный порядковый номер и домен (возможно, с префиксом "*.")
+ENTRY_REGEX = re.compile(
+    r'^(?:\d+[.)]?\s+)?((?:\*\.)?(?:[A-Za-z0-9-]+\.)+[A-Za-z]{2,})(?:\s|$)'
+)
 
 
 class OutputFormatter:
     """Форматирование вывода команды в читабельный вид."""
     @staticmethod
-    def clean_terminal_output(output: str) -> str:
+    def clean_terminal_output(output: Union[str, Iterable[str]]) -> str:
         """
         Очистка вывода от терминальных escape-последовательностей 
         с сохранением важной информации
+
+        Args:
+            output: Весь вывод команды или итерируемый набор его строк
+                (например, при потоковом чтении)
+        """
+        lines = output.split('\n') if isinstance(output, str) else output
+        return '\n'.join(filter(None, map(OutputFormatter.clean_line, lines)))
+
+    @staticmethod
+    def clean_line(line: str) -> str:
+        """
+        Очистка одной строки вывода за один проход.
+
+        Escape-последовательности не пересекают границы строк, поэтому
+        построчная очистка дает тот же результат, что и очистка всего вывода.
+
+        Returns:
+            str: Очищенная и HTML-экранированная строка или пустая строка,
+                если строку нужно пропустить
+        """
+        # Регулярные выражения применяются, только если в строке есть что удалять
+        if '\x1b' in line:
+            line = ANSI_ESCAPE.sub('', line)
+            line = line.replace('[K', '')
+            if '\x1b' in line:
+                line = COLOR_ESCAPE.sub('', line)
+        elif '[K' in line:
+            line = line.replace('[K', '')
+        line = line.strip()
+
+        # Пропускаем пустые строки и разделители
+        if not line or not line.strip('-'):
+            return ''
+
+        # Строка с количеством записей (только в строках с кириллицей)
+        if not line.isascii() and 'список разблокировки' in line.lower():
+            count_match = COUNT_REGEX.search(line)
+            if count_match:
+                line = f"Список разблокировки содержит {count_match.group(1)} записей:"
+
+        # HTML-экранирование для безопасности
+        return html.escape(line)
+
+    @staticmethod
+    def extract_entry(line: str):
+        """
+        Извлечение записи списка разблокировки из строки вывода `kvas list`.
+
+        Returns:
+            Optional[str]: Домен в том виде, в котором его хранит КВАС
+                (например, "*.youtube.com"), или None
         """
-        # Удаление ANSI escape-последовательностей
-        ansi_escape = re.compile(r'\x1B[@-_][0-?]*[ -/]*[@-~]')
-        output = ansi_escape.sub('', output)
-
-        # Удаление специальных управляющих символов
-        output = re.sub(r'\[K', '', output)
-        output = re.sub(r'\x1b\[[0-9;]*[mz]', '', output)
-
-        # Разбить на строки и очистить каждую
-        cleaned_lines = []
-        for line in output.split('\n'):
-            # Убрать лишние пробелы в начале и конце
-            line = line.strip()
-            
-            # Пропускаем пустые строки и разделители
-            if line and not re.match(r'^-+$', line):
-                # Специальная обработка строк с количеством
-                if 'список разблокировки' in line.lower():
-                    # Сохраняем строку с количеством, но очищаем от лишних символов
-                    count_match = re.search(r'содержит\s+(\d+)\s+записей', line)
-                    if count_match:
-                        line = f"Список разблокировки содержит {count_match.group(1)} записей:"
-                
-                # HTML-экранирование для безопасности
-                line = html.escape(line)
-                cleaned_lines.append(line)
-
-        return '\n'.join(cleaned_lines)
\ No newline at end of file
+        match = ENTRY_REGEX.match(OutputFormatter.clean_line(line))
+        return match.group(1).lower() if match else None
@@ -0,0 +1,211 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Iterable, Optional
+
+from app.logger import get_logger
+
+# Все данные одной командой: один процесс на замер
+HEALTH_COMMAND = "cat /proc/uptime /proc/loadavg /proc/meminfo"
+
+# Число ядер роутера: запрашивается один раз
+CPU_COUNT_COMMAND = "grep -c ^processor /proc/cpuinfo"
+
+# Маркер результата проверки VPN в выводе команды замера
+VPN_MARKER = 'vpn='
+
+# Замер дольше этого (секунды) означает, что роутер занят
+BUSY_SAMPLE_DURATION = 5.0
+
+SPARK_CHARS = '▁▂▃▄▅▆▇█'
+
+
+class HealthSample:
+    """Один замер состояния роутера."""
+
+    __slots__ = ('taken_at', 'uptime', 'load', 'mem_total', 'mem_available', 'vpn_up', 'duration')
+
+    def __init__(self, taken_at: float, uptime: float, load: tuple, mem_total: int,
+                 mem_available: int, vpn_up: Optional[bool], duration: float):
+        self.taken_at = taken_at
+        self.uptime = uptime  # Секунды
+        self.load = load  # Средняя нагрузка за 1, 5 и 15 минут
+        self.mem_total = mem_total  # КБ
+        self.mem_available = mem_available  # КБ
+        self.vpn_up = vpn_up
+        self.duration = duration  # Время выполнения команды замера, секунды
+
+
+def parse_health_output(output: str, taken_at: float, duration: float) -> HealthSample:
+    """
+    Разбор вывода HEALTH_COMMAND.
+
+    Первая строка - /proc/uptime, вторая - /proc/loadavg, далее /proc/meminfo
+    и строка "vpn=up|down".
+
+    Raises:
+        ValueError: Вывод не похож на ожидаемый
+    """
+    lines = output.splitlines()
+    if len(lines) < 3:
+        raise ValueError(f"Unexpected health output: {output[:200]!r}")
+    uptime = float(lines[0].split()[0])
+    load = tuple(float(value) for value in lines[1].split()[:3])
+
+    meminfo = {}
+    vpn_up = None
+    for line in lines[2:]:
+        if line.startswith(VPN_MARKER):
+            vpn_up = line[len(VPN_MARKER):].strip() == 'up'
+            continue
+        name, _, value = line.partition(':')
+        fields = value.split()
+        if fields and fields[0].isdigit():
+            meminfo[name] = int(fields[0])
+
+    mem_total = meminfo.get('MemTotal', 0)
+    # MemAvailable нет в старых ядрах
+    mem_available = meminfo.get(
+        'MemAvailable',
+        meminfo.get('MemFree', 0) + meminfo.get('Buffers', 0) + meminfo.get('Cached', 0),
+    )
+    return HealthSample(taken_at, uptime, load, mem_total, mem_available, vpn_up, duration)
+
+
+def sparkline(values: Iterable[float]) -> str:
+    """Мини-график значений символами разной высоты."""
+    values = list(values)
+    if not values:
+        return ''
+    low, high = min(values), max(values)
+    span = high - low
+    if span <= 0:
+        return SPARK_CHARS[0] * len(values)
+    top = len(SPARK_CHARS) - 1
+    return ''.join(SPARK_CHARS[round((value - low) / span * top)] for value in values)
+
+
+class HealthSampler:
+    """
+    Фоновый сбор состояния роутера в кольцевой буфер.
+
+    Замер выполняется через клиент роутера одной читающей командой. Если
+    роутер занят (высокая нагрузка, очередь изменяющих команд, медленный или
+    неудачный замер), интервал удваивается до max_interval; в спокойном
+    состоянии возвращается к базовому. /status отвечает по последнему замеру,
+    не запуская команд.
+
+    Порог нагрузки busy_load задан на ядро. Число ядер (cpu_count) по
+    умолчанию запрашивается у самого роутера перед первым замером и
+    запоминается: бот может работать на другой машине (ROUTER_HOST).
+    """
+
+    def __init__(
+        self,
+        client,
+        interval: float,
+        max_interval: float,
+        history: int,
+        vpn_command: str = '',
+        busy_load: float = 1.0,
+        is_busy: Callable[[], bool] = lambda: False,
+        cpu_count: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.client = client
+        self.base_interval = interval
+        self.max_interval = max(interval, max_interval)
+        self.interval = interval
+        self.samples: Deque[HealthSample] = deque(maxlen=history)
+        self.busy_load_per_cpu = busy_load
+        self.cpu_count = cpu_count
+        self._is_busy = is_busy
+        self._clock = clock
+        self._sleep = sleep
+        self.logger = get_logger(__name__)
+
+        self.command = HEALTH_COMMAND
+        if vpn_command:
+            self.command += (
+                f"; if {vpn_command} >/dev/null 2>&1; "
+                f"then echo {VPN_MARKER}up; else echo {VPN_MARKER}down; fi"
+            )
+
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def busy_load(self) -> float:
+        """Порог средней нагрузки для всего роутера."""
+        return self.busy_load_per_cpu * (self.cpu_count or 1)
+
+    @property
+    def last(self) -> Optional[HealthSample]:
+        return self.samples[-1] if self.samples else None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def sample(self) -> Optional[HealthSample]:
+        """Один замер; при ошибке возвращает None, предыдущие замеры сохраняются."""
+        if self.cpu_count is None:
+            await self._load_cpu_count()
+        started = self._clock()
+        try:
+            output = await self.client.execute_command(self.command)
+            sample = parse_health_output(output, started, self._clock() - started)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            self.logger.warning(f"Health sample failed: {e}")
+            return None
+
+        self.last_error = None
+        self.samples.append(sample)
+        return sample
+
+    async def _load_cpu_count(self):
+        """Число ядер роутера; при ошибке запрос повторится перед следующим замером."""
+        try:
+            output = await self.client.execute_command(CPU_COUNT_COMMAND)
+            count = int(output.strip())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.warning(f"Router CPU count unavailable: {e}")
+            return
+        if count > 0:
+            self.cpu_count = count
+
+    def next_interval(self, sample: Optional[HealthSample]) -> float:
+        """Интервал до следующего замера с учетом загруженности роутера."""
+        busy = (
+            sample is None
+            or self._is_busy()
+            or sample.load[0] >= self.busy_load
+            or sample.duration >= BUSY_SAMPLE_DURATION
+        )
+        if busy:
+            self.interval = min(self.max_interval, self.interval * 2)
+        else:
+            self.interval = self.base_interval
+        return self.interval
+
+    async def _run(self):
+        while True:
+            sample = await self.sample()
+            await self._sleep(self.next_interval(sample))
@@ -0,0 +1,133 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.logger import get_logger
+
+# Ограничения входящих запросов
+MAX_HEADER_LINES = 100
+MAX_BODY_SIZE = 1024 * 1024
+IDLE_TIMEOUT = 75  # Секунды ожидания следующего запроса в keep-alive соединении
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class HTTPRequest:
+    """Разобранный HTTP-запрос."""
+
+    def __init__(self, method: str, path: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.headers = headers  # Имена заголовков в нижнем регистре
+        self.body = body
+
+
+# Ответ обработчика: код, Content-Type, тело
+HTTPResponse = Tuple[int, str, bytes]
+RequestHandler = Callable[[HTTPRequest], Awaitable[HTTPResponse]]
+
+
+class LocalHTTPServer:
+    """
+    Минимальный HTTP/1.1 сервер на asyncio для локальных служебных точек
+    (прием вебхуков, метрики) без сторонних зависимостей.
+
+    Поддерживаются только запросы с Content-Length и keep-alive соединения;
+    TLS ожидается на стороне обратного прокси.
+    """
+
+    def __init__(self, host: str, port: int, routes: Dict[str, RequestHandler]):
+        self.host = host
+        self.port = port
+        self.routes = routes
+        self.logger = get_logger(__name__)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.logger.info(f"HTTP server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except ValueError as e:
+                    self._write_response(writer, (400, 'text/plain', str(e).encode()), keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                status, content_type, body = await self._dispatch(request)
+                keep_alive = request.headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, (status, content_type, body), keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: HTTPRequest) -> HTTPResponse:
+        handler = self.routes.get(request.path)
+        if handler is None:
+            return 404, 'text/plain', b'Not Found'
+        try:
+            return await handler(request)
+        except Exception as e:
+            self.logger.error(f"HTTP handler error for {request.path}: {e}", exc_info=True)
+            return 500, 'text/plain', b'Internal Server Error'
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[HTTPRequest]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode('latin-1').split()
+        if len(parts) != 3:
+            raise ValueError('Malformed request line')
+        method, target, _ = parts
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise ValueError('Too many headers')
+
+        length = int(headers.get('content-length') or 0)
+        if length < 0 or length > MAX_BODY_SIZE:
+            raise ValueError('Invalid Content-Length')
+        body = await reader.readexactly(length) if length else b''
+        return HTTPRequest(method.upper(), target.split('?', 1)[0], headers, body)
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, response: HTTPResponse, keep_alive: bool):
+        status, content_type, body = response
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
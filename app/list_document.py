@@ -0,0 +1,83 @@
+import gzip
+import tempfile
+from typing import BinaryIO, Optional, Sequence
+
+# Объем содержимого в памяти, сверх которого файл переносится на диск
+SPOOL_MAX_SIZE = 256 * 1024
+
+# Порция строк, передаваемая в файл (и компрессору) за один вызов
+WRITE_CHUNK_SIZE = 64 * 1024
+
+
+class ListDocument:
+    """
+    Список разблокировки в виде файла для отправки документом.
+
+    Файл пишется построчно через буфер ограниченного размера
+    (SpooledTemporaryFile): ни весь текст списка одной строкой, ни его
+    сжатая копия целиком в памяти не собираются. Сначала строится .gz;
+    если сжатие не дало выигрыша, файл пересобирается без сжатия.
+    """
+
+    def __init__(self, entries: Sequence[str], filename: str, compress: bool = True,
+                 spool_size: int = SPOOL_MAX_SIZE):
+        """
+        Args:
+            entries: Записи списка (перебираются до двух раз)
+            filename: Имя файла без сжатия, например "kvas-list.txt"
+            compress: Сжимать ли файл, если это уменьшает его размер
+            spool_size: Объем содержимого в памяти до переноса на диск, байт
+        """
+        self.entries = len(entries)
+        self.raw_size = 0
+        self.compressed = False
+        self.filename = filename
+        self._spool_size = spool_size
+        self.file: Optional[BinaryIO] = None
+
+        if compress:
+            self.file = self._spooled()
+            with gzip.GzipFile(filename=filename, mode='wb', fileobj=self.file, mtime=0) as archive:
+                self.raw_size = self._write(archive, entries)
+            if self.file.tell() < self.raw_size:
+                self.compressed = True
+                self.filename = filename + '.gz'
+            else:
+                self.file.close()
+                self.file = None
+
+        if self.file is None:
+            self.file = self._spooled()
+            self.raw_size = self._write(self.file, entries)
+        self.size = self.file.tell()
+        self.file.seek(0)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self) -> 'ListDocument':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _spooled(self) -> BinaryIO:
+        return tempfile.SpooledTemporaryFile(max_size=self._spool_size, prefix='kvasbot-list-')
+
+    @staticmethod
+    def _write(target: BinaryIO, entries: Sequence[str]) -> int:
+        """Запись строк порциями по WRITE_CHUNK_SIZE; возвращает объем без сжатия."""
+        written = 0
+        chunk = []
+        length = 0
+        for entry in entries:
+            chunk.append(entry)
+            length += len(entry) + 1
+            if length >= WRITE_CHUNK_SIZE:
+                written += target.write(('\n'.join(chunk) + '\n').encode())
+                chunk, length = [], 0
+        if chunk:
+            written += target.write(('\n'.join(chunk) + '\n').encode())
+        return written
@@ -0,0 +1,161 @@
+import asyncio
+import os
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from app.formatter import ENTRY_REGEX
+
+
+class KvasListFile:
+    """
+    Чтение списка разблокировки напрямую из файла КВАС.
+
+    `kvas list` тратит большую часть времени на оформление вывода, которое
+    затем вырезает OutputFormatter; сам список - обычный текстовый файл
+    по одной записи в строке. Файл перечитывается, только если изменились
+    его время модификации, размер или inode (КВАС перезаписывает файл
+    целиком); иначе возвращается ранее разобранный результат.
+
+    Через apply в файл можно записать изменения сразу нескольких доменов,
+    чтобы затем применить список одной командой КВАС.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._entries: Optional[FrozenSet[str]] = None
+
+        # Статистика
+        self.reads = 0
+        self.unchanged = 0
+        self.missing = 0
+
+    async def read(self) -> Optional[FrozenSet[str]]:
+        """
+        Записи списка разблокировки.
+
+        Returns:
+            Optional[FrozenSet[str]]: Записи или None, если файла нет
+                (тогда список нужно получать через `kvas list`)
+        """
+        # Чтение с флеш-памяти роутера - в отдельном потоке
+        return await asyncio.to_thread(self._read)
+
+    def _read(self) -> Optional[FrozenSet[str]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self.missing += 1
+            return None
+
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if signature == self._signature:
+            self.unchanged += 1
+            return self._entries
+
+        try:
+            with open(self.path, encoding='utf-8', errors='replace') as list_file:
+                entries = frozenset(self.parse(list_file))
+        except OSError:
+            self.missing += 1
+            return None
+
+        self._signature = signature
+        self._entries = entries
+        self.reads += 1
+        return entries
+
+    async def apply(self, changes: Dict[str, str]) -> Tuple[Dict[str, bool], Optional[bytes]]:
+        """
+        Запись изменений в файл списка (без применения их КВАС).
+
+        Добавляемый домен записывается так же, как его записывает `kvas add`
+        (с префиксом "*."), удаляемый убирается в обоих видах. Остальные
+        строки файла сохраняются без изменений, файл заменяется целиком.
+
+        Args:
+            changes: Домен -> 'add' или 'del'
+
+        Returns:
+            Tuple[Dict[str, bool], Optional[bytes]]: Изменился ли список для
+                каждого домена и прежнее содержимое файла для отката
+                (None - файл не менялся)
+
+        Raises:
+            OSError: Файл недоступен
+        """
+        return await asyncio.to_thread(self._apply, changes)
+
+    async def restore(self, content: bytes):
+        """Откат файла к содержимому, возвращенному apply."""
+        await asyncio.to_thread(self._write, content)
+
+    def _apply(self, changes: Dict[str, str]) -> Tuple[Dict[str, bool], Optional[bytes]]:
+        with open(self.path, 'rb') as list_file:
+            original = list_file.read()
+        lines = original.split(b'\n')
+        if lines and not lines[-1]:
+            lines.pop()
+
+        # Домен без "*." -> номера строк с ним
+        listed: Dict[str, List[int]] = {}
+        for number, line in enumerate(lines):
+            found = ENTRY_REGEX.match(line.decode('utf-8', errors='replace').strip())
+            if found:
+                entry = found.group(1).lower()
+                listed.setdefault(entry[2:] if entry.startswith('*.') else entry, []).append(number)
+
+        changed: Dict[str, bool] = {}
+        removed = set()
+        added: List[bytes] = []
+        for domain, verb in changes.items():
+            bare = domain[2:] if domain.startswith('*.') else domain
+            if verb == 'add':
+                changed[domain] = bare not in listed
+                if changed[domain]:
+                    added.append(f"*.{bare}".encode())
+                    listed[bare] = []
+            else:
+                changed[domain] = bare in listed
+                removed.update(listed.pop(bare, ()))
+
+        if not any(changed.values()):
+            return changed, None
+        kept = [line for number, line in enumerate(lines) if number not in removed]
+        self._write(b''.join(line + b'\n' for line in kept + added))
+        return changed, original
+
+    def _write(self, content: bytes):
+        """Замена файла целиком: КВАС не должен увидеть его частично записанным."""
+        temporary = f"{self.path}.kvasbot"
+        with open(temporary, 'wb') as list_file:
+            list_file.write(content)
+            list_file.flush()
+            os.fsync(list_file.fileno())
+        try:
+            os.chmod(temporary, os.stat(self.path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(temporary, self.path)
+        self.forget()
+
+    def forget(self):
+        """Сброс запомненного списка: следующее чтение разберет файл заново."""
+        self._signature = None
+        self._entries = None
+
+    @staticmethod
+    def parse(lines) -> Iterator[str]:
+        """Записи из строк файла: без оформления, комментарии и мусор пропускаются."""
+        match = ENTRY_REGEX.match
+        for line in lines:
+            found = match(line.strip())
+            if found:
+                yield found.group(1).lower()
+
+    def stats(self) -> dict:
+        """Статистика чтения файла для диагностики."""
+        return {
+            'reads': self.reads,
+            'unchanged': self.unchanged,
+            'missing': self.missing,
+        }
@@ -0,0 +1,152 @@
+import logging
+import os
+from collections import deque
+from typing import Callable, Deque, Iterator, List, Optional, Tuple
+
+# Размер блока при чтении файла с конца
+BLOCK_SIZE = 64 * 1024
+
+# Предел длины строки: у более длинной сохраняется только конец
+MAX_LINE_SIZE = 64 * 1024
+
+# Предел строк продолжения одной записи: лишние (самые поздние) отбрасываются
+MAX_PENDING_LINES = 1000
+
+# Разделитель полей LOG_FORMAT
+FIELD_SEPARATOR = ' - '
+
+# Уровни, по которым можно отбирать записи
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+def rotated_files(path: str) -> List[str]:
+    """Текущий файл журнала и архивы ротации (path.1, path.2, ...) от новых к старым."""
+    files = []
+    index = 0
+    while True:
+        name = f"{path}.{index}" if index else path
+        if not os.path.isfile(name):
+            break
+        files.append(name)
+        index += 1
+    return files
+
+
+def iter_lines_reversed(
+    path: str,
+    block_size: int = BLOCK_SIZE,
+    max_bytes: int = 0,
+) -> Iterator[Tuple[str, int]]:
+    """
+    Строки файла от последней к первой.
+
+    Файл читается блоками с конца: объем чтения зависит от того, сколько
+    строк взято, а не от размера файла. Чтение прекращается, как только
+    прочитано max_bytes (0 - без предела), даже посреди длинной строки.
+
+    Yields:
+        Tuple[str, int]: Строка без перевода строки и байт прочитано к этому моменту
+    """
+    with open(path, 'rb') as log:
+        position = log.seek(0, os.SEEK_END)
+        read = 0
+        tail = b''
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            log.seek(position)
+            block = log.read(size) + tail
+            read += size
+            lines = block.split(b'\n')
+            # Первая строка блока может начинаться в предыдущем блоке
+            tail = lines.pop(0)[-MAX_LINE_SIZE:]
+            for line in reversed(lines):
+                if line:
+                    yield line[-MAX_LINE_SIZE:].decode('utf-8', errors='replace'), read
+            if max_bytes and read >= max_bytes:
+                break
+        # Первая строка файла или прочитанная часть строки, на которой чтение прервано
+        if tail:
+            yield tail.decode('utf-8', errors='replace'), read
+
+
+def parse_header(line: str) -> Optional[Tuple[str, str]]:
+    """
+    Логгер и уровень из первой строки записи журнала (LOG_FORMAT).
+
+    Returns:
+        Optional[Tuple[str, str]]: (логгер, уровень) или None для строк
+            продолжения (трассировки исключений, многострочные сообщения)
+    """
+    parts = line.split(FIELD_SEPARATOR, 3)
+    if len(parts) < 4 or parts[2] not in LEVELS or not parts[0][:4].isdigit():
+        return None
+    return parts[1], parts[2]
+
+
+def make_filter(spec: Optional[str]) -> Callable[[str, str], bool]:
+    """
+    Отбор записей по уровню или логгеру.
+
+    Имя уровня ("warning") оставляет записи этого уровня и выше, иначе
+    значение - имя логгера ("app.bot" - также и его дочерние логгеры).
+    """
+    if not spec:
+        return lambda name, level: True
+    if spec.upper() in LEVELS:
+        threshold = logging.getLevelName(spec.upper())
+        return lambda name, level: logging.getLevelName(level) >= threshold
+    prefix = spec + '.'
+    return lambda name, level: name == spec or name.startswith(prefix)
+
+
+def tail_records(
+    path: str,
+    limit: int,
+    spec: Optional[str] = None,
+    max_bytes: int = 0,
+    block_size: int = BLOCK_SIZE,
+) -> Tuple[List[str], int]:
+    """
+    Последние limit записей журнала с учетом архивов ротации.
+
+    Записи отбираются по мере чтения с конца; строки продолжения
+    (трассировки) остаются со своей записью, не более MAX_PENDING_LINES.
+
+    Args:
+        path: Файл журнала
+        limit: Количество записей
+        spec: Уровень или логгер для отбора (см. make_filter)
+        max_bytes: Предел прочитанного объема (0 - без предела): при редких
+            совпадениях чтение не уходит вглубь больших файлов
+        block_size: Размер блока чтения
+
+    Returns:
+        Tuple[List[str], int]: Строки записей от старых к новым и прочитано байт
+    """
+    accept = make_filter(spec)
+    records: List[List[str]] = []
+    total = 0
+    for name in rotated_files(path):
+        # Строки продолжения текущей записи, от последней
+        pending: Deque[str] = deque(maxlen=MAX_PENDING_LINES)
+        read = 0
+        for line, read in iter_lines_reversed(name, block_size, max_bytes - total if max_bytes else 0):
+            header = parse_header(line)
+            if header is None:
+                pending.append(line)
+                continue
+            if accept(*header):
+                pending.append(line)
+                records.append(list(reversed(pending)))
+                if len(records) >= limit:
+                    return _flatten(records), total + read
+            pending.clear()
+        total += read
+        if max_bytes and total >= max_bytes:
+            break
+    return _flatten(records), total
+
+
+def _flatten(records: List[List[str]]) -> List[str]:
+    return [line for record in reversed(records) for line in record]
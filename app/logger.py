@@ -1,32 +1,147 @@
+import atexit
 import logging
+import logging.handlers
 import os
-from dotenv import load_dotenv
-
-# Загрузка переменных окружения из .env файла
-load_dotenv()
-
-# Установка уровня логирования из .env (по умолчанию INFO)
-log_level = os.getenv('LOG', 'INFO').upper()
-level = getattr(logging, log_level, logging.INFO)
-
-# Базовая настройка логгера
-env = os.getenv('ENV')
-
-if env and env.upper() == 'PROD':
-    file_handler = logging.FileHandler('/opt/apps/vpnbot/logs/router_bot.log')
-elif env and env.upper() == 'DEV':
-    file_handler = logging.FileHandler('./router_bot.log')
-else:
-    file_handler = logging.StreamHandler()
-
-logging.basicConfig(
-    level=level,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        file_handler,
-        logging.StreamHandler()
-    ]
-)
+import queue
+from typing import Dict, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Журнал в PROD и DEV
+PROD_LOG_FILE = '/opt/apps/vpnbot/logs/router_bot.log'
+DEV_LOG_FILE = './router_bot.log'
+
+# Логгер проверок доступа: пишется при каждом нажатии кнопки
+ACCESS_LOGGER = 'app.access'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Постановка записей в ограниченную очередь без ожидания.
+
+    Если фоновый поток не успевает писать (медленная флеш-память), новые
+    записи отбрасываются и подсчитываются, а не блокируют цикл событий.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SampleFilter(logging.Filter):
+    """Пропуск каждой rate-й записи логгера (WARNING и выше пропускаются всегда)."""
+
+    def __init__(self, rate: int):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._seen = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        self._seen += 1
+        return (self._seen - 1) % self.rate == 0
+
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    """Разбор строки вида "httpx=WARNING,app.access=DEBUG"."""
+    pairs = {}
+    for item in value.split(','):
+        name, sep, setting = item.partition('=')
+        if sep and name.strip() and setting.strip():
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.getenv(key) or default)
+    except ValueError:
+        return default
+
+
+def log_file_path(env: Optional[str] = None) -> Optional[str]:
+    """Файл журнала для окружения (по умолчанию - из ENV); None - журнал в файл не пишется."""
+    if env is None:
+        env = (os.getenv('ENV') or '').upper()
+    return {'PROD': PROD_LOG_FILE, 'DEV': DEV_LOG_FILE}.get(env)
+
+
+def _build_handlers(env: str) -> list:
+    """Конечные обработчики, в которые пишет фоновый поток."""
+    handlers = [logging.StreamHandler()]
+    path = log_file_path(env)
+    if path:
+        # Общий объем журнала с архивами не превышает LOG_MAX_BYTES
+        backup_count = max(0, _env_int('LOG_BACKUP_COUNT', 2))
+        max_bytes = _env_int('LOG_MAX_BYTES', 5 * 1024 * 1024)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=max(1024, max_bytes // (backup_count + 1)),
+            backupCount=backup_count,
+            encoding='utf-8',
+        ))
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def setup_logging():
+    """
+    Настройка журналирования.
+
+    Вызывается один раз при запуске, после загрузки .env. Записи из цикла
+    событий только кладутся в очередь; запись в файл с ротацией по размеру
+    выполняет фоновый QueueListener.
+    Уровни отдельных логгеров задаются через LOG_LEVELS, прореживание
+    частых записей - через LOG_SAMPLE.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    # Установка уровня логирования из .env (по умолчанию INFO)
+    log_level = os.getenv('LOG', 'INFO').upper()
+    level = getattr(logging, log_level, logging.INFO)
+    env = (os.getenv('ENV') or '').upper()
+
+    queue_handler = DroppingQueueHandler(queue.Queue(_env_int('LOG_QUEUE_SIZE', 10000)))
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    # Каждый запрос к Bot API httpx пишет на уровне INFO
+    for name, setting in _parse_pairs(os.getenv('LOG_LEVELS', 'httpx=WARNING')).items():
+        logging.getLogger(name).setLevel(getattr(logging, setting.upper(), level))
+    for name, setting in _parse_pairs(os.getenv('LOG_SAMPLE', '')).items():
+        if setting.isdigit():
+            logging.getLogger(name).addFilter(SampleFilter(int(setting)))
+
+    _listener = logging.handlers.QueueListener(
+        queue_handler.queue, *_build_handlers(env), respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Запись оставшихся в очереди сообщений и остановка фонового потока."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
 # Функция для получения логгера
 def get_logger(name=__name__):
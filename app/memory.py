@@ -0,0 +1,204 @@
+import asyncio
+import gc
+import os
+import resource
+import time
+import tracemalloc
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from app.logger import get_logger
+
+# Выделения памяти самого трассировщика и загрузчика модулей в отчет не попадают
+IGNORED_TRACES = (
+    tracemalloc.__file__,
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    '<unknown>',
+)
+
+# Мест выделения памяти в периодическом отчете
+LOG_TOP_ALLOCATIONS = 5
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_malloc_trim = None
+
+
+def read_rss() -> Tuple[int, int]:
+    """
+    Текущий и пиковый RSS процесса, КБ.
+
+    Берется из /proc/self/status; без /proc оба значения - пиковый RSS
+    из getrusage.
+    """
+    current = peak = 0
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    current = int(line.split()[1])
+                elif line.startswith('VmHWM:'):
+                    peak = int(line.split()[1])
+    except OSError:
+        pass
+    if not peak:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return current or peak, peak
+
+
+def release_memory():
+    """Сборка мусора и возврат освободившейся памяти системе (malloc_trim, если есть)."""
+    global _malloc_trim
+    gc.collect()
+    if _malloc_trim is None:
+        _malloc_trim = False
+        try:
+            import ctypes
+            import ctypes.util
+            libc = ctypes.CDLL(ctypes.util.find_library('c'))
+            _malloc_trim = libc.malloc_trim
+        except (ImportError, OSError, AttributeError, TypeError):
+            pass
+    if _malloc_trim:
+        _malloc_trim(0)
+
+
+def start_tracing(frames: int):
+    """Включение трассировки выделений памяти (чем раньше, тем полнее отчет)."""
+    if frames > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def top_allocations(limit: int) -> List[Tuple[str, int, int]]:
+    """
+    Места с наибольшим объемом живых выделений памяти.
+
+    Returns:
+        List[Tuple[str, int, int]]: (файл:строка, байт, блоков); пусто, если
+            трассировка выключена
+    """
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, pattern) for pattern in IGNORED_TRACES]
+    )
+    result = []
+    for stat in snapshot.statistics('lineno')[:limit]:
+        frame = stat.traceback[0]
+        result.append((f"{_short_path(frame.filename)}:{frame.lineno}", stat.size, stat.count))
+    return result
+
+
+def _short_path(path: str) -> str:
+    """Путь без префикса site-packages, стандартной библиотеки или каталога бота."""
+    marker = 'site-packages' + os.sep
+    index = path.rfind(marker)
+    if index != -1:
+        return path[index + len(marker):]
+    import sysconfig
+
+    for prefix in (sysconfig.get_path('stdlib'), _ROOT):
+        if path.startswith(prefix + os.sep):
+            return path[len(prefix) + 1:]
+    return path
+
+
+class MemoryMonitor:
+    """
+    Контроль памяти процесса.
+
+    Раз в interval секунд замеряется RSS; при включенной трассировке
+    (MEMORY_TRACE) в журнал пишутся места с наибольшим объемом выделений.
+    Если RSS превышает бюджет, по очереди вызываются функции очистки -
+    от дешевых (данные, которые быстро строятся заново) к дорогим, - пока
+    память не вернется в бюджет.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        budget_kb: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.interval = interval
+        self.budget_kb = budget_kb
+        self._clock = clock
+        self._sleep = sleep
+        self.logger = get_logger(__name__)
+        self._trimmers: List[Tuple[str, Callable[[], None]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+        self.last_rss = 0
+        self.trims = 0
+        self.last_trim: Optional[Tuple[float, List[str]]] = None  # Время и что очищено
+
+    def add_trimmer(self, name: str, trim: Callable[[], None]):
+        """Регистрация функции очистки (в порядке возрастания стоимости)."""
+        self._trimmers.append((name, trim))
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def check(self) -> int:
+        """Замер RSS и очистка при превышении бюджета; возвращает RSS, КБ."""
+        rss, _ = read_rss()
+        self.last_rss = rss
+        if not self.budget_kb or rss <= self.budget_kb:
+            return rss
+
+        before = rss
+        trimmed = []
+        for name, trim in self._trimmers:
+            try:
+                trim()
+            except Exception as e:
+                self.logger.error(f"Memory trim '{name}' failed: {e}")
+                continue
+            trimmed.append(name)
+            release_memory()
+            rss, _ = read_rss()
+            if rss <= self.budget_kb:
+                break
+
+        self.trims += 1
+        self.last_rss = rss
+        self.last_trim = (self._clock(), trimmed)
+        self.logger.warning(
+            f"RSS {before} KB exceeds budget {self.budget_kb} KB: "
+            f"trimmed {', '.join(trimmed) or 'nothing'}, RSS now {rss} KB"
+        )
+        return rss
+
+    def stats(self) -> dict:
+        """Состояние памяти для метрик."""
+        rss, peak = read_rss()
+        return {
+            'rss_kb': rss,
+            'peak_rss_kb': peak,
+            'budget_kb': self.budget_kb,
+            'trims': self.trims,
+        }
+
+    async def _run(self):
+        while True:
+            await self._sleep(self.interval)
+            rss = self.check()
+            if tracemalloc.is_tracing():
+                top = top_allocations(LOG_TOP_ALLOCATIONS)
+                self.logger.info(
+                    f"RSS {rss} KB, top allocations: "
+                    + '; '.join(f"{place} {size // 1024} KB/{count}" for place, size, count in top)
+                )
+            else:
+                self.logger.debug(f"RSS {rss} KB")
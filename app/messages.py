@@ -7,19 +7,47 @@ MESSAGES = {
             "Этот бот поможет вам управлять списком разблокированных сайтов на роутере.\n\n"
             "Все действия, связанные с VPN, можно найти в меню. \n"
             "📜 <b>Список сайтов</b> - поможет получить текущий список разблокированных роутером сайтов. В этот список входят предустановленные сайты и все те, что ты добавишь.\n"
+            "🔍 <b>Найти</b> - поиск сайта в списке разблокировки по части названия.\n"
             "➕ <b>Добавить сайт</b> - поможет добавить новый сайт (домен) в список разблокированных сайтов. По умолчанию домены добавляются с префиксом \"*.\", что позволяет всем поддоменам, таким как, напр. \"img.youtube.com\" добавляться автоматически.\n"
             "➖ <b>Удалить сайт</b> - поможет удалить сайт из списка разблокированных сайтов.\n"
             "🆘 <b>Помощь</b> - поможет получить список доступных команд и действий (текущее сообщение).\n"
             "🔄 <b>Перезагрузить роутер</b> - поможет перезагрузить роутер.\n"
             "🔄 <b>Перезагрузить бота</b> - перезагрузка бота\n\n"
             "Доступные команды:\n"
-            "<code>/start</code> - Запустить/перезапустить бот.\n",
+            "<code>/start</code> - Запустить/перезапустить бот.\n"
+            "<code>/refresh</code> - Перечитать список сайтов с роутера.\n"
+            "<code>/find текст</code> - Найти сайт в списке разблокировки.\n"
+            "<code>/sync</code> - Синхронизировать список с файлом: будут добавлены и удалены только отличающиеся сайты.\n"
+            "<code>/export</code> - Выгрузить текущий список файлом.\n"
+            "<code>/status</code> - Состояние роутера: аптайм, нагрузка, память, VPN.\n",
     'menu': "📋 Доступные действия:",
     'access_denied': "🚫 Извините, у вас нет доступа к этому функционалу. "
                      "Обратитесь к администратору для получения прав.",
     'site_list_empty': "📭 Список разблокированных сайтов пуст.",
     'site_add_prompt': "📝 Введите название сайта для разблокировки.\n"
-                       "Например: google.com или youtube.com",
+                       "Например: google.com или youtube.com\n\n"
+                       "Можно указать несколько сайтов через пробел, запятую или с новой строки "
+                       "либо прислать .txt файл со списком.",
     'site_delete_prompt': "🗑️ Введите название сайта для удаления из списка разблокировки.\n"
-                          "Точно такое же, как при добавлении."
+                          "Точно такое же, как при добавлении.\n\n"
+                          "Можно указать несколько сайтов через пробел, запятую или с новой строки "
+                          "либо прислать .txt файл со списком.",
+    'bulk_file_too_large': "❌ Файл слишком большой.",
+    'bulk_file_invalid': "❌ Не удалось прочитать файл. Пришлите текстовый файл в кодировке UTF-8.",
+    'bulk_empty': "📭 В сообщении не найдено ни одного домена.",
+    'find_prompt': "🔍 Введите часть названия сайта.\n\n"
+                   "<code>goo*</code> - начинается с \"goo\", "
+                   "<code>*.ru</code> - оканчивается на \".ru\", "
+                   "<code>tube</code> - содержит \"tube\".",
+    'find_nothing': "📭 По запросу «{query}» ничего не найдено.",
+    'find_expired': "Результаты поиска устарели, повторите поиск.",
+    'sync_prompt': "🔄 Пришлите .txt файл с желаемым списком сайтов (по одному на строку, "
+                   "строки после <code>#</code> - комментарии).\n\n"
+                   "Бот покажет, какие сайты будут добавлены и удалены, и применит изменения "
+                   "только после подтверждения. Файл, полученный через /export, подходит.",
+    'sync_no_changes': "✅ Список на роутере уже совпадает с файлом.",
+    'sync_expired': "План синхронизации устарел, пришлите файл заново (/sync).",
+    'sync_cancelled': "❌ Синхронизация отменена.",
+    'status_unavailable': "⏳ Данные о состоянии роутера еще не собраны, попробуйте позже.",
+    'status_disabled': "ℹ️ Сбор состояния роутера отключен (HEALTH_INTERVAL=0)."
 }
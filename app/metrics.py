@@ -0,0 +1,244 @@
+import functools
+import time
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, Iterator, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Границы корзин гистограмм задержек, секунды: от обработчиков, отвечающих
+# из кэша, до команд роутера на пределе COMMAND_TIMEOUT
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (счетчик на корзину, сумма, количество)."""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Последняя корзина - +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля линейной интерполяцией внутри корзины."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.bounds, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.bounds[-1]
+
+
+class Counter:
+    """Монотонно растущий счетчик."""
+
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class MetricFamily:
+    """Метрика с набором меток: по одному экземпляру на сочетание значений меток."""
+
+    def __init__(self, name: str, help_text: str, kind: str, label_names: Tuple[str, ...], factory):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.label_names = label_names
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._factory()
+        return child
+
+    def items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        return sorted(self._children.items())
+
+    def format_labels(self, values: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class MetricsRegistry:
+    """
+    Хранилище метрик процесса в памяти.
+
+    Гистограммы и счетчики обновляются синхронно в цикле событий, без
+    блокировок; запись наблюдения - поиск корзины делением пополам и пара
+    сложений. Значения из stats() компонентов (кэш, планировщик, повторы)
+    снимаются только в момент выгрузки.
+    """
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._collectors: Dict[str, Callable[[], dict]] = {}
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> MetricFamily:
+        return self._register(name, help_text, 'histogram', label_names, lambda: Histogram(buckets))
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> MetricFamily:
+        return self._register(name, help_text, 'counter', label_names, Counter)
+
+    def collector(self, prefix: str, stats: Callable[[], dict]):
+        """
+        Регистрация источника мгновенных значений (gauge): числовые поля
+        словаря stats() выгружаются как prefix_поле, строковые - как
+        prefix_поле{value="..."} 1. Повторная регистрация заменяет источник.
+        """
+        self._collectors[prefix] = stats
+
+    def _register(self, name, help_text, kind, label_names, factory) -> MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = MetricFamily(name, help_text, kind, label_names, factory)
+        return family
+
+    def render(self) -> str:
+        """Выгрузка в текстовом формате Prometheus."""
+        lines = []
+        for family in self._families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, metric in family.items():
+                if family.kind == 'counter':
+                    lines.append(f"{family.name}{family.format_labels(values)} {metric.value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.bounds + (float('inf'),), metric.counts):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                    lines.append(f"{family.name}_bucket{family.format_labels(values, le)} {cumulative}")
+                lines.append(f"{family.name}_sum{family.format_labels(values)} {metric.sum:.6f}")
+                lines.append(f"{family.name}_count{family.format_labels(values)} {metric.count}")
+
+        for prefix, name, value in self._collect():
+            metric = f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            if isinstance(value, str):
+                lines.append(f'{metric}{{value="{_escape(value)}"}} 1')
+            else:
+                lines.append(f"{metric} {float(value):g}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> List[str]:
+        """Краткая сводка для /stats: количество, среднее и квантили в миллисекундах."""
+        lines = []
+        for family in self._families.values():
+            if family.kind != 'histogram':
+                continue
+            observed = [(values, metric) for values, metric in family.items() if metric.count]
+            if not observed:
+                continue
+            lines.append(f"{family.name}:")
+            for values, metric in observed:
+                lines.append(
+                    f"  {'/'.join(values) or '-'}: n={metric.count} "
+                    f"avg={metric.sum / metric.count * 1000:.0f} "
+                    f"p50={metric.quantile(0.5) * 1000:.0f} "
+                    f"p95={metric.quantile(0.95) * 1000:.0f} ms"
+                )
+
+        errors = [
+            f"  {family.name}{{{'/'.join(values)}}} = {metric.value}"
+            for family in self._families.values() if family.kind == 'counter'
+            for values, metric in family.items() if metric.value
+        ]
+        if errors:
+            lines.append("errors:")
+            lines.extend(errors)
+
+        collected = {}
+        for prefix, name, value in self._collect():
+            if isinstance(value, float):
+                value = f"{value:.3f}"
+            collected.setdefault(prefix, []).append(f"{name}={value}")
+        for prefix, fields in collected.items():
+            lines.append(f"{prefix}: {' '.join(fields)}")
+        return lines
+
+    def _collect(self) -> Iterator[Tuple[str, str, object]]:
+        for prefix, stats in self._collectors.items():
+            for name, value in stats().items():
+                if isinstance(value, (bool, int, float, str)):
+                    yield prefix, name, value
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def timed(
+    histogram: Histogram,
+    errors: Counter,
+    ignore: Tuple[type, ...] = (),
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Декоратор корутины: время выполнения в histogram, исключения в errors."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except ignore:
+                raise
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+METRICS = MetricsRegistry()
+
+HANDLER_SECONDS = METRICS.histogram(
+    'kvasbot_handler_seconds', 'Время работы обработчика обновления', ('handler',)
+)
+HANDLER_ERRORS = METRICS.counter(
+    'kvasbot_handler_errors_total', 'Необработанные исключения обработчиков', ('handler',)
+)
+COMMAND_SECONDS = METRICS.histogram(
+    'kvasbot_router_command_seconds', 'Время выполнения команды роутера (одна попытка)', ('verb',)
+)
+COMMAND_ERRORS = METRICS.counter(
+    'kvasbot_router_command_errors_total', 'Неудачные попытки выполнения команд роутера', ('verb',)
+)
+TELEGRAM_SECONDS = METRICS.histogram(
+    'kvasbot_telegram_request_seconds', 'Время запроса к Telegram Bot API', ('method',)
+)
+TELEGRAM_ERRORS = METRICS.counter(
+    'kvasbot_telegram_request_errors_total', 'Неудачные запросы к Telegram Bot API', ('method',)
+)
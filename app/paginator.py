@@ -0,0 +1,72 @@
+import html
+from typing import Optional, Sequence
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+# Максимальная длина текстового сообщения Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# Запас под заголовок страницы
+HEADER_RESERVE = 256
+
+
+class ListPaginator:
+    """
+    Постраничный вывод списка разблокировки.
+
+    Размер страницы вычисляется один раз по самой длинной записи так, чтобы
+    любая страница гарантированно укладывалась в лимит сообщения. Страница
+    собирается только из своего среза списка, поэтому стоимость вывода
+    не зависит от общего количества записей.
+    """
+
+    def __init__(
+        self,
+        entries: Sequence[str],
+        max_page_size: int,
+        limit: int = TELEGRAM_MESSAGE_LIMIT,
+        callback_prefix: str = 'sites',
+        title: str = "📋 Список заблокированных сайтов",
+    ):
+        self.entries = entries
+        self.callback_prefix = callback_prefix
+        self.title = title  # HTML, экранируется вызывающим
+
+        longest = max((len(html.escape(entry)) for entry in entries), default=1)
+        fits = (limit - HEADER_RESERVE) // (longest + 1)
+        self.page_size = max(1, min(max_page_size, fits))
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.entries) // self.page_size))
+
+    def clamp(self, page: int) -> int:
+        """Приведение номера страницы к допустимому диапазону."""
+        return min(max(page, 0), self.page_count - 1)
+
+    def render(self, page: int) -> str:
+        """Текст страницы (нумерация страниц с нуля)."""
+        page = self.clamp(page)
+        start = page * self.page_size
+        chunk = self.entries[start:start + self.page_size]
+        header = (
+            f"{self.title} ({len(self.entries)} записей)"
+            f", стр. {page + 1}/{self.page_count}:\n\n"
+        )
+        return header + '\n'.join(html.escape(entry) for entry in chunk)
+
+    def keyboard(self, page: int) -> Optional[InlineKeyboardMarkup]:
+        """Кнопки навигации по страницам."""
+        if self.page_count == 1:
+            return None
+        page = self.clamp(page)
+        prefix = self.callback_prefix
+        buttons = []
+        if page > 0:
+            buttons.append(InlineKeyboardButton("◀️", callback_data=f"{prefix}:{page - 1}"))
+        buttons.append(
+            InlineKeyboardButton(f"{page + 1}/{self.page_count}", callback_data=f"{prefix}:noop")
+        )
+        if page < self.page_count - 1:
+            buttons.append(InlineKeyboardButton("▶️", callback_data=f"{prefix}:{page + 1}"))
+        return InlineKeyboardMarkup([buttons])
@@ -0,0 +1,68 @@
+import time
+from typing import Callable
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+from app.logger import get_logger
+
+
+class ProgressReporter:
+    """
+    Отображение хода долгой операции редактированием статусного сообщения.
+
+    Промежуточные правки отправляются не чаще одного раза в min_interval
+    секунд, чтобы не превышать ограничения Telegram на редактирование.
+    Текст сообщений размечается HTML. Ошибки Telegram при правке только
+    записываются в журнал: неудачная правка не прерывает операцию.
+    """
+
+    def __init__(
+        self,
+        message: Message,
+        min_interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.message = message
+        self.min_interval = min_interval
+        self._clock = clock
+        self._last_edit = clock()
+        self._last_text = message.text
+        self.logger = get_logger(__name__)
+
+    async def update(self, text: str):
+        """Промежуточное обновление (пропускается, если с прошлой правки прошло мало времени)."""
+        if self._clock() - self._last_edit < self.min_interval:
+            return
+        await self._edit(text)
+
+    async def finish(self, text: str, **kwargs) -> bool:
+        """
+        Итоговое обновление, отправляется всегда.
+
+        Returns:
+            bool: Удалось ли отредактировать сообщение
+        """
+        return await self._edit(text, **kwargs)
+
+    async def _edit(self, text: str, **kwargs) -> bool:
+        if text == self._last_text and not kwargs:
+            return True
+        self._last_edit = self._clock()
+        try:
+            await self.message.edit_text(text, parse_mode="HTML", **kwargs)
+        except BadRequest as edit_error:
+            self.logger.warning(f"Failed to edit message: {edit_error}")
+            return False
+        except RetryAfter as edit_error:
+            # Следующая правка - не раньше, чем разрешит Telegram
+            self._last_edit = self._clock() + float(edit_error.retry_after)
+            self.logger.warning(f"Failed to edit message: {edit_error}")
+            return False
+        except TelegramError as edit_error:
+            # Ошибка сети или Telegram не должна прерывать саму операцию
+            # (например, команду роутера, вывод которой сейчас читается)
+            self.logger.warning(f"Failed to edit message: {edit_error}")
+            return False
+        self._last_text = text
+        return True
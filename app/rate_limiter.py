@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+
+
+class TokenBucketLimiter:
+    """
+    Ограничение частоты запросов по алгоритму "token bucket".
+
+    Для каждого ключа (пользователя) хранится только пара (токены, время
+    последнего обращения). Записи упорядочены по времени обращения: записи,
+    чье ведро за это время успело бы наполниться полностью, ничем не отличаются
+    от отсутствующих и удаляются с начала очереди. Проверка выполняется
+    за амортизированное O(1), память не растет с числом когда-либо писавших
+    пользователей.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate_per_minute / 60  # Токенов в секунду
+        self.capacity = float(burst)
+        self._clock = clock
+        self._refill_time = self.capacity / self.rate if self.rate else float('inf')
+        self._buckets: 'OrderedDict[Hashable, Tuple[float, float]]' = OrderedDict()
+
+    def allow(self, key: Hashable, cost: float = 1) -> bool:
+        """Списать cost токенов; False, если токенов недостаточно."""
+        now = self._clock()
+        self._expire(now)
+
+        tokens = self._tokens(key, now)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets.pop(key, None)
+        self._buckets[key] = (tokens, now)
+        return allowed
+
+    def retry_after(self, key: Hashable, cost: float = 1) -> float:
+        """Через сколько секунд у ключа наберется cost токенов."""
+        missing = cost - self._tokens(key, self._clock())
+        if missing <= 0:
+            return 0.0
+        return missing / self.rate if self.rate else float('inf')
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _tokens(self, key: Hashable, now: float) -> float:
+        state = self._buckets.get(key)
+        if state is None:
+            return self.capacity
+        tokens, updated_at = state
+        return min(self.capacity, tokens + (now - updated_at) * self.rate)
+
+    def _expire(self, now: float):
+        buckets = self._buckets
+        while buckets:
+            key, (_, updated_at) = next(iter(buckets.items()))
+            if now - updated_at < self._refill_time:
+                break
+            del buckets[key]
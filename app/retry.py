@@ -0,0 +1,203 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from app.logger import get_logger
+
+T = TypeVar('T')
+
+# Команды, которые нельзя повторять ни при каких ошибках
+NON_IDEMPOTENT_PREFIXES = ('reboot',)
+
+
+class CommandTimeoutError(RuntimeError):
+    """Команда роутера не завершилась за отведенное время."""
+    pass
+
+
+class CommandStderrError(RuntimeError):
+    """Команда роутера вывела данные в stderr."""
+    pass
+
+
+class CircuitOpenError(RuntimeError):
+    """Роутер признан недоступным, команды временно не выполняются."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для команд роутера.
+
+    После failure_threshold таймаутов подряд предохранитель размыкается, и все
+    команды сразу завершаются ошибкой CircuitOpenError. Через reset_timeout
+    секунд пропускается одна пробная команда: успех замыкает предохранитель,
+    новый таймаут снова размыкает. Если результат пробной команды так и не
+    получен (например, она была отменена), через reset_timeout пропускается
+    следующая.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.logger = get_logger(__name__)
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.transitions = 0
+        self._opened_at = 0.0
+
+    def before_call(self):
+        """Проверка перед выполнением команды."""
+        if self.state == self.CLOSED:
+            return
+        remaining = self.reset_timeout - (self._clock() - self._opened_at)
+        if remaining <= 0:
+            self._opened_at = self._clock()
+            if self.state != self.HALF_OPEN:
+                self._transition(self.HALF_OPEN)
+            return
+        raise CircuitOpenError(
+            f"Роутер не отвечает, повторите попытку через {max(1, int(remaining))} с."
+        )
+
+    def record_success(self):
+        """Роутер ответил (в том числе ошибкой в stderr, но не таймаутом)."""
+        self.failures = 0
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_timeout(self):
+        """Команда завершилась по таймауту."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+            if self.state != self.OPEN:
+                self._transition(self.OPEN)
+
+    def _transition(self, state: str):
+        self.logger.warning(f"Предохранитель команд роутера: {self.state} -> {state}")
+        self.state = state
+        self.transitions += 1
+
+
+class RetryPolicy:
+    """
+    Повтор команд роутера с экспоненциальной задержкой и случайным разбросом.
+
+    Повторяются только идемпотентные команды и только при временных ошибках
+    (таймаут, вывод в stderr). Перед каждой попыткой проверяется предохранитель.
+    """
+
+    def __init__(
+        self,
+        max_retries: int,
+        base_delay: float,
+        max_delay: float,
+        breaker: CircuitBreaker,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self._sleep = sleep
+        self._rng = rng
+        self.logger = get_logger(__name__)
+
+        # Статистика
+        self.retries = 0
+        self.give_ups = 0
+
+    @staticmethod
+    def is_idempotent(command: str) -> bool:
+        """Можно ли безопасно повторить команду."""
+        return not command.strip().startswith(NON_IDEMPOTENT_PREFIXES)
+
+    def is_retryable(self, command: str, error: Exception) -> bool:
+        """Классификация ошибки: стоит ли повторять команду."""
+        return (
+            self.is_idempotent(command)
+            and isinstance(error, (CommandTimeoutError, CommandStderrError))
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Задержка перед повтором номер attempt (с нуля): "full jitter"."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return ceiling * self._rng()
+
+    async def call(self, command: str, runner: Callable[[], Awaitable[T]]) -> T:
+        """Выполнение команды с повторами."""
+        attempt = 0
+        while True:
+            self.before_attempt()
+            try:
+                result = await runner()
+            except Exception as e:
+                if not await self.after_failure(command, e, attempt):
+                    raise
+                attempt += 1
+            else:
+                self.after_success()
+                return result
+
+    def before_attempt(self):
+        """Проверка предохранителя перед попыткой."""
+        self.breaker.before_call()
+
+    def after_success(self):
+        """Учет успешной попытки."""
+        self.breaker.record_success()
+
+    async def after_failure(self, command: str, error: Exception, attempt: int, can_retry: bool = True) -> bool:
+        """
+        Учет неудачной попытки.
+
+        Returns:
+            bool: Нужно ли повторить (задержка перед повтором уже выдержана)
+        """
+        # Для предохранителя важны только исходы, полученные от роутера:
+        # таймаут или ответ (ошибка в stderr). Локальные ошибки (переполнение
+        # очереди, сбой запуска процесса) о состоянии роутера ничего не говорят
+        if isinstance(error, CommandTimeoutError):
+            self.breaker.record_timeout()
+        elif isinstance(error, CommandStderrError):
+            self.breaker.record_success()
+
+        if not can_retry or attempt >= self.max_retries or not self.is_retryable(command, error):
+            if attempt > 0:
+                self.give_ups += 1
+            return False
+        if self.breaker.state == CircuitBreaker.OPEN:
+            return False
+
+        delay = self.backoff(attempt)
+        self.retries += 1
+        self.logger.warning(
+            f"Повтор команды {command} через {delay:.1f} с "
+            f"(попытка {attempt + 1}/{self.max_retries}): {error}"
+        )
+        await self._sleep(delay)
+        return True
+
+    def stats(self) -> dict:
+        """Состояние политики повторов для диагностики."""
+        return {
+            'retries': self.retries,
+            'give_ups': self.give_ups,
+            'breaker_state': self.breaker.state,
+            'breaker_transitions': self.breaker.transitions,
+            'consecutive_timeouts': self.breaker.failures,
+        }
@@ -1,6 +1,35 @@
 import asyncio
+import os
+import time
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
 from app.config import Config
+from app.executors import OneShotExecutor, ShellSessionExecutor, StderrOutput
 from app.logger import get_logger
+from app.metrics import COMMAND_ERRORS, COMMAND_SECONDS
+from app.retry import (
+    CircuitBreaker,
+    CommandStderrError,
+    CommandTimeoutError,
+    RetryPolicy,
+)
+from app.scheduler import CommandScheduler
+
+T = TypeVar('T')
+
+
+def command_verb(command: str) -> str:
+    """
+    Метка команды для метрик: "kvas add google.com -y" -> "kvas_add",
+    "reboot" -> "reboot". Аргументы (домены) в метку не попадают.
+    """
+    words = command.split(None, 2)
+    if not words:
+        return 'empty'
+    if words[0] == 'kvas' and len(words) > 1:
+        return f"kvas_{words[1]}"
+    return os.path.basename(words[0])
+
 
 class RouterResponse:
     """Класс для обработки и валидации ответов роутера"""
@@ -12,11 +41,33 @@ class RouterLocalClient:
     def __init__(self, config: Config):
         self.config = config
         self.logger = get_logger(__name__)
+        self.scheduler = CommandScheduler(max_queue=config.COMMAND_QUEUE_SIZE)
+        self.executor = self._create_executor()
+        self.retry_policy = RetryPolicy(
+            max_retries=config.MAX_RETRIES,
+            base_delay=config.RETRY_DELAY,
+            max_delay=config.RETRY_MAX_DELAY,
+            breaker=CircuitBreaker(
+                failure_threshold=config.BREAKER_THRESHOLD,
+                reset_timeout=config.BREAKER_RESET_TIMEOUT,
+            ),
+        )
+
+    def _create_executor(self):
+        if self.config.COMMAND_EXECUTOR == 'session':
+            return ShellSessionExecutor()
+        return OneShotExecutor()
 
     async def execute_command(self, command: str, timeout: int = 120) -> str:
         """
         Асинхронное выполнение команды с таймаутом
         
+        Одинаковые читающие команды, запущенные одновременно, объединяются,
+        изменяющие выполняются по очереди (см. CommandScheduler). Временные
+        ошибки повторяются согласно RetryPolicy внутри общего выполнения:
+        таймаут объединенной команды учитывается предохранителем один раз,
+        сколько бы обработчиков ее ни ждали.
+
         Args:
             command (str): Команда для выполнения
             timeout (int): Максимальное время выполнения команды в секундах
@@ -24,31 +75,160 @@ class RouterLocalClient:
         Returns:
             str: Вывод команды
         """
-        try:
-            # Создаем команду с корректным путем или полным путем к исполняемому файлу
-            proc = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+        return await self.scheduler.run(
+            command,
+            lambda: self.retry_policy.call(command, lambda: self._run_command(command, timeout))
+        )
+
+    async def execute_locked(
+        self,
+        command: str,
+        action: Callable[[Callable[[], Awaitable[str]]], Awaitable[T]],
+        timeout: int = 120,
+    ) -> T:
+        """
+        Изменяющая команда вместе с сопутствующими действиями в одном месте
+        очереди изменений.
+
+        action получает функцию запуска команды (с повторами) и сам решает,
+        запускать ли ее: например, правка файла списка, применение списка
+        и откат правки при ошибке не пересекаются с другими изменениями.
 
+        Args:
+            command (str): Команда (ключ планировщика)
+            action: Действия, выполняемые вместо команды
+            timeout (int): Максимальное время выполнения команды в секундах
+
+        Returns:
+            Результат action
+        """
+        def run() -> Awaitable[str]:
+            return self.retry_policy.call(command, lambda: self._run_command(command, timeout))
+
+        return await self.scheduler.run(command, lambda: action(run))
+
+    async def _run_command(self, command: str, timeout: int) -> str:
+        """Запуск команды через выбранный исполнитель."""
+        verb = command_verb(command)
+        started = time.perf_counter()
+        try:
             try:
-                stdout, stderr = await asyncio.wait_for(
-                    proc.communicate(), 
-                    timeout=timeout
-                )
+                stdout, stderr = await self.executor.run(command, timeout)
             except asyncio.TimeoutError:
-                proc.kill()
-                stdout, stderr = await proc.communicate()
-                raise RuntimeError(f"Время выполнения команды превышено: {command}")
+                raise CommandTimeoutError(f"Время выполнения команды превышено: {command}")
 
             if stderr:
-                error_msg = stderr.decode().strip()
+                error_msg = stderr.strip()
                 self.logger.error(f"Ошибка выполнения команды {command}: {error_msg}")
-                raise RuntimeError(error_msg)
+                raise CommandStderrError(error_msg)
+
+            return stdout.strip()
+
+        except Exception as e:
+            COMMAND_ERRORS.labels(verb).inc()
+            self.logger.error(f"Ошибка при выполнении команды {command}: {e}")
+            raise
+        finally:
+            COMMAND_SECONDS.labels(verb).observe(time.perf_counter() - started)
+
+    async def stream_command(self, command: str, timeout: int = 120) -> AsyncIterator[str]:
+        """
+        Потоковое выполнение команды: строки вывода отдаются по мере поступления,
+        весь вывод в памяти не накапливается. Одинаковые читающие команды
+        разделяют один поток вывода (см. CommandScheduler.stream). Повтор при
+        временной ошибке возможен, только пока не получено ни одной строки,
+        и выполняется внутри общего потока.
 
-            return stdout.decode().strip()
+        Args:
+            command (str): Команда для выполнения
+            timeout (int): Максимальное время выполнения команды в секундах
+
+        Yields:
+            str: Очередная строка stdout без перевода строки
+        """
+        lines = self.scheduler.stream(command, lambda: self._stream_with_retry(command, timeout))
+        try:
+            async for line in lines:
+                yield line
+        finally:
+            await lines.aclose()
+
+    async def _stream_with_retry(self, command: str, timeout: int) -> AsyncIterator[str]:
+        """Потоковое выполнение с повторами (одно на всех читателей общего потока)."""
+        attempt = 0
+        while True:
+            self.retry_policy.before_attempt()
+            started = False
+            try:
+                async for line in self._stream_once(command, timeout):
+                    started = True
+                    yield line
+            except GeneratorExit:
+                # Потребитель прекратил чтение досрочно: роутер при этом отвечал
+                self.retry_policy.after_success()
+                raise
+            except Exception as e:
+                if not await self.retry_policy.after_failure(command, e, attempt, can_retry=not started):
+                    raise
+                attempt += 1
+            else:
+                self.retry_policy.after_success()
+                return
 
+    async def _stream_once(self, command: str, timeout: int) -> AsyncIterator[str]:
+        """Одна попытка потокового выполнения команды."""
+        verb = command_verb(command)
+        try:
+            started = time.perf_counter()
+            try:
+                async for line in self.executor.stream(command, timeout):
+                    yield line
+            except asyncio.TimeoutError:
+                raise CommandTimeoutError(f"Время выполнения команды превышено: {command}")
+            except StderrOutput as e:
+                error_msg = e.stderr.strip()
+                self.logger.error(f"Ошибка выполнения команды {command}: {error_msg}")
+                raise CommandStderrError(error_msg)
+            finally:
+                COMMAND_SECONDS.labels(verb).observe(time.perf_counter() - started)
         except Exception as e:
+            COMMAND_ERRORS.labels(verb).inc()
             self.logger.error(f"Ошибка при выполнении команды {command}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def close(self):
+        """Освобождение ресурсов исполнителя команд."""
+        await self.executor.close()
+
+
+class RouterSSHClient(RouterLocalClient):
+    """
+    Клиент удаленного роутера: те же команды, очередь и повторы, что и у
+    RouterLocalClient, но команды выполняются по SSH через пул постоянных
+    соединений (см. SSHExecutor).
+    """
+
+    def _create_executor(self):
+        from app.ssh_executor import SSHExecutor
+
+        config = self.config
+        return SSHExecutor(
+            host=config.ROUTER_HOST,
+            port=config.ROUTER_PORT,
+            username=config.ROUTER_USER,
+            mode=config.ROUTER_CONNECTION_MODE,
+            password=config.ROUTER_PASSWORD,
+            key_file=config.ROUTER_KEY_FILE,
+            known_hosts=config.ROUTER_KNOWN_HOSTS,
+            pool_size=config.SSH_POOL_SIZE,
+            max_sessions=config.SSH_MAX_SESSIONS,
+            keepalive_interval=config.SSH_KEEPALIVE,
+            connect_timeout=config.SSH_CONNECT_TIMEOUT,
+        )
+
+
+def create_router_client(config: Config) -> RouterLocalClient:
+    """Клиент роутера: удаленный по SSH, если задан ROUTER_HOST, иначе локальный."""
+    if config.ROUTER_HOST:
+        return RouterSSHClient(config)
+    return RouterLocalClient(config)
@@ -0,0 +1,278 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.logger import get_logger
+
+# Команды, которые не изменяют состояние роутера и могут выполняться совместно
+READ_ONLY_PREFIXES = ('kvas list', 'cat /proc/')
+
+# Ожидание в очереди дольше этого порога попадает в журнал
+SLOW_WAIT_THRESHOLD = 1.0  # Секунды
+
+# Строк общего потокового вывода, хранимых для подключающихся позже читателей.
+# После переполнения к выполняющейся команде новые читатели не подключаются,
+# а буфер ограничивает опережение самого медленного читателя
+SHARED_STREAM_BUFFER = 10000
+
+
+class SchedulerQueueFull(RuntimeError):
+    """Очередь изменяющих команд переполнена."""
+    pass
+
+
+class _SharedStream:
+    """
+    Потоковый вывод одной читающей команды для нескольких читателей.
+
+    Строки читаются из источника фоновой задачей и хранятся, пока их не
+    прочитают все читатели; подключившийся позже получает вывод с начала,
+    пока буфер не переполнен. Когда уходит последний читатель, чтение
+    источника прерывается (вместе с командой).
+    """
+
+    def __init__(self, source: AsyncIterator[str], max_buffer: int, on_close: Callable[[], None]):
+        self._source = source
+        self._max_buffer = max(1, max_buffer)
+        self._on_close = on_close
+        self._lines: List[str] = []
+        self._offset = 0  # Номер строки self._lines[0] в общем выводе
+        self._cursors: Dict[int, int] = {}  # Читатель -> номер следующей строки
+        self._readers = 0
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._changed = asyncio.Condition()
+        self.joinable = True
+        self._task = asyncio.ensure_future(self._produce())
+
+    async def read(self) -> AsyncIterator[str]:
+        reader = self._readers
+        self._readers += 1
+        self._cursors[reader] = self._offset
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(
+                        lambda: self._cursors[reader] < self._end or self._done
+                    )
+                    position = self._cursors[reader]
+                    batch = self._lines[position - self._offset:]
+                    self._cursors[reader] = position + len(batch)
+                    # Производитель мог ждать, пока освободится место в буфере
+                    self._changed.notify_all()
+                if not batch:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                for line in batch:
+                    yield line
+        finally:
+            del self._cursors[reader]
+            if not self._cursors and not self._done:
+                self._stop_joining()
+                self._task.cancel()
+            elif self._cursors:
+                # Самый медленный читатель мог уйти: место в буфере освободилось
+                async with self._changed:
+                    self._changed.notify_all()
+
+    @property
+    def _end(self) -> int:
+        return self._offset + len(self._lines)
+
+    def _stop_joining(self):
+        if self.joinable:
+            self.joinable = False
+            self._on_close()
+
+    def _trim(self) -> int:
+        """Удаление строк, прочитанных всеми; возвращает число оставшихся."""
+        if not self.joinable and self._cursors:
+            low = min(self._cursors.values())
+            if low > self._offset:
+                del self._lines[:low - self._offset]
+                self._offset = low
+        return len(self._lines)
+
+    async def _produce(self):
+        try:
+            async for line in self._source:
+                async with self._changed:
+                    if len(self._lines) >= self._max_buffer:
+                        self._stop_joining()
+                        await self._changed.wait_for(lambda: self._trim() < self._max_buffer)
+                    self._lines.append(line)
+                    self._changed.notify_all()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._stop_joining()
+            await self._source.aclose()
+        async with self._changed:
+            self._done = True
+            self._changed.notify_all()
+
+
+class CommandScheduler:
+    """
+    Планировщик команд роутера.
+
+    Одинаковые читающие команды, выполняющиеся одновременно, разделяют один
+    подпроцесс: результат (или потоковый вывод) раздается всем ожидающим. Изменяющие команды
+    (`kvas add/del`, `reboot`) выполняются строго по одной в порядке
+    поступления, длина очереди ограничена.
+    """
+
+    def __init__(self, max_queue: int, clock: Callable[[], float] = time.monotonic):
+        self.max_queue = max_queue
+        self._clock = clock
+        self.logger = get_logger(__name__)
+
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _SharedStream] = {}
+        self._mutex = asyncio.Lock()
+        self._waiting = 0
+
+        # Статистика
+        self.executed = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_count = 0
+        self.max_wait = 0.0
+
+    @staticmethod
+    def is_read_only(command: str) -> bool:
+        """Является ли команда читающей."""
+        return command.strip().startswith(READ_ONLY_PREFIXES)
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество изменяющих команд в очереди, включая выполняющуюся."""
+        return self._waiting + (1 if self._mutex.locked() else 0)
+
+    async def run(self, command: str, runner: Callable[[], Awaitable[str]]) -> str:
+        """
+        Выполнение команды через планировщик.
+
+        Args:
+            command (str): Команда (ключ для объединения одинаковых запросов)
+            runner: Фабрика корутины, которая фактически выполняет команду
+
+        Returns:
+            str: Вывод команды
+        """
+        if self.is_read_only(command):
+            return await self._run_shared(command, runner)
+        return await self._run_exclusive(command, runner)
+
+    async def _run_shared(self, command: str, runner: Callable[[], Awaitable[str]]) -> str:
+        future = self._in_flight.get(command)
+        if future is not None:
+            self.coalesced += 1
+            self.logger.debug(f"Команда {command} уже выполняется, ожидаем общий результат")
+            return await asyncio.shield(future)
+
+        self.executed += 1
+        future = asyncio.ensure_future(runner())
+        self._in_flight[command] = future
+        future.add_done_callback(lambda done: self._forget(command, done))
+        # shield: отмена одного ожидающего не должна прерывать команду для остальных
+        return await asyncio.shield(future)
+
+    async def stream(self, command: str, source: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Потоковое выполнение команды через планировщик.
+
+        Одинаковые читающие команды разделяют один поток вывода (см.
+        _SharedStream), изменяющие занимают место в общей очереди.
+
+        Args:
+            command (str): Команда (ключ для объединения одинаковых запросов)
+            source: Фабрика асинхронного итератора строк вывода команды
+        """
+        if not self.is_read_only(command):
+            async with self._exclusive(command):
+                lines = source()
+                try:
+                    async for line in lines:
+                        yield line
+                finally:
+                    await lines.aclose()
+            return
+
+        shared = self._streams.get(command)
+        if shared is not None and shared.joinable:
+            self.coalesced += 1
+            self.logger.debug(f"Команда {command} уже выполняется, подключаемся к ее выводу")
+        else:
+            self.executed += 1
+            shared = _SharedStream(
+                source(), SHARED_STREAM_BUFFER, lambda: self._forget_stream(command, shared)
+            )
+            self._streams[command] = shared
+
+        lines = shared.read()
+        try:
+            async for line in lines:
+                yield line
+        finally:
+            await lines.aclose()
+
+    async def _run_exclusive(self, command: str, runner: Callable[[], Awaitable[str]]) -> str:
+        async with self._exclusive(command):
+            return await runner()
+
+    @asynccontextmanager
+    async def _exclusive(self, command: str) -> AsyncIterator[None]:
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerQueueFull(f"Очередь команд роутера переполнена ({self._waiting})")
+
+        self._waiting += 1
+        enqueued_at = self._clock()
+        try:
+            await self._mutex.acquire()
+        finally:
+            self._waiting -= 1
+
+        try:
+            self._record_wait(command, self._clock() - enqueued_at)
+            self.executed += 1
+            yield
+        finally:
+            self._mutex.release()
+
+    def _forget(self, command: str, future: asyncio.Future):
+        if self._in_flight.get(command) is future:
+            del self._in_flight[command]
+        # Забираем исключение, если все ожидающие были отменены
+        if not future.cancelled():
+            future.exception()
+
+    def _forget_stream(self, command: str, shared: _SharedStream):
+        if self._streams.get(command) is shared:
+            del self._streams[command]
+
+    def _record_wait(self, command: str, wait: float):
+        self._wait_total += wait
+        self._wait_count += 1
+        self.max_wait = max(self.max_wait, wait)
+        if wait >= SLOW_WAIT_THRESHOLD:
+            self.logger.info(
+                f"Команда {command} ожидала в очереди {wait:.2f} с "
+                f"(в очереди: {self.queue_depth})"
+            )
+
+    def stats(self) -> dict:
+        """Состояние планировщика для диагностики."""
+        return {
+            'queue_depth': self.queue_depth,
+            'in_flight_reads': len(self._in_flight) + len(self._streams),
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'rejected': self.rejected,
+            'avg_wait': self._wait_total / self._wait_count if self._wait_count else 0.0,
+            'max_wait': self.max_wait,
+        }
@@ -0,0 +1,179 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable, List, Optional, Set, Tuple
+
+from app.domain_index import DomainIndex
+from app.domain_trie import DomainTrie
+from app.logger import get_logger
+
+# Обратный вызов с количеством уже прочитанных записей
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+
+class SiteListCache:
+    """
+    Кэш разобранного списка разблокировки.
+
+    Список хранится как множество записей и перечитывается с роутера только
+    по истечении TTL или по явному запросу. Успешные `kvas add`/`kvas del`
+    обновляют кэш напрямую (сквозная запись), не вызывая повторного чтения.
+    Параллельно ведется суффиксное дерево для мгновенной проверки дубликатов
+    и, после первого поиска, индекс для /find.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[Optional[ProgressCallback]], Awaitable[Iterable[str]]],
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._loader = loader
+        self.ttl = ttl
+        self._clock = clock
+        self.logger = get_logger(__name__)
+
+        self._entries: Optional[Set[str]] = None
+        self._sorted: Optional[Tuple[str, ...]] = None
+        self._trie: Optional[DomainTrie] = None
+        self._index: Optional[DomainIndex] = None  # Строится при первом поиске
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+        # Счетчики обращений
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def is_fresh(self) -> bool:
+        """Загружен ли список и не истек ли его TTL."""
+        return (
+            self._entries is not None
+            and self._clock() - self._loaded_at < self.ttl
+        )
+
+    async def get(self, progress: Optional[ProgressCallback] = None) -> Tuple[str, ...]:
+        """
+        Получение отсортированного списка записей.
+
+        Args:
+            progress: Вызывается по ходу чтения, если список загружается с роутера
+
+        Returns:
+            Tuple[str, ...]: Записи списка разблокировки
+        """
+        if self.is_fresh:
+            self.hits += 1
+            return self._snapshot()
+
+        async with self._lock:
+            # Пока ждали блокировку, список мог загрузить другой обработчик
+            if self.is_fresh:
+                self.hits += 1
+                return self._snapshot()
+            self.misses += 1
+            await self._load(progress)
+        return self._snapshot()
+
+    async def refresh(self, progress: Optional[ProgressCallback] = None) -> Tuple[str, ...]:
+        """Принудительное перечитывание списка с роутера."""
+        async with self._lock:
+            self.misses += 1
+            await self._load(progress)
+        return self._snapshot()
+
+    def add(self, domain: str):
+        """Сквозная запись после успешного `kvas add`."""
+        if self._entries is None:
+            return
+        entry = self.wildcard(domain)
+        self._entries.add(entry)
+        self._trie.add(entry)
+        if self._index is not None:
+            self._index.add(entry)
+        self._sorted = None
+
+    def discard(self, domain: str):
+        """Сквозная запись после успешного `kvas del`."""
+        if self._entries is None:
+            return
+        bare = self.bare(domain)
+        for entry in (bare, f"*.{bare}"):
+            self._entries.discard(entry)
+            self._trie.remove(entry)
+            if self._index is not None:
+                self._index.remove(entry)
+        self._sorted = None
+
+    def lookup(self, domain: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """
+        Проверка домена по кэшу без обращения к роутеру.
+
+        Returns:
+            Результат DomainTrie.lookup или None, если кэш не загружен или устарел
+        """
+        if not self.is_fresh:
+            return None
+        return self._trie.lookup(self.bare(domain))
+
+    def find(self, query: str, limit: int) -> Tuple[List[str], int]:
+        """
+        Поиск по загруженному списку (см. DomainIndex.search).
+
+        Returns:
+            Tuple[List[str], int]: Не более limit записей и общее число найденных
+        """
+        if self._entries is None:
+            return [], 0
+        if self._index is None:
+            self._index = DomainIndex(self._entries)
+        return self._index.search(query, limit)
+
+    def trim(self):
+        """Освобождение производных структур (индекс поиска, отсортированная копия)."""
+        self._index = None
+        self._sorted = None
+
+    def invalidate(self):
+        """Сброс кэша: следующее обращение перечитает список."""
+        self._entries = None
+        self._sorted = None
+        self._trie = None
+        self._index = None
+
+    def stats(self) -> dict:
+        """Состояние кэша для диагностики."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries) if self._entries is not None else 0,
+            'fresh': self.is_fresh,
+        }
+
+    @staticmethod
+    def bare(domain: str) -> str:
+        """Домен без префикса "*."."""
+        return domain[2:] if domain.startswith('*.') else domain
+
+    @staticmethod
+    def wildcard(domain: str) -> str:
+        """Домен в виде, в котором его добавляет КВАС: с префиксом "*."."""
+        return domain if domain.startswith('*.') else f"*.{domain}"
+
+    async def _load(self, progress: Optional[ProgressCallback]):
+        entries = set(await self._loader(progress))
+        if self._index is not None:
+            # Индекс поиска обновляется по разнице со старым списком
+            for entry in self._entries - entries:
+                self._index.remove(entry)
+            for entry in entries - self._entries:
+                self._index.add(entry)
+        self._entries = entries
+        self._trie = DomainTrie(self._entries)
+        self._sorted = None
+        self._loaded_at = self._clock()
+        self.logger.debug(f"Список разблокировки загружен: {len(self._entries)} записей")
+
+    def _snapshot(self) -> Tuple[str, ...]:
+        if self._sorted is None:
+            self._sorted = tuple(sorted(self._entries, key=self.bare))
+        return self._sorted
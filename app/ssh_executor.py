@@ -0,0 +1,229 @@
+import asyncio
+import os
+from typing import AsyncIterator, List, Optional, Tuple
+
+from app.config import ConfigError, ConnectionMode
+from app.executors import StderrOutput
+from app.logger import get_logger
+
+# Пропущенных ответов на keepalive, после которых соединение считается разорванным
+KEEPALIVE_COUNT_MAX = 3
+
+
+class SSHExecutor:
+    """
+    Выполнение команд на удаленном роутере по SSH.
+
+    Исполнитель держит пул из pool_size постоянных соединений. Каждая команда
+    выполняется в отдельном канале внутри соединения, поэтому рукопожатие и
+    аутентификация проходят один раз на соединение, а не на каждую команду.
+    Одно соединение обслуживает до max_sessions команд одновременно. Команда
+    занимает свободное соединение; если свободных нет, открывается новое, а
+    когда пул заполнен - команда идет в наименее загруженное. Соединения
+    проверяются keepalive-запросами. Разорванное соединение открывается заново
+    при следующей команде.
+
+    Нужен необязательный пакет asyncssh.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 22,
+        username: str = 'root',
+        mode: ConnectionMode = ConnectionMode.KEY,
+        password: Optional[str] = None,
+        key_file: Optional[str] = None,
+        known_hosts: Optional[str] = None,
+        pool_size: int = 2,
+        max_sessions: int = 4,
+        keepalive_interval: float = 30,
+        connect_timeout: float = 10,
+    ):
+        try:
+            import asyncssh
+        except ImportError:
+            raise ConfigError("Для подключения к роутеру по SSH нужен пакет asyncssh: pip install asyncssh")
+        self._asyncssh = asyncssh
+        self.logger = get_logger(__name__)
+
+        self.host = host
+        self.max_sessions = max(1, max_sessions)
+        self._options = dict(
+            port=port,
+            username=username,
+            # None отключает проверку ключа сервера
+            known_hosts=os.path.expanduser(known_hosts) if known_hosts else None,
+            keepalive_interval=keepalive_interval,
+            keepalive_count_max=KEEPALIVE_COUNT_MAX,
+            connect_timeout=connect_timeout,
+        )
+        if mode == ConnectionMode.PASSWORD:
+            self._options.update(password=password, client_keys=None, agent_path=None)
+        else:
+            # Без явного ключа используются ключи по умолчанию (~/.ssh/id_*) и агент
+            if key_file:
+                self._options['client_keys'] = [os.path.expanduser(key_file)]
+            self._options['preferred_auth'] = 'publickey'
+
+        pool_size = max(1, pool_size)
+        self._connections: List[Optional[object]] = [None] * pool_size
+        self._connecting: List[Optional[asyncio.Future]] = [None] * pool_size
+        self._active = [0] * pool_size
+        self._slots = asyncio.Semaphore(pool_size * self.max_sessions)
+
+        # Статистика
+        self.connects = 0
+        self.commands = 0
+
+    async def run(self, command: str, timeout: float) -> Tuple[str, str]:
+        """
+        Выполнение команды в отдельном канале SSH.
+
+        Returns:
+            Tuple[str, str]: stdout и stderr команды
+
+        Raises:
+            asyncio.TimeoutError: Команда (вместе с подключением) не завершилась за timeout секунд
+        """
+        index = await self._acquire()
+        try:
+            return await asyncio.wait_for(self._run(index, command), timeout)
+        finally:
+            self._release(index)
+
+    async def stream(self, command: str, timeout: float) -> AsyncIterator[str]:
+        """
+        Потоковое выполнение команды в отдельном канале SSH.
+
+        Raises:
+            asyncio.TimeoutError: Команда не завершилась за timeout секунд
+            StderrOutput: Команда вывела данные в stderr
+        """
+        index = await self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            process = await asyncio.wait_for(self._open(index, command), timeout)
+            stderr_task = asyncio.ensure_future(process.stderr.read())
+            finished = False
+            try:
+                while True:
+                    line = await asyncio.wait_for(process.stdout.readline(), deadline - loop.time())
+                    if not line:
+                        break
+                    yield line.rstrip('\n')
+                stderr = await asyncio.wait_for(stderr_task, deadline - loop.time())
+                finished = True
+            except self._asyncssh.Error as e:
+                raise RuntimeError(f"SSH-соединение с роутером разорвано во время выполнения: {e}")
+            finally:
+                if not finished:
+                    stderr_task.cancel()
+                process.close()
+        finally:
+            self._release(index)
+
+        if stderr:
+            raise StderrOutput(stderr)
+
+    async def close(self):
+        """Закрытие всех соединений пула."""
+        for index, task in enumerate(self._connecting):
+            if task is not None:
+                task.cancel()
+                self._connecting[index] = None
+        connections = [connection for connection in self._connections if connection is not None]
+        self._connections = [None] * len(self._connections)
+        for connection in connections:
+            connection.close()
+        for connection in connections:
+            await connection.wait_closed()
+
+    def stats(self) -> dict:
+        """Состояние пула соединений для диагностики."""
+        return {
+            'connections': sum(1 for index in range(len(self._connections)) if self._is_alive(index)),
+            'connects': self.connects,
+            'commands': self.commands,
+            'active_sessions': sum(self._active),
+        }
+
+    async def _run(self, index: int, command: str) -> Tuple[str, str]:
+        process = await self._open(index, command)
+        try:
+            stdout, stderr = await process.communicate()
+        except self._asyncssh.Error as e:
+            raise RuntimeError(f"SSH-соединение с роутером разорвано во время выполнения: {e}")
+        finally:
+            process.close()
+        return stdout or '', stderr or ''
+
+    async def _acquire(self) -> int:
+        """Выбор соединения для команды (с ожиданием, если все каналы пула заняты)."""
+        await self._slots.acquire()
+        candidates = [index for index in range(len(self._active)) if self._active[index] < self.max_sessions]
+        index = min(candidates, key=self._preference)
+        self._active[index] += 1
+        self.commands += 1
+        return index
+
+    def _preference(self, index: int) -> Tuple[int, int]:
+        """Порядок выбора: свободное открытое соединение, еще не открытое, наименее загруженное."""
+        if not self._is_alive(index):
+            return 1, 0
+        if not self._active[index]:
+            return 0, 0
+        return 2, self._active[index]
+
+    def _release(self, index: int):
+        self._active[index] -= 1
+        self._slots.release()
+
+    def _is_alive(self, index: int) -> bool:
+        connection = self._connections[index]
+        return self._connecting[index] is not None or (connection is not None and not connection.is_closed())
+
+    async def _open(self, index: int, command: str):
+        """Открытие канала для команды; если соединение оказалось разорванным - переподключение."""
+        for attempt in range(2):
+            connection = await self._connection(index)
+            try:
+                return await connection.create_process(
+                    command, stdin=self._asyncssh.DEVNULL, encoding='utf-8', errors='replace'
+                )
+            except (self._asyncssh.Error, ConnectionError) as e:
+                # Живое соединение отказало в канале (например, лимит каналов сервера) -
+                # его не трогаем: в нем могут выполняться другие команды
+                if not connection.is_closed() or attempt:
+                    raise RuntimeError(f"Не удалось открыть канал SSH: {e}")
+                # Команда еще не начала выполняться, повтор безопасен
+                self.logger.warning(f"SSH-соединение с {self.host} разорвано, переподключение")
+                if self._connections[index] is connection:
+                    self._connections[index] = None
+
+    async def _connection(self, index: int):
+        """Открытое соединение пула; одновременные команды ждут одно подключение."""
+        connection = self._connections[index]
+        if connection is not None and not connection.is_closed():
+            return connection
+
+        task = self._connecting[index]
+        if task is None:
+            task = self._connecting[index] = asyncio.ensure_future(self._connect(index))
+            task.add_done_callback(lambda _: self._forget_connecting(index, task))
+        # Отмена одной команды не должна прерывать подключение, которого ждут другие
+        return await asyncio.shield(task)
+
+    def _forget_connecting(self, index: int, task: asyncio.Future):
+        if self._connecting[index] is task:
+            self._connecting[index] = None
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error(f"Не удалось подключиться к {self.host} по SSH: {task.exception()}")
+
+    async def _connect(self, index: int):
+        connection = await self._asyncssh.connect(self.host, **self._options)
+        self._connections[index] = connection
+        self.connects += 1
+        self.logger.info(f"SSH-соединение {index + 1} с {self.host} установлено")
+        return connection
@@ -0,0 +1,57 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class StartupProfiler:
+    """
+    Замер этапов запуска бота (режим --profile-startup).
+
+    Этапы записываются по порядку; отдельно отмечается момент первого
+    запроса к каждому методу Bot API, а завершение запуска - отправка
+    первого getUpdates (или setWebhook в режиме вебхука).
+    """
+
+    READY_METHODS = ('getUpdates', 'setWebhook')
+
+    def __init__(self, origin: Optional[float] = None, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._origin = clock() if origin is None else origin
+        self.phases: List[Tuple[str, float]] = []
+        self.first_requests: Dict[str, float] = {}
+        self._ready: Optional[asyncio.Event] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.phases.append((name, self._clock() - started))
+
+    def on_request(self, endpoint: str):
+        """Вызывается перед каждым запросом к Bot API."""
+        if endpoint in self.first_requests:
+            return
+        self.first_requests[endpoint] = self._clock() - self._origin
+        if endpoint in self.READY_METHODS and self._ready is not None:
+            self._ready.set()
+
+    async def wait_ready(self):
+        """Ожидание первого запроса на получение обновлений."""
+        self._ready = asyncio.Event()
+        if any(method in self.first_requests for method in self.READY_METHODS):
+            return
+        await self._ready.wait()
+
+    def report(self) -> str:
+        lines = ["Этапы запуска:"]
+        for name, duration in self.phases:
+            lines.append(f"  {name:<24} {duration * 1000:8.1f} мс")
+        lines.append(f"  {'всего':<24} {(self._clock() - self._origin) * 1000:8.1f} мс")
+        if self.first_requests:
+            lines.append("Первые запросы к Bot API (от начала запуска):")
+            for endpoint, at in self.first_requests.items():
+                lines.append(f"  {endpoint:<24} {at * 1000:8.1f} мс")
+        return '\n'.join(lines)
@@ -0,0 +1,72 @@
+import html
+from typing import Callable, Iterable, List
+
+from app.batch import preview_items
+
+# Максимальный размер файла с желаемым списком
+SYNC_MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+
+# Доля удаляемых записей, при превышении которой в предпросмотре выводится предупреждение
+MASS_DELETE_SHARE = 0.5
+
+
+class SyncPlan:
+    """
+    Минимальная разница между желаемым и текущим списком разблокировки.
+
+    Записи сравниваются без префикса "*." (КВАС добавляет домены с ним
+    сам): "youtube.com" в файле совпадает с "*.youtube.com" на роутере.
+    Некорректные домены из файла в план не попадают.
+    """
+
+    def __init__(
+        self,
+        desired: Iterable[str],
+        current: Iterable[str],
+        validate: Callable[[str], bool],
+    ):
+        wanted = {}
+        invalid = {}
+        for item in desired:
+            domain = self._bare(item)
+            if domain in wanted:
+                continue
+            if validate(domain):
+                wanted[domain] = None
+            else:
+                invalid[item] = None
+        self.invalid: List[str] = list(invalid)
+
+        existing = {self._bare(entry) for entry in current}
+        self.add: List[str] = sorted(domain for domain in wanted if domain not in existing)
+        self.delete: List[str] = sorted(existing.difference(wanted))
+        self.unchanged = len(existing) - len(self.delete)
+        self.current_total = len(existing)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.add and not self.delete
+
+    def render_preview(self) -> str:
+        """Текст предпросмотра изменений (HTML)."""
+        lines = [
+            "🔄 <b>Синхронизация списка: предпросмотр</b>",
+            "",
+            f"➕ Будет добавлено: {len(self.add)}",
+            f"➖ Будет удалено: {len(self.delete)}",
+            f"☑️ Без изменений: {self.unchanged}",
+        ]
+        if self.invalid:
+            lines.append(f"⚠️ Некорректные строки (пропущены): {len(self.invalid)}")
+        for label, items in (("➕", self.add), ("➖", self.delete), ("⚠️", self.invalid)):
+            if items:
+                lines.append("")
+                lines.append(f"{label} {html.escape(preview_items(items))}")
+        if self.current_total and len(self.delete) > self.current_total * MASS_DELETE_SHARE:
+            lines.append("")
+            lines.append("❗ Будет удалено больше половины текущего списка. Проверьте файл.")
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _bare(entry: str) -> str:
+        return entry[2:] if entry.startswith('*.') else entry
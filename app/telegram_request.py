@@ -0,0 +1,38 @@
+import time
+from typing import Callable, Optional
+
+from telegram.request import HTTPXRequest
+
+from app.metrics import TELEGRAM_ERRORS, TELEGRAM_SECONDS
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """
+    HTTP-клиент Bot API с учетом времени каждого запроса к Telegram.
+
+    Метка метрики - имя метода Bot API (последний сегмент адреса); для
+    скачивания файлов используется общая метка 'file', чтобы путь к файлу
+    и токен не попадали в метрики.
+
+    on_request, если задан, вызывается перед каждым запросом с именем метода.
+    """
+
+    def __init__(self, *args, on_request: Optional[Callable[[str], None]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_request = on_request
+
+    async def do_request(self, url: str, method: str, *args, **kwargs):
+        endpoint = 'file' if '/file/bot' in url else url.rsplit('/', 1)[-1]
+        if self.on_request is not None:
+            self.on_request(endpoint)
+        started = time.perf_counter()
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+        except Exception:
+            TELEGRAM_ERRORS.labels(endpoint).inc()
+            raise
+        finally:
+            TELEGRAM_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
+        if code >= 400:
+            TELEGRAM_ERRORS.labels(endpoint).inc()
+        return code, payload
@@ -0,0 +1,79 @@
+from collections import deque
+from typing import Any, Awaitable, Deque, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from app.logger import get_logger
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Параллельная обработка обновлений с сохранением порядка внутри чата.
+
+    Обновления разных чатов обрабатываются одновременно, не больше
+    max_concurrent_updates сразу, поэтому долгая команда роутера одного
+    пользователя не задерживает остальных. Обновления одного чата
+    выполняются строго по очереди, в порядке поступления: шаги диалога
+    (ConversationHandler) не гоняются друг с другом. Если чат уже занят,
+    новое обновление ставится в его очередь и выполняется той же задачей
+    после текущего, не занимая отдельного места в общем лимите.
+    """
+
+    __slots__ = ('_chains', 'logger')
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # Чат -> обновления, ожидающие завершения текущего
+        self._chains: Dict[int, Deque[Awaitable[Any]]] = {}
+        self.logger = get_logger(__name__)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._chat_key(update)
+        if key is None:
+            await coroutine
+            return
+
+        chain = self._chains.get(key)
+        if chain is not None:
+            chain.append(coroutine)
+            return
+
+        chain = self._chains[key] = deque([coroutine])
+        try:
+            while chain:
+                try:
+                    await chain[0]
+                except Exception as e:
+                    # Application.process_update сам передает ошибки обработчиков
+                    # в обработчик ошибок; здесь - только непредвиденные
+                    self.logger.error(f"Update processing failed: {e}", exc_info=True)
+                chain.popleft()
+        finally:
+            del self._chains[key]
+            # При отмене оставшиеся обновления чата не будут обработаны
+            for pending in chain:
+                pending.close()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        """Занятые чаты и ожидающие в них обновления."""
+        return {
+            'busy_chats': len(self._chains),
+            'queued_updates': sum(len(chain) - 1 for chain in self._chains.values()),
+        }
+
+    @staticmethod
+    def _chat_key(update: object) -> Optional[int]:
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return update.effective_user.id
+        return None
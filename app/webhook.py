@@ -0,0 +1,47 @@
+import hmac
+import json
+
+from telegram import Update
+from telegram.ext import Application
+
+from app.http_server import HTTPRequest, HTTPResponse
+from app.logger import get_logger
+
+# Заголовок, в котором Telegram передает секрет, указанный в setWebhook
+SECRET_HEADER = 'x-telegram-bot-api-secret-token'
+
+
+class WebhookReceiver:
+    """
+    Прием обновлений от Telegram через вебхук.
+
+    Запрос проверяется по секретному токену, обновление передается в очередь
+    обновлений Application - дальше оно обрабатывается так же, как при polling.
+    """
+
+    def __init__(self, application: Application, secret_token: str):
+        self.application = application
+        self.secret_token = secret_token
+        self.logger = get_logger(__name__)
+
+    async def handle(self, request: HTTPRequest) -> HTTPResponse:
+        if request.method != 'POST':
+            return 405, 'text/plain', b'Method Not Allowed'
+
+        token = request.headers.get(SECRET_HEADER, '')
+        if not hmac.compare_digest(token.encode(), self.secret_token.encode()):
+            self.logger.warning("Webhook request with invalid secret token rejected")
+            return 403, 'text/plain', b'Forbidden'
+
+        try:
+            data = json.loads(request.body)
+            update = Update.de_json(data, self.application.bot)
+        except Exception as e:
+            self.logger.warning(f"Invalid webhook payload: {e}")
+            return 400, 'text/plain', b'Bad Request'
+
+        if update is None:
+            return 400, 'text/plain', b'Bad Request'
+
+        await self.application.update_queue.put(update)
+        return 200, 'text/plain', b'OK'
@@ -1,33 +1,52 @@
+import time
+
+_STARTED = time.perf_counter()
+
 import asyncio
 import os
 import signal
-from dotenv import load_dotenv
+import sys
+from contextlib import nullcontext
 
-from app.bot import VPNBot
-from app.config import Config
-from app.logger import get_logger
-from app.router_client import RouterLocalClient
+from app.config import Config, load_env
+from app.logger import get_logger, setup_logging
+from app.memory import start_tracing
+from app.startup import StartupProfiler
 
-async def main():
+async def main(config: Config, profiler: StartupProfiler = None):
     logger = get_logger(__name__)
     logger.setLevel('INFO')
 
-    config = Config()
-    router_client = RouterLocalClient(config)
+    # Тяжелые модули (python-telegram-bot, httpx) загружаются только после
+    # успешной проверки конфигурации
+    with profiler.phase('импорт модулей') if profiler else nullcontext():
+        from app.bot import VPNBot
+        from app.router_client import create_router_client
+
+    router_client = create_router_client(config)
     bot = VPNBot(config, router_client)
-    
+
+    if profiler:
+        with profiler.phase('сборка Application'):
+            await bot.initialize(on_request=profiler.on_request)
+
     # Создаем задачу для запуска бота
     bot_task = asyncio.create_task(bot.start())
-    
+
+    if profiler:
+        with profiler.phase('до первого getUpdates'):
+            await _wait_ready(profiler, bot_task)
+        print(profiler.report())
+        bot_task.cancel()
+
     # Настройка обработки сигналов
     loop = asyncio.get_running_loop()
 
-    load_dotenv()
     env = os.getenv('ENV')
     if env and env.upper() == 'PROD':
         for sig in (signal.SIGINT, signal.SIGTERM):
             loop.add_signal_handler(sig, lambda: bot_task.cancel())
-    
+
     try:
         await bot_task
     except asyncio.CancelledError:
@@ -35,8 +54,25 @@ async def main():
     except Exception as e:
         print(f"Критическая ошибка: {e}")
     finally:
-        # Дополнительная очистка, если необходимо
-        pass
+        await router_client.close()
+
+async def _wait_ready(profiler: StartupProfiler, bot_task: asyncio.Task):
+    """Ожидание первого запроса обновлений (или завершения запуска с ошибкой)."""
+    ready = asyncio.create_task(profiler.wait_ready())
+    await asyncio.wait({ready, bot_task}, return_when=asyncio.FIRST_COMPLETED)
+    ready.cancel()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    profiler = StartupProfiler(origin=_STARTED) if '--profile-startup' in sys.argv else None
+    if profiler:
+        profiler.phases.append(('импорт main.py', time.perf_counter() - _STARTED))
+
+    with profiler.phase('конфигурация') if profiler else nullcontext():
+        # .env читается один раз, до настройки журналирования и конфигурации
+        load_env()
+        setup_logging()
+        config = Config()
+        # Трассировка выделений памяти - до загрузки тяжелых модулей
+        start_tracing(config.MEMORY_TRACE)
+
+    asyncio.run(main(config, profiler))
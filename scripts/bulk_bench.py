@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Пакетное добавление сайтов (`_apply_bulk`) на заглушке роутера.
+
+Роутер заменен исполнителем без процессов: каждый вызов стоит --call-delay,
+каждый домен в нем - еще --kvas-delay (применение списка КВАС). В списке
+на роутере --list-size записей, часть из них - "*.домен". Добавляются
+--domains доменов: новые, уже записанные, покрытые записью "*.родитель"
+и некорректные. Для каждого BULK_CHUNK_SIZE выводятся время, число вызовов
+роутера и доменов, отправленных в `kvas`, а также расхождение кэша со
+списком на роутере после прогона (записей, которых на роутере нет).
+
+Отдельно сравнивается отсев дубликатов: DomainTrie против перебора
+списка для каждого домена.
+
+Пример:
+    python scripts/bulk_bench.py --list-size 100000 --domains 500 --chunks 1,20,100
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+from types import SimpleNamespace
+from typing import List, Set
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Токен правильного формата; в сеть он не уходит
+os.environ.update({
+    'BOT_TOKEN': '1234567890:' + 'A' * 35,
+    'ALLOWED_USERS': '1',
+    'ENV': '',
+    'LOG': os.environ.get('LOG', 'WARNING'),
+    'HEALTH_INTERVAL': '0',
+})
+
+from app.batch import BATCH_MARKER  # noqa: E402
+from app.bot import VPNBot  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.domain_trie import DomainTrie  # noqa: E402
+from app.router_client import RouterLocalClient, RouterResponse  # noqa: E402
+
+KVAS_COMMAND = re.compile(r"kvas (add|del) (\S+) -y")
+
+
+class FakeRouter:
+    """Исполнитель команд с состоянием списка КВАС вместо роутера."""
+
+    def __init__(self, entries: Set[str], call_delay: float, kvas_delay: float):
+        self.entries = set(entries)
+        self.call_delay = call_delay
+        self.kvas_delay = kvas_delay
+        self.calls = 0
+        self.kvas = 0
+
+    def covers(self, domain: str) -> bool:
+        labels = domain.split('.')
+        return any('*.' + '.'.join(labels[index:]) in self.entries for index in range(len(labels) - 1))
+
+    async def run(self, command: str, timeout: float):
+        self.calls += 1
+        lines = []
+        domains = KVAS_COMMAND.findall(command)
+        for verb, domain in domains:
+            self.kvas += 1
+            listed = {domain, '*.' + domain} & self.entries
+            if verb == 'add':
+                if listed or self.covers(domain):
+                    lines.append(f"{domain} уже есть в списке")
+                else:
+                    # КВАС добавляет домен вместе с поддоменами
+                    self.entries.add('*.' + domain)
+                    lines.append(f"{domain} {RouterResponse.ADD_SUCCESS}")
+            elif listed:
+                self.entries -= listed
+                lines.append(f"{domain} {RouterResponse.DELETE_SUCCESS}")
+            else:
+                lines.append(RouterResponse.DELETE_NOT_FOUND)
+            lines.append(f"{BATCH_MARKER} {domain}")
+        await asyncio.sleep(self.call_delay + self.kvas_delay * len(domains))
+        return '\n'.join(lines) + '\n', ''
+
+    async def close(self):
+        pass
+
+
+class FakeMessage:
+    """Сообщение Telegram: ответы и правки только подсчитываются."""
+
+    def __init__(self):
+        self.edits = 0
+
+    async def reply_text(self, text, **kwargs):
+        return self
+
+    async def edit_text(self, text, **kwargs):
+        self.edits += 1
+        return self
+
+
+def make_list(rng: random.Random, size: int) -> Set[str]:
+    entries = set()
+    while len(entries) < size:
+        domain = f"site{rng.randrange(size * 10)}.example{rng.randrange(50)}.com"
+        entries.add('*.' + domain if rng.random() < 0.3 else domain)
+    return entries
+
+
+def make_domains(rng: random.Random, entries: Set[str], count: int) -> List[str]:
+    """Новые (половина), уже записанные, покрытые "*.родитель" и некорректные домены."""
+    listed = sorted(entries)
+    wildcards = [entry[2:] for entry in listed if entry.startswith('*.')]
+    domains = []
+    for index in range(count):
+        kind = index % 8
+        if kind < 4:
+            domains.append(f"new{index}.bench-domain.org")
+        elif kind < 6:
+            entry = rng.choice(listed)
+            domains.append(entry[2:] if entry.startswith('*.') else entry)
+        elif kind == 6:
+            domains.append(f"cdn{index}.{rng.choice(wildcards)}")
+        else:
+            domains.append(f"bad_domain_{index}")
+    return domains
+
+
+def naive_lookup(entries: Set[str], domain: str):
+    """Проверка домена перебором всего списка."""
+    for entry in entries:
+        bare = entry[2:] if entry.startswith('*.') else entry
+        if bare == domain:
+            return 'exact'
+        if entry.startswith('*.') and domain.endswith('.' + bare):
+            return 'covered'
+    return None
+
+
+async def run_bulk(args, entries: Set[str], domains: List[str], chunk: int) -> dict:
+    os.environ['BULK_CHUNK_SIZE'] = str(chunk)
+    config = Config()
+    router = FakeRouter(entries, args.call_delay / 1000, args.kvas_delay / 1000)
+    client = RouterLocalClient(config)
+    client.executor = router
+    bot = VPNBot(config, client)
+
+    async def load(progress=None):
+        return set(router.entries)
+
+    bot.site_cache._loader = load
+    await bot.site_cache.get()
+
+    message = FakeMessage()
+    started = time.perf_counter()
+    await bot._apply_bulk(message, 'add', domains)
+    elapsed = time.perf_counter() - started
+
+    cached = set(await bot.site_cache.get())
+    return {
+        'elapsed': elapsed,
+        'calls': router.calls,
+        'kvas': router.kvas,
+        'edits': message.edits,
+        'phantom': len(cached - router.entries),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетное добавление: вызовы роутера и отсев дубликатов")
+    parser.add_argument('--list-size', type=int, default=100000, help="записей в списке на роутере")
+    parser.add_argument('--domains', type=int, default=400, help="добавляемых доменов")
+    parser.add_argument('--chunks', default='1,20,100', help="значения BULK_CHUNK_SIZE через запятую")
+    parser.add_argument('--call-delay', type=float, default=20, help="стоимость вызова роутера, мс")
+    parser.add_argument('--kvas-delay', type=float, default=5, help="стоимость `kvas add` на домен, мс")
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args(argv)
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    entries = make_list(rng, args.list_size)
+    domains = make_domains(rng, entries, args.domains)
+
+    started = time.perf_counter()
+    trie = DomainTrie(entries)
+    build = time.perf_counter() - started
+    started = time.perf_counter()
+    for domain in domains:
+        trie.lookup(domain)
+    trie_time = time.perf_counter() - started
+    sample = domains[:50]
+    started = time.perf_counter()
+    for domain in sample:
+        naive_lookup(entries, domain)
+    naive_time = (time.perf_counter() - started) * len(domains) / len(sample)
+
+    print(f"Список: {args.list_size} записей, добавляется доменов: {args.domains}")
+    print(f"Отсев дубликатов: DomainTrie {trie_time * 1000:.2f} мс (построение {build * 1000:.0f} мс), "
+          f"перебор списка {naive_time * 1000:.0f} мс")
+    print(f"{'пачка':>7}{'время, с':>10}{'вызовов':>9}{'в kvas':>8}{'правок':>8}{'лишних в кэше':>15}")
+    for chunk in (int(value) for value in args.chunks.split(',')):
+        result = await run_bulk(args, entries, domains, chunk)
+        print(
+            f"{chunk:>7}{result['elapsed']:>10.2f}{result['calls']:>9}{result['kvas']:>8}"
+            f"{result['edits']:>8}{result['phantom']:>15}"
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(run(parse_args()))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Сравнение исполнителей команд роутера: процесс `/bin/sh` на каждую команду
+(OneShotExecutor) и одна постоянная оболочка (ShellSessionExecutor).
+
+Команды выполняются по очереди, как изменяющие команды бота. Для каждого
+объема вывода (--output-lines, строк на команду) замеряются задержка
+p50/p95/p99 и число команд в секунду в обычном и потоковом режимах.
+Отдельно проверяется восстановление оболочки после таймаута: следующая
+команда должна вернуть только свой вывод.
+
+Пример:
+    python scripts/executor_bench.py --commands 300 --output-lines 1,100,10000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.executors import OneShotExecutor, ShellSessionExecutor  # noqa: E402
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Процентиль по ближайшему рангу для отсортированного списка."""
+    rank = max(1, int(share * len(values) + 0.999999))
+    return values[min(rank, len(values)) - 1]
+
+
+def make_command(lines: int) -> str:
+    """Команда с выводом заданного числа строк, похожих на вывод `kvas list`."""
+    if lines <= 1:
+        return 'echo ok'
+    return f"seq 1 {lines} | sed 's/^/  *.site&.example-domain.com/'"
+
+
+async def measure(executor, command: str, commands: int, timeout: float, streamed: bool) -> dict:
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(commands):
+        command_started = time.perf_counter()
+        if streamed:
+            async for _ in executor.stream(command, timeout):
+                pass
+        else:
+            await executor.run(command, timeout)
+        latencies.append(time.perf_counter() - command_started)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'throughput': commands / elapsed,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+async def check_recovery(executor: ShellSessionExecutor) -> bool:
+    """Команда после таймаута получает только свой вывод."""
+    try:
+        await executor.run('echo stale; sleep 5; echo stale', timeout=0.2)
+    except asyncio.TimeoutError:
+        pass
+    stdout, _ = await executor.run('echo fresh', timeout=5)
+    return stdout == 'fresh\n'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Процесс на команду против постоянной оболочки")
+    parser.add_argument('--commands', type=int, default=300, help="команд на замер")
+    parser.add_argument('--output-lines', default='1,100,10000',
+                        help="строк вывода на команду, через запятую")
+    parser.add_argument('--shell', default='/bin/sh', help="оболочка ShellSessionExecutor")
+    parser.add_argument('--timeout', type=float, default=30, help="таймаут команды, секунды")
+    return parser.parse_args(argv)
+
+
+async def run(args):
+    print(f"Команд на замер: {args.commands}, по одной")
+    print(f"{'строк':>7}  {'исполнитель':<22}{'режим':<10}{'команд/с':>10}"
+          f"{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}")
+    for lines in (int(value) for value in args.output_lines.split(',')):
+        command = make_command(lines)
+        for name, make_executor in (
+            ("процесс на команду", OneShotExecutor),
+            ("постоянная оболочка", lambda: ShellSessionExecutor(args.shell)),
+        ):
+            for streamed in (False, True):
+                executor = make_executor()
+                try:
+                    result = await measure(executor, command, args.commands, args.timeout, streamed)
+                finally:
+                    await executor.close()
+                print(
+                    f"{lines:>7}  {name:<22}{'поток' if streamed else 'целиком':<10}"
+                    f"{result['throughput']:>10.1f}{result['p50'] * 1000:>10.2f}"
+                    f"{result['p95'] * 1000:>10.2f}{result['p99'] * 1000:>10.2f}"
+                )
+
+    executor = ShellSessionExecutor(args.shell)
+    try:
+        recovered = await check_recovery(executor)
+    finally:
+        await executor.close()
+    print(f"Оболочка после таймаута: {'вывод чистый' if recovered else 'ОСТАТОК ПРЕДЫДУЩЕЙ КОМАНДЫ'}, "
+          f"перезапусков: {executor.restarts}")
+    return 0 if recovered else 1
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(run(parse_args())))
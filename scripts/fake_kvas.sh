@@ -0,0 +1,71 @@
+#!/bin/sh
+
+# Имитация `kvas` и `reboot` для нагрузочного тестирования бота (scripts/loadtest.py).
+# Команда определяется по имени, под которым запущен скрипт: kvas или reboot.
+#
+# Параметры (переменные окружения):
+#   FAKE_KVAS_DELAY        Задержка перед ответом, секунды (можно дробные), по умолчанию 0
+#   FAKE_KVAS_LIST_SIZE    Число записей в выводе `kvas list`, по умолчанию 100
+#   FAKE_KVAS_EXTRA_LINES  Дополнительные строки вывода `kvas add/del`, по умолчанию 0
+#   FAKE_KVAS_APPLY_LOG    Файл учета применений списка: каждый `kvas add/del`, изменивший
+#                          список, и каждый `kvas ipset refill` дописывают в него строку
+#                          (настоящий КВАС при этом перестраивает ipset/dnsmasq)
+
+DELAY="${FAKE_KVAS_DELAY:-0}"
+LIST_SIZE="${FAKE_KVAS_LIST_SIZE:-100}"
+EXTRA_LINES="${FAKE_KVAS_EXTRA_LINES:-0}"
+
+# Оформление вывода - как у настоящего КВАС
+GREEN='\033[1;32m'
+CYAN='\033[36m'
+NC='\033[0m'
+
+[ "$DELAY" != "0" ] && sleep "$DELAY"
+
+# Учет применения измененного списка
+record_apply() {
+    [ -n "$FAKE_KVAS_APPLY_LOG" ] && echo "$1 $2" >> "$FAKE_KVAS_APPLY_LOG"
+    return 0
+}
+
+# Служебный вывод, который бот должен отбросить
+print_noise() {
+    [ "$EXTRA_LINES" -gt 0 ] || return 0
+    awk -v n="$EXTRA_LINES" 'BEGIN { for (i = 0; i < n; i++) printf "Обработка записи %d...\n", i }'
+}
+
+case "$(basename "$0")" in
+    reboot)
+        exit 0
+        ;;
+esac
+
+case "$1" in
+    list)
+        printf "${GREEN}----------------------------------------------------${NC}\n"
+        printf "Список разблокировки содержит %s записей:\n" "$LIST_SIZE"
+        awk -v n="$LIST_SIZE" -v c="$CYAN" -v nc="$NC" \
+            'BEGIN { for (i = 0; i < n; i++) printf "%s*.site%d.example.com%s\n", c, i, nc }'
+        printf "${GREEN}----------------------------------------------------${NC}\n"
+        ;;
+    add)
+        print_noise
+        case "$2" in
+            site[0-9]*.example.com) echo "Домен $2 уже есть в списке" ;;
+            *) record_apply add "$2"; echo "$2 ДОБАВЛЕН" ;;
+        esac
+        ;;
+    del)
+        print_noise
+        record_apply del "$2"
+        echo "$2 УДАЛЕН"
+        ;;
+    ipset)
+        record_apply ipset "$2"
+        echo "Список разблокировки применен"
+        ;;
+    *)
+        echo "Неизвестная команда: $1" >&2
+        exit 1
+        ;;
+esac
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Скорость и память OutputFormatter на больших выводах `kvas list`.
+
+Сравниваются исходная реализация clean_terminal_output (ее копия -
+baseline_clean_terminal_output ниже) и текущая: весь вывод одной строкой
+и построчно, как при потоковом чтении. Для каждого размера выводятся
+строк в секунду (лучшее из --repeat) и пиковый объем выделенной памяти
+(tracemalloc); результаты всех путей сверяются между собой.
+
+Вывод строится так же, как его печатает КВАС (цвета, стирание строки,
+нумерация, разделители), или берется из файла (--input), например
+сохраненного с роутера: `kvas list > kvas-list.txt`.
+
+Сохраненный вывод можно добавить в эталоны tests/fixtures/formatter:
+эталонный результат строится исходной реализацией.
+
+Примеры:
+    python scripts/formatter_bench.py --sizes 1000,10000,100000
+    python scripts/formatter_bench.py --input kvas-list.txt
+    python scripts/formatter_bench.py --add-fixture kvas_list_router --input kvas-list.txt
+"""
+import argparse
+import html
+import os
+import re
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.formatter import OutputFormatter  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'tests', 'fixtures', 'formatter')
+
+GREEN = '\x1b[1;32m'
+CYAN = '\x1b[36m'
+YELLOW = '\x1b[33m'
+NC = '\x1b[0m'
+SEPARATOR = '-' * 41
+
+
+def baseline_clean_terminal_output(output: str) -> str:
+    """Исходная реализация OutputFormatter.clean_terminal_output (без изменений)."""
+    # Удаление ANSI escape-последовательностей
+    ansi_escape = re.compile(r'\x1B[@-_][0-?]*[ -/]*[@-~]')
+    output = ansi_escape.sub('', output)
+
+    # Удаление специальных управляющих символов
+    output = re.sub(r'\[K', '', output)
+    output = re.sub(r'\x1b\[[0-9;]*[mz]', '', output)
+
+    # Разбить на строки и очистить каждую
+    cleaned_lines = []
+    for line in output.split('\n'):
+        # Убрать лишние пробелы в начале и конце
+        line = line.strip()
+
+        # Пропускаем пустые строки и разделители
+        if line and not re.match(r'^-+$', line):
+            # Специальная обработка строк с количеством
+            if 'список разблокировки' in line.lower():
+                # Сохраняем строку с количеством, но очищаем от лишних символов
+                count_match = re.search(r'содержит\s+(\d+)\s+записей', line)
+                if count_match:
+                    line = f"Список разблокировки содержит {count_match.group(1)} записей:"
+
+            # HTML-экранирование для безопасности
+            line = html.escape(line)
+            cleaned_lines.append(line)
+
+    return '\n'.join(cleaned_lines)
+
+
+def make_output(count: int) -> str:
+    """Вывод `kvas list` на count записей в оформлении КВАС."""
+    lines = [
+        f"{GREEN}{SEPARATOR}{NC}",
+        f"{CYAN}Список разблокировки содержит {count} записей:{NC}\x1b[K",
+        SEPARATOR,
+    ]
+    for index in range(count):
+        entry = f"*.site{index}.example.com" if index % 3 else f"cdn{index}.example.org"
+        lines.append(f"{index + 1:>5}  {YELLOW}{entry}{NC}\x1b[K")
+    lines.append(SEPARATOR)
+    return '\n'.join(lines) + '\n'
+
+
+def measure(function: Callable[[], str], repeat: int) -> dict:
+    """Лучшее время из repeat запусков и пик памяти отдельного запуска."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'time': best, 'peak': peak, 'result': result}
+
+
+def add_fixture(name: str, path: str):
+    """Сохранение вывода в эталоны вместе с результатом исходной реализации."""
+    with open(path, encoding='utf-8', errors='replace', newline='') as source:
+        output = source.read()
+    with open(os.path.join(FIXTURES, f"{name}.txt"), 'w', encoding='utf-8', newline='') as fixture:
+        fixture.write(output)
+    with open(os.path.join(FIXTURES, f"{name}.expected.txt"), 'w', encoding='utf-8', newline='') as expected:
+        expected.write(baseline_clean_terminal_output(output))
+    print(f"Эталон {name}: {len(output.splitlines())} строк -> {FIXTURES}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="OutputFormatter: исходная реализация против текущей")
+    parser.add_argument('--sizes', default='1000,10000,100000', help="записей в выводе через запятую")
+    parser.add_argument('--input', default=None, help="файл с сохраненным выводом `kvas list` вместо синтетического")
+    parser.add_argument('--repeat', type=int, default=5, help="повторов замера")
+    parser.add_argument('--add-fixture', metavar='NAME', default=None,
+                        help="сохранить --input в эталоны tests/fixtures/formatter под именем NAME")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.add_fixture:
+        if not args.input:
+            print("--add-fixture требует --input", file=sys.stderr)
+            return 2
+        add_fixture(args.add_fixture, args.input)
+        return 0
+
+    if args.input:
+        with open(args.input, encoding='utf-8', errors='replace', newline='') as source:
+            outputs = [source.read()]
+    else:
+        outputs = [make_output(int(size)) for size in args.sizes.split(',')]
+
+    print(f"{'строк':>8}  {'путь':<14}{'время, мс':>11}{'строк/с':>12}{'пик памяти, КБ':>16}")
+    mismatches = 0
+    for output in outputs:
+        count = output.count('\n') + 1
+        paths = (
+            ("исходный", lambda: baseline_clean_terminal_output(output)),
+            ("строкой", lambda: OutputFormatter.clean_terminal_output(output)),
+            ("построчно", lambda: OutputFormatter.clean_terminal_output(iter(output.split('\n')))),
+        )
+        results: List[dict] = []
+        for name, function in paths:
+            result = measure(function, args.repeat)
+            results.append(result)
+            print(
+                f"{count:>8}  {name:<14}{result['time'] * 1000:>11.1f}"
+                f"{count / result['time']:>12.0f}{result['peak'] / 1024:>16.0f}"
+            )
+        if any(result['result'] != results[0]['result'] for result in results[1:]):
+            mismatches += 1
+            print(f"{count:>8}  РАСХОЖДЕНИЕ с исходной реализацией")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
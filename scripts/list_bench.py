@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Сравнение способов отправки длинного списка разблокировки: страницами
+(текстовые сообщения) и файлом (ListDocument, .txt или .txt.gz).
+
+Для каждого размера списка замеряются время подготовки и пиковый объем
+выделенной памяти (tracemalloc), а также объем отправляемых данных.
+Время отправки оценивается без сети: задержка на запрос к Bot API
+(--rtt) плюс передача данных с заданной скоростью (--bandwidth).
+Для сравнения приводится и сборка файла целиком в памяти
+(join + gzip.compress), как без ListDocument.
+
+Пример:
+    python scripts/list_bench.py --sizes 1000,10000,100000
+"""
+import argparse
+import gzip
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Sequence, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.list_document import ListDocument  # noqa: E402
+from app.paginator import ListPaginator  # noqa: E402
+
+
+def make_entries(count: int) -> Tuple[str, ...]:
+    """Отсортированный список правдоподобных записей."""
+    return tuple(sorted(f"*.site{index}.example-domain.com" for index in range(count)))
+
+
+def measure(build: Callable[[], Tuple[int, int]]) -> dict:
+    """Запуск build() под tracemalloc: (запросов, байт) и затраты."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    requests, size = build()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'build': elapsed, 'peak': peak, 'requests': requests, 'size': size}
+
+
+def text_pages(entries: Sequence[str], page_size: int) -> Tuple[int, int]:
+    """Все страницы списка, как при листании: по сообщению на страницу."""
+    paginator = ListPaginator(entries, max_page_size=page_size)
+    size = 0
+    for page in range(paginator.page_count):
+        size += len(paginator.render(page).encode())
+    return paginator.page_count, size
+
+
+def document(entries: Sequence[str]) -> Tuple[int, int]:
+    with ListDocument(entries, 'kvas-list.txt') as result:
+        # Bot API-клиент читает файл целиком перед отправкой
+        return 1, len(result.file.read())
+
+
+def in_memory(entries: Sequence[str]) -> Tuple[int, int]:
+    raw = ('\n'.join(entries) + '\n').encode()
+    return 1, len(gzip.compress(raw, mtime=0))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Список страницами против списка файлом")
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help="размеры списка через запятую")
+    parser.add_argument('--page-size', type=int, default=50, help="LIST_PAGE_SIZE")
+    parser.add_argument('--rtt', type=float, default=150, help="задержка запроса к Bot API, мс")
+    parser.add_argument('--bandwidth', type=float, default=1024,
+                        help="скорость передачи до Bot API, КБ/с")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes: List[int] = [int(size) for size in args.sizes.split(',')]
+
+    print(f"{'записей':>8}  {'способ':<18}{'подготовка, мс':>16}{'пик памяти, КБ':>16}"
+          f"{'запросов':>10}{'отправка, КБ':>14}{'оценка отправки, с':>20}")
+    for count in sizes:
+        entries = make_entries(count)
+        for name, build in (
+            ("страницы", lambda: text_pages(entries, args.page_size)),
+            ("файл ListDocument", lambda: document(entries)),
+            ("файл в памяти", lambda: in_memory(entries)),
+        ):
+            result = measure(build)
+            send = result['requests'] * args.rtt / 1000 + result['size'] / 1024 / args.bandwidth
+            print(
+                f"{count:>8}  {name:<18}{result['build'] * 1000:>16.1f}{result['peak'] / 1024:>16.0f}"
+                f"{result['requests']:>10}{result['size'] / 1024:>14.1f}{send:>20.2f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
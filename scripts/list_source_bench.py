@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Чтение списка разблокировки: файл КВАС (KvasListFile) против `kvas list`.
+
+Список загружается так же, как его загружает бот (VPNBot._load_sites):
+потоково из `kvas list` с очисткой вывода OutputFormatter или напрямую из
+файла списка. `kvas` заменяется скриптом scripts/fake_kvas.sh (оформление
+вывода - как у КВАС, задержка запуска - --kvas-delay), файл списка
+содержит те же записи. Для файла замеряются первое чтение (разбор) и
+повторное без изменений файла (проверка mtime/размера/inode).
+
+Пример:
+    python scripts/list_source_bench.py --sizes 1000,10000,100000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FAKE_KVAS = os.path.join(ROOT, 'scripts', 'fake_kvas.sh')
+
+# Токен правильного формата; в сеть он не уходит
+os.environ.update({
+    'BOT_TOKEN': '1234567890:' + 'A' * 35,
+    'ALLOWED_USERS': '1',
+    'ENV': '',
+    'LOG': os.environ.get('LOG', 'WARNING'),
+    'HEALTH_INTERVAL': '0',
+    'KVAS_LIST_FILE': '',
+})
+
+from app.bot import VPNBot  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.list_source import KvasListFile  # noqa: E402
+from app.router_client import RouterLocalClient  # noqa: E402
+
+
+def write_list(path: str, size: int):
+    """Файл списка с теми же записями, что печатает fake_kvas.sh."""
+    with open(path, 'w') as list_file:
+        for index in range(size):
+            list_file.write(f"*.site{index}.example.com\n")
+
+
+async def timed(load: Callable[[], Awaitable[set]], repeat: int, expected: int) -> float:
+    """Лучшее время из repeat загрузок, секунды."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        entries = await load()
+        best = min(best, time.perf_counter() - started)
+        if len(entries) != expected:
+            raise RuntimeError(f"Загружено {len(entries)} записей вместо {expected}")
+    return best
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Список из файла КВАС против `kvas list`")
+    parser.add_argument('--sizes', default='1000,10000,100000', help="записей в списке через запятую")
+    parser.add_argument('--kvas-delay', type=float, default=0.0, help="задержка запуска kvas, секунды")
+    parser.add_argument('--repeat', type=int, default=5, help="повторов замера")
+    return parser.parse_args(argv)
+
+
+async def run(args, directory: str):
+    list_path = os.path.join(directory, 'hosts.list')
+    bot = VPNBot(Config(), RouterLocalClient(Config()))
+    list_file = KvasListFile(list_path)
+
+    async def from_command():
+        bot.list_file = None
+        return await bot._load_sites()
+
+    async def from_file():
+        bot.list_file = list_file
+        return await bot._load_sites()
+
+    async def from_file_parsed():
+        list_file.forget()
+        return await from_file()
+
+    print(f"{'записей':>8}{'kvas list, мс':>15}{'файл, мс':>10}{'файл без изменений, мс':>24}{'выигрыш':>9}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        os.environ['FAKE_KVAS_LIST_SIZE'] = str(size)
+        write_list(list_path, size)
+        command = await timed(from_command, args.repeat, size)
+        parsed = await timed(from_file_parsed, args.repeat, size)
+        unchanged = await timed(from_file, args.repeat, size)
+        print(
+            f"{size:>8}{command * 1000:>15.1f}{parsed * 1000:>10.1f}"
+            f"{unchanged * 1000:>24.2f}{command / parsed:>8.1f}x"
+        )
+    await bot.router_client.executor.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix='kvasbot-list-source-') as directory:
+        bin_dir = os.path.join(directory, 'bin')
+        os.mkdir(bin_dir)
+        os.symlink(FAKE_KVAS, os.path.join(bin_dir, 'kvas'))
+        os.environ['PATH'] = bin_dir + os.pathsep + os.environ.get('PATH', '')
+        os.environ['FAKE_KVAS_DELAY'] = str(args.kvas_delay)
+        asyncio.run(run(args, directory))
+
+
+if __name__ == '__main__':
+    main()
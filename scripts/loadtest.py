@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+"""
+Нагрузочное тестирование бота без сети и без роутера.
+
+Сторона Telegram подменяется: обновления от N пользователей собираются
+из сценария и передаются боту тем же путем, что и полученные из getUpdates
+(через обработчик обновлений с общим лимитом), а запросы к Bot API
+обслуживает HTTP-клиент, отвечающий правдоподобными данными без обращения
+в сеть. `kvas` и `reboot` заменяются скриптом scripts/fake_kvas.sh
+с настраиваемой задержкой и объемом вывода.
+
+Способ доставки обновлений (--delivery): direct - прямо в обработчик
+обновлений, polling - через getUpdates (long polling бота, как в работе),
+webhook - POST на локальный сервер вебхука бота. Задержка обновления
+в режимах polling и webhook считается от его отправки "со стороны Telegram"
+до завершения обработки.
+
+Отчет: задержка обработки обновлений (p50/p95/p99, в целом и по действиям),
+пропускная способность, максимум одновременно выполнявшихся команд роутера
+(при COMMAND_EXECUTOR=oneshot - одновременных процессов), число изменяющих
+вызовов роутера и применений списка КВАС, RSS после прогона и пиковый. С --max-rss прогон служит проверкой на рост памяти: код возврата 1,
+если RSS после прогона больше предела.
+
+Пример:
+    python scripts/loadtest.py --users 20 --actions 50 --kvas-delay 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FAKE_KVAS = os.path.join(ROOT, 'scripts', 'fake_kvas.sh')
+
+# Токен правильного формата; в сеть он не уходит
+FAKE_TOKEN = '1234567890:' + 'A' * 35
+BOT_USER = {'id': 1234567890, 'is_bot': True, 'first_name': 'VPN Bot', 'username': 'fake_vpn_bot'}
+
+# Действие -> относительная частота в сценарии по умолчанию
+DEFAULT_MIX = {
+    'list': 4,
+    'page': 3,
+    'find': 3,
+    'add': 2,
+    'delete': 1,
+    'help': 1,
+    'status': 1,
+    'reboot': 0,
+    # Добавление или удаление одного из нескольких общих для всех доменов
+    'churn': 0,
+}
+
+# Общие домены действия churn
+CHURN_DOMAINS = 5
+
+# Вебхук бота в режиме --delivery webhook
+WEBHOOK_PATH = '/telegram'
+WEBHOOK_SECRET = 'loadtest-secret'
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Разбор сценария вида "list=4,add=1" (неуказанные действия не выполняются)."""
+    mix = {}
+    for pair in value.split(','):
+        name, _, weight = pair.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"неизвестное действие: {name}")
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"некорректная частота действия {name}: {weight!r}")
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("сценарий не содержит действий")
+    return mix
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Процентиль по ближайшему рангу для отсортированного списка."""
+    if not values:
+        return 0.0
+    rank = max(1, int(share * len(values) + 0.999999))
+    return values[min(rank, len(values)) - 1]
+
+
+def prepare_environment(args, bin_dir: str):
+    """Подмена kvas/reboot и настройки бота для прогона."""
+    for name in ('kvas', 'reboot'):
+        os.symlink(FAKE_KVAS, os.path.join(bin_dir, name))
+
+    os.environ.update({
+        'PATH': bin_dir + os.pathsep + os.environ.get('PATH', ''),
+        'FAKE_KVAS_DELAY': str(args.kvas_delay),
+        'FAKE_KVAS_LIST_SIZE': str(args.list_size),
+        'FAKE_KVAS_EXTRA_LINES': str(args.output_lines),
+        'BOT_TOKEN': FAKE_TOKEN,
+        'ALLOWED_USERS': ','.join(str(user_id) for user_id in user_ids(args.users)),
+        'ENV': '',  # Без записи логов в файл
+        'LOG': os.environ.get('LOG', 'WARNING'),
+        # Список читается через `kvas list`, чтобы нагрузка шла через команды роутера
+        'KVAS_LIST_FILE': args.list_file,
+        'LIST_CACHE_TTL': str(args.cache_ttl),
+        'HEALTH_INTERVAL': '0',
+        'METRICS_PORT': '0',
+        'COMMAND_EXECUTOR': args.executor,
+        'UPDATE_CONCURRENCY': str(args.concurrency),
+        'MUTATION_WINDOW': str(args.mutation_window),
+        'FAKE_KVAS_APPLY_LOG': os.path.join(bin_dir, 'applies.log'),
+        'UPDATE_MODE': 'webhook' if args.delivery == 'webhook' else 'polling',
+    })
+    if args.delivery == 'webhook':
+        os.environ.update({
+            'WEBHOOK_URL': f"https://127.0.0.1:{free_port()}{WEBHOOK_PATH}",
+            'WEBHOOK_LISTEN': '127.0.0.1',
+            'WEBHOOK_SECRET': WEBHOOK_SECRET,
+        })
+        os.environ['WEBHOOK_PORT'] = os.environ['WEBHOOK_URL'].rsplit(':', 1)[1].split('/')[0]
+    if not args.rate_limits:
+        for name in ('RATE_LIMIT_COSTLY_PER_MINUTE', 'RATE_LIMIT_CHEAP_PER_MINUTE',
+                     'RATE_LIMIT_COSTLY_BURST', 'RATE_LIMIT_CHEAP_BURST'):
+            os.environ[name] = '1000000'
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def user_ids(count: int) -> List[int]:
+    return [100000 + index for index in range(count)]
+
+
+class FakeTelegram:
+    """Ответы Bot API: отправленные и измененные сообщения возвращаются как настоящие."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._message_id = 0
+        # Обновления для getUpdates (--delivery polling)
+        self._updates: List[dict] = []
+        self._arrived = asyncio.Event()
+
+    def push(self, update: dict):
+        """Обновление, которое получит следующий getUpdates."""
+        self._updates.append(update)
+        self._arrived.set()
+
+    async def get_updates(self, parameters: dict) -> List[dict]:
+        """getUpdates как у Telegram: ответ, как только есть обновления, иначе по таймауту."""
+        self.calls['getUpdates'] += 1
+        offset = int(parameters.get('offset') or 0)
+        self._updates = [update for update in self._updates if update['update_id'] >= offset]
+        if not self._updates:
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), float(parameters.get('timeout') or 0))
+            except asyncio.TimeoutError:
+                pass
+        limit = int(parameters.get('limit') or 100)
+        return self._updates[:limit]
+
+    def respond(self, endpoint: str, parameters: dict) -> dict:
+        self.calls[endpoint] += 1
+        if endpoint == 'getMe':
+            return BOT_USER
+        if endpoint in ('sendMessage', 'sendDocument', 'editMessageText', 'editMessageReplyMarkup'):
+            self._message_id += 1
+            chat_id = parameters.get('chat_id', 0)
+            message = {
+                'message_id': parameters.get('message_id', self._message_id),
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': BOT_USER,
+            }
+            if 'text' in parameters:
+                message['text'] = parameters['text']
+            return message
+        return True
+
+
+def make_request_class(telegram: FakeTelegram):
+    """HTTP-клиент Bot API, работающий без сети, с тем же учетом метрик, что и в боте."""
+    from telegram.request import HTTPXRequest
+
+    from app.telegram_request import InstrumentedRequest
+
+    class OfflineRequest(HTTPXRequest):
+        async def do_request(self, url, method, request_data=None, *args, **kwargs):
+            if telegram.delay:
+                await asyncio.sleep(telegram.delay)
+            endpoint = url.rsplit('/', 1)[-1]
+            parameters = request_data.parameters if request_data is not None else {}
+            if endpoint == 'getUpdates':
+                result = await telegram.get_updates(parameters)
+            else:
+                result = telegram.respond(endpoint, parameters)
+            return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+    # InstrumentedRequest вызывает super().do_request - то есть OfflineRequest
+    class LoadTestRequest(InstrumentedRequest, OfflineRequest):
+        pass
+
+    return LoadTestRequest
+
+
+class UpdateFactory:
+    """Сборка обновлений Telegram (в виде JSON-объектов) от имени пользователей."""
+
+    def __init__(self):
+        self._update_id = 0
+        self._message_id = 0
+
+    def _next_update_id(self) -> int:
+        self._update_id += 1
+        return self._update_id
+
+    def _message(self, user_id: int, text: str, sender: Optional[dict] = None) -> dict:
+        self._message_id += 1
+        message = {
+            'message_id': self._message_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': sender or {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'},
+            'text': text,
+        }
+        if text.startswith('/'):
+            command = text.split()[0]
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(command)}]
+        return message
+
+    def text(self, user_id: int, text: str) -> dict:
+        return {'update_id': self._next_update_id(), 'message': self._message(user_id, text)}
+
+    def callback(self, user_id: int, data: str) -> dict:
+        return {
+            'update_id': self._next_update_id(),
+            'callback_query': {
+                'id': str(self._update_id),
+                'from': {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'},
+                'chat_instance': str(user_id),
+                'data': data,
+                'message': self._message(user_id, '📋 Список', sender=BOT_USER),
+            },
+        }
+
+
+def build_script(user_id: int, actions: int, mix: Dict[str, int], list_size: int,
+                 rng: random.Random) -> Iterator[Tuple[str, List[Tuple[str, str]]]]:
+    """
+    Сценарий пользователя: действия, каждое - последовательность обновлений.
+
+    Действия генерируются по ходу прогона, чтобы память харнесса не росла
+    с длиной сценария и не искажала замер RSS бота.
+    """
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    for step in range(actions):
+        action = rng.choices(names, weights)[0]
+        known = f"site{rng.randrange(max(1, list_size))}.example.com"
+        if action == 'list':
+            updates = [('text', "📜 Список сайтов")]
+        elif action == 'page':
+            updates = [('callback', f"sites:{rng.randrange(3)}")]
+        elif action == 'find':
+            updates = [('text', f"/find site{rng.randrange(100)}")]
+        elif action == 'add':
+            updates = [('text', "➕ Добавить сайт"), ('text', f"load{user_id}-{step}.example.com")]
+        elif action == 'delete':
+            updates = [('text', "➖ Удалить сайт"), ('text', known)]
+        elif action == 'churn':
+            button = rng.choice(("➕ Добавить сайт", "➖ Удалить сайт"))
+            updates = [('text', button), ('text', f"shared{rng.randrange(CHURN_DOMAINS)}.example.com")]
+        elif action == 'help':
+            updates = [('text', "🆘 Помощь")]
+        elif action == 'status':
+            updates = [('text', "/status")]
+        else:
+            updates = [('text', "🔄 Перезагрузить роутер"), ('text', "Да")]
+        yield action, updates
+
+
+class UpdateDelivery:
+    """Передача обновления боту выбранным способом и ожидание конца его обработки."""
+
+    def __init__(self, mode: str, application, telegram: FakeTelegram):
+        self.mode = mode
+        self.application = application
+        self.telegram = telegram
+        # update_id -> завершение обработки (режимы polling и webhook)
+        self._done: Dict[int, asyncio.Future] = {}
+        # Пользователь -> соединение с вебхуком (keep-alive, как у Telegram)
+        self._connections: Dict[int, Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = {}
+        if mode != 'direct':
+            process = application.process_update
+
+            async def tracked(update):
+                try:
+                    await process(update)
+                except Exception as e:
+                    self._finish(update, e)
+                    raise
+                self._finish(update, None)
+
+            # Application вызывает process_update для каждого полученного обновления
+            application.process_update = tracked
+
+    async def deliver(self, user_id: int, data: dict):
+        if self.mode == 'direct':
+            from telegram import Update
+
+            update = Update.de_json(data, self.application.bot)
+            # Тот же путь, что у обновлений из getUpdates: через обработчик
+            # обновлений с общим лимитом и порядком внутри чата
+            await self.application.update_processor.process_update(
+                update, self.application.process_update(update)
+            )
+            return
+
+        done = asyncio.get_running_loop().create_future()
+        self._done[data['update_id']] = done
+        if self.mode == 'polling':
+            self.telegram.push(data)
+        else:
+            await self._post(user_id, json.dumps(data).encode())
+        await done
+
+    async def close(self):
+        for _, writer in self._connections.values():
+            writer.close()
+        self._connections.clear()
+
+    def _finish(self, update, error: Optional[Exception]):
+        done = self._done.pop(getattr(update, 'update_id', None), None)
+        if done is None or done.done():
+            return
+        if error is None:
+            done.set_result(None)
+        else:
+            done.set_exception(error)
+
+    async def _post(self, user_id: int, body: bytes):
+        if user_id not in self._connections:
+            self._connections[user_id] = await asyncio.open_connection(
+                os.environ['WEBHOOK_LISTEN'], int(os.environ['WEBHOOK_PORT'])
+            )
+        reader, writer = self._connections[user_id]
+        writer.write(
+            f"POST {WEBHOOK_PATH} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"X-Telegram-Bot-Api-Secret-Token: {WEBHOOK_SECRET}\r\n\r\n".encode() + body
+        )
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode().partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        await reader.readexactly(length)
+        if status != 200:
+            raise RuntimeError(f"Вебхук ответил {status}")
+
+
+class CommandTracker:
+    """Подсчет одновременно выполняющихся и изменяющих команд роутера."""
+
+    def __init__(self, executor):
+        from app.scheduler import CommandScheduler
+
+        self._is_read_only = CommandScheduler.is_read_only
+        self.current = 0
+        self.peak = 0
+        self.total = 0
+        self.mutating = 0
+        run, stream = executor.run, executor.stream
+
+        async def tracked_run(*args, **kwargs):
+            self._enter(*args)
+            try:
+                return await run(*args, **kwargs)
+            finally:
+                self.current -= 1
+
+        async def tracked_stream(*args, **kwargs):
+            self._enter(*args)
+            try:
+                async for line in stream(*args, **kwargs):
+                    yield line
+            finally:
+                self.current -= 1
+
+        executor.run = tracked_run
+        executor.stream = tracked_stream
+
+    def _enter(self, command: str, *args):
+        self.current += 1
+        self.total += 1
+        if not self._is_read_only(command):
+            self.mutating += 1
+        self.peak = max(self.peak, self.current)
+
+
+async def run_load(args) -> dict:
+    import app.bot
+    from app.bot import VPNBot
+    from app.config import Config
+    from app.logger import setup_logging
+    from app.memory import read_rss, release_memory
+    from app.router_client import RouterLocalClient
+
+    setup_logging()
+    telegram = FakeTelegram(args.api_delay / 1000)
+    # Бот создает клиентов Bot API в initialize(); подменяем класс до вызова
+    app.bot.InstrumentedRequest = make_request_class(telegram)
+
+    config = Config()
+    router_client = RouterLocalClient(config)
+    tracker = CommandTracker(router_client.executor)
+    bot = VPNBot(config, router_client)
+    await bot.initialize()
+    application = bot.application
+    delivery = UpdateDelivery(args.delivery, application, telegram)
+    if args.delivery == 'polling':
+        await bot._start_polling()
+    elif args.delivery == 'webhook':
+        await bot._start_webhook()
+    else:
+        await application.initialize()
+
+    factory = UpdateFactory()
+    # У каждого пользователя свой генератор: сценарий не зависит от порядка выполнения
+    rngs = {user_id: random.Random(f"{args.seed}:{user_id}") for user_id in user_ids(args.users)}
+    scripts = {
+        user_id: build_script(user_id, args.actions, args.mix, args.list_size, rng)
+        for user_id, rng in rngs.items()
+    }
+
+    update_latencies = array('d')
+    action_latencies: Dict[str, array] = defaultdict(lambda: array('d'))
+    errors = 0
+
+    async def simulate(user_id: int):
+        nonlocal errors
+        for action, steps in scripts[user_id]:
+            action_started = time.perf_counter()
+            for kind, payload in steps:
+                update = (factory.text if kind == 'text' else factory.callback)(user_id, payload)
+                started = time.perf_counter()
+                try:
+                    await delivery.deliver(user_id, update)
+                except Exception:
+                    errors += 1
+                update_latencies.append(time.perf_counter() - started)
+                if args.think_time:
+                    await asyncio.sleep(rngs[user_id].uniform(0, args.think_time / 1000))
+            action_latencies[action].append(time.perf_counter() - action_started)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(simulate(user_id) for user_id in scripts))
+        elapsed = time.perf_counter() - started
+    finally:
+        await delivery.close()
+        if application.updater.running:
+            await application.updater.stop()
+        if bot.webhook_server:
+            await bot.webhook_server.stop()
+        if application.running:
+            await application.stop()
+        await application.shutdown()
+        await router_client.close()
+
+    # Установившийся RSS: после сборки мусора, пока бот еще жив
+    release_memory()
+    steady_rss, _ = read_rss()
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    update_latencies = sorted(update_latencies)
+    return {
+        'delivery': args.delivery,
+        'users': args.users,
+        'updates': len(update_latencies),
+        'errors': errors,
+        'elapsed': elapsed,
+        'throughput': len(update_latencies) / elapsed if elapsed else 0.0,
+        'latency': summarize(update_latencies),
+        'actions': {
+            action: dict(summarize(sorted(values)), count=len(values))
+            for action, values in sorted(action_latencies.items())
+        },
+        'commands': {
+            'total': tracker.total,
+            'mutating': tracker.mutating,
+            'peak_concurrent': tracker.peak,
+        },
+        'kvas_applies': count_applies(os.environ['FAKE_KVAS_APPLY_LOG']),
+        'api_calls': dict(sorted(telegram.calls.items())),
+        # ru_maxrss в Linux - в КБ; для дочерних процессов учитывается и копия
+        # интерпретатора между fork и exec, поэтому значение - оценка сверху
+        'peak_rss_kb': self_usage.ru_maxrss,
+        'steady_rss_kb': steady_rss,
+        'peak_child_rss_kb': children_usage.ru_maxrss,
+    }
+
+
+def count_applies(path: str) -> int:
+    """Число применений списка, записанных fake_kvas.sh."""
+    try:
+        with open(path) as log:
+            return sum(1 for _ in log)
+    except FileNotFoundError:
+        return 0
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+        'p99': percentile(values, 0.99),
+        'max': values[-1] if values else 0.0,
+    }
+
+
+def render(report: dict) -> str:
+    def ms(value: float) -> str:
+        return f"{value * 1000:9.1f}"
+
+    latency = report['latency']
+    lines = [
+        f"Пользователей: {report['users']}, обновлений: {report['updates']}, "
+        f"ошибок: {report['errors']}, доставка: {report['delivery']}",
+        f"Время: {report['elapsed']:.2f} с, пропускная способность: "
+        f"{report['throughput']:.1f} обновлений/с",
+        "",
+        f"{'Задержка, мс':<16}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'кол-во':>9}",
+        f"{'все обновления':<16}{ms(latency['p50'])}{ms(latency['p95'])}"
+        f"{ms(latency['p99'])}{ms(latency['max'])}{report['updates']:>9}",
+    ]
+    for action, stats in report['actions'].items():
+        lines.append(
+            f"{action:<16}{ms(stats['p50'])}{ms(stats['p95'])}"
+            f"{ms(stats['p99'])}{ms(stats['max'])}{stats['count']:>9}"
+        )
+    lines += [
+        "",
+        f"Команд роутера: {report['commands']['total']}, "
+        f"одновременно (максимум): {report['commands']['peak_concurrent']}, "
+        f"изменяющих: {report['commands']['mutating']}, "
+        f"применений списка КВАС: {report['kvas_applies']}",
+        "Запросов к Bot API: " + ', '.join(
+            f"{endpoint}={count}" for endpoint, count in report['api_calls'].items()
+        ),
+        f"RSS после прогона: {report['steady_rss_kb'] / 1024:.1f} МБ, "
+        f"пиковый: {report['peak_rss_kb'] / 1024:.1f} МБ "
+        f"(дочерние процессы: {report['peak_child_rss_kb'] / 1024:.1f} МБ)",
+    ]
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочное тестирование бота без сети")
+    parser.add_argument('--users', type=int, default=10, help="число пользователей")
+    parser.add_argument('--actions', type=int, default=20, help="действий на пользователя")
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help="частоты действий, например list=4,add=1 (действия: "
+                             + ', '.join(DEFAULT_MIX) + ")")
+    parser.add_argument('--kvas-delay', type=float, default=0.0,
+                        help="задержка ответа kvas/reboot, секунды")
+    parser.add_argument('--list-size', type=int, default=500, help="записей в выводе `kvas list`")
+    parser.add_argument('--output-lines', type=int, default=0,
+                        help="дополнительные строки вывода `kvas add/del`")
+    parser.add_argument('--api-delay', type=float, default=0.0,
+                        help="задержка ответа Bot API, миллисекунды")
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help="максимальная пауза пользователя между обновлениями, миллисекунды")
+    parser.add_argument('--cache-ttl', type=int, default=60, help="LIST_CACHE_TTL для прогона")
+    parser.add_argument('--list-file', default='',
+                        help="KVAS_LIST_FILE; по умолчанию список читается через `kvas list`")
+    parser.add_argument('--executor', choices=('oneshot', 'session'), default='oneshot',
+                        help="COMMAND_EXECUTOR")
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help="UPDATE_CONCURRENCY: обновлений из разных чатов одновременно")
+    parser.add_argument('--mutation-window', type=float, default=0.0,
+                        help="MUTATION_WINDOW: окно сбора изменений в пакет, секунды (0 - без пакетов)")
+    parser.add_argument('--delivery', choices=('direct', 'polling', 'webhook'), default='direct',
+                        help="доставка обновлений: прямо в обработчик, через getUpdates или вебхук")
+    parser.add_argument('--rate-limits', action='store_true',
+                        help="не отключать ограничение частоты запросов")
+    parser.add_argument('--max-rss', type=float, default=0,
+                        help="предел RSS после прогона, МБ: при превышении - код возврата 1")
+    parser.add_argument('--seed', type=int, default=1, help="зерно генератора сценариев")
+    parser.add_argument('--json', action='store_true', help="отчет в формате JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    bin_dir = tempfile.mkdtemp(prefix='kvasbot-loadtest-')
+    try:
+        prepare_environment(args, bin_dir)
+        report = asyncio.run(run_load(args))
+    finally:
+        shutil.rmtree(bin_dir, ignore_errors=True)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2) if args.json else render(report))
+    if report['errors']:
+        return 1
+    if args.max_rss and report['steady_rss_kb'] > args.max_rss * 1024:
+        print(f"RSS после прогона превышает предел {args.max_rss:g} МБ", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
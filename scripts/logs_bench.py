@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Время чтения хвоста журнала (/logs) на синтетических журналах разного размера.
+
+Для каждого размера создается файл журнала в формате LOG_FORMAT (с редкими
+ERROR и трассировками исключений) и замеряется tail_records: последние
+--records записей без отбора, по уровню ERROR и по логгеру. Для сравнения
+приводится чтение всего файла построчно (как `tail` без поиска с конца).
+Время tail_records не должно расти вместе с размером файла.
+
+Пример:
+    python scripts/logs_bench.py --sizes 5,50,500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.log_tail import tail_records  # noqa: E402
+
+# Блок синтетического журнала повторяется до нужного размера
+BLOCK_RECORDS = 2000
+
+
+def make_block() -> bytes:
+    lines = []
+    for index in range(BLOCK_RECORDS):
+        stamp = f"2025-01-01 12:{index // 60 % 60:02d}:{index % 60:02d},{index % 1000:03d}"
+        if index % 500 == 499:
+            lines.append(f"{stamp} - app.bot - ERROR - Ошибка добавления сайта: timeout")
+            lines.append("Traceback (most recent call last):")
+            lines.append('  File "/opt/apps/vpnbot/app/bot.py", line 1, in add_site')
+            lines.append("asyncio.exceptions.TimeoutError")
+        elif index % 3 == 0:
+            lines.append(f"{stamp} - app.access - DEBUG - User {100000 + index} is allowed")
+        else:
+            lines.append(f"{stamp} - app.router_client - INFO - Команда kvas list выполнена за 0.{index:03d} с")
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def make_log(path: str, size_mb: int):
+    block = make_block()
+    target = size_mb * 1024 * 1024
+    with open(path, 'wb') as log:
+        written = 0
+        while written < target:
+            written += log.write(block)
+
+
+def timed(function, repeat: int) -> float:
+    """Лучшее время из repeat запусков, секунды."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def read_all(path: str, records: int):
+    with open(path, 'rb') as log:
+        deque(log, maxlen=records)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Хвост журнала: чтение с конца против чтения всего файла")
+    parser.add_argument('--sizes', default='5,50,500', help="размеры журнала, МБ, через запятую")
+    parser.add_argument('--records', type=int, default=200, help="записей в хвосте")
+    parser.add_argument('--repeat', type=int, default=5, help="повторов замера")
+    parser.add_argument('--dir', default=None, help="каталог для временных файлов")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"{'МБ':>6}{'все, мс':>12}{'ERROR, мс':>12}{'app.access, мс':>16}"
+          f"{'прочитано, КБ':>15}{'весь файл, мс':>16}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        path = os.path.join(directory, 'router_bot.log')
+        for size_mb in (int(size) for size in args.sizes.split(',')):
+            make_log(path, size_mb)
+            results = [
+                timed(lambda spec=spec: tail_records(path, args.records, spec), args.repeat)
+                for spec in (None, 'error', 'app.access')
+            ]
+            _, read = tail_records(path, args.records, 'error')
+            full = timed(lambda: read_all(path, args.records), 1)
+            print(
+                f"{size_mb:>6}" + ''.join(f"{value * 1000:>12.2f}" for value in results[:2])
+                + f"{results[2] * 1000:>16.2f}{read / 1024:>15.0f}{full * 1000:>16.0f}"
+            )
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
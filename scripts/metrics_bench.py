@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Стоимость метрик в памяти (app.metrics).
+
+Замеряются:
+- запись наблюдения: Histogram.observe, поиск по меткам плюс observe и
+  декоратор timed на пустой корутине (против вызова без него);
+- выгрузка render() и summary() при разном числе сочетаний меток;
+- точность квантилей по корзинам против точных значений на
+  логнормальных задержках.
+
+Пример:
+    python scripts/metrics_bench.py --observations 200000 --labels 10,100
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import Callable, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.metrics import DEFAULT_BUCKETS, Counter, Histogram, MetricsRegistry, timed  # noqa: E402
+
+
+def per_call(function: Callable[[], None], count: int) -> float:
+    """Время одного вызова, наносекунды."""
+    started = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - started) / count * 1e9
+
+
+def per_await(make_coroutine, count: int) -> float:
+    """Время одного await корутины в цикле событий, наносекунды."""
+    async def loop():
+        started = time.perf_counter()
+        for _ in range(count):
+            await make_coroutine()
+        return time.perf_counter() - started
+
+    return asyncio.run(loop()) / count * 1e9
+
+
+def exact_quantile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Накладные расходы и точность метрик")
+    parser.add_argument('--observations', type=int, default=200000, help="наблюдений на замер")
+    parser.add_argument('--labels', default='10,100,1000', help="сочетаний меток для выгрузки, через запятую")
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    count = args.observations
+
+    histogram = Histogram(DEFAULT_BUCKETS)
+    registry = MetricsRegistry()
+    family = registry.histogram('bench_seconds', 'bench', ('handler',))
+    family.labels('list_sites')
+
+    async def bare():
+        pass
+
+    instrumented = timed(family.labels('list_sites'), Counter())(bare)
+
+    print("Запись наблюдения, нс:")
+    print(f"  {'Histogram.observe':<28}{per_call(lambda: histogram.observe(0.012), count):>10.0f}")
+    print(f"  {'labels() + observe':<28}"
+          f"{per_call(lambda: family.labels('list_sites').observe(0.012), count):>10.0f}")
+    plain = per_await(bare, count)
+    wrapped = per_await(instrumented, count)
+    print(f"  {'await без метрик':<28}{plain:>10.0f}")
+    print(f"  {'await с timed':<28}{wrapped:>10.0f}  (+{wrapped - plain:.0f})")
+
+    print(f"{'сочетаний':>10}{'render, мс':>12}{'размер, КБ':>12}{'summary, мс':>13}")
+    for labels in (int(value) for value in args.labels.split(',')):
+        registry = MetricsRegistry()
+        family = registry.histogram('bench_seconds', 'bench', ('handler',))
+        errors = registry.counter('bench_errors_total', 'bench', ('handler',))
+        for index in range(labels):
+            family.labels(f"handler_{index}").observe(rng.random())
+            errors.labels(f"handler_{index}").inc()
+        registry.collector('bench_cache', lambda: {'size': 20000, 'fresh': True, 'hits': 10})
+        started = time.perf_counter()
+        text = registry.render()
+        render = time.perf_counter() - started
+        started = time.perf_counter()
+        registry.summary()
+        summary = time.perf_counter() - started
+        print(f"{labels:>10}{render * 1000:>12.2f}{len(text) / 1024:>12.1f}{summary * 1000:>13.2f}")
+
+    values = [rng.lognormvariate(-3.5, 1.2) for _ in range(count)]
+    histogram = Histogram(DEFAULT_BUCKETS)
+    for value in values:
+        histogram.observe(value)
+    print("Квантили логнормальных задержек, мс (по корзинам / точно):")
+    for q in (0.5, 0.9, 0.95, 0.99):
+        estimate = histogram.quantile(q) * 1000
+        exact = exact_quantile(values, q) * 1000
+        print(f"  p{q * 100:g}: {estimate:8.1f} / {exact:8.1f}  ({(estimate - exact) / exact * 100:+.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
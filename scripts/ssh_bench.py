@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Сравнение выполнения команд по SSH: пул постоянных соединений (SSHExecutor)
+и новое соединение на каждую команду.
+
+Без --host запускается встроенный SSH-сервер на 127.0.0.1 (asyncssh),
+который выполняет команды локальной оболочкой; с --host замер идет
+на реальном роутере или локальном sshd.
+
+Пример:
+    python scripts/ssh_bench.py --commands 200 --concurrency 8
+    python scripts/ssh_bench.py --host 192.168.1.1 --user root --password secret
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.config import ConnectionMode  # noqa: E402
+from app.ssh_executor import SSHExecutor  # noqa: E402
+
+LOCAL_PASSWORD = 'bench'
+
+
+async def start_local_server():
+    """Встроенный SSH-сервер: пароль LOCAL_PASSWORD, команды выполняет /bin/sh."""
+    import asyncssh
+
+    class BenchServer(asyncssh.SSHServer):
+        def begin_auth(self, username):
+            return True
+
+        def password_auth_supported(self):
+            return True
+
+        def validate_password(self, username, password):
+            return password == LOCAL_PASSWORD
+
+    async def handle(process):
+        proc = await asyncio.create_subprocess_shell(
+            process.command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await proc.communicate()
+        process.stdout.write(stdout.decode(errors='replace'))
+        process.stderr.write(stderr.decode(errors='replace'))
+        process.exit(proc.returncode)
+
+    server = await asyncssh.create_server(
+        BenchServer, '127.0.0.1', 0,
+        server_host_keys=[asyncssh.generate_private_key('ssh-ed25519')],
+        process_factory=handle,
+    )
+    return server, server.sockets[0].getsockname()[1]
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Процентиль по ближайшему рангу для отсортированного списка."""
+    rank = max(1, int(share * len(values) + 0.999999))
+    return values[min(rank, len(values)) - 1]
+
+
+async def measure(make_executor, args, pooled: bool) -> dict:
+    """Выполнение args.commands команд не более чем по args.concurrency одновременно."""
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    shared = make_executor() if pooled else None
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            executor = shared or make_executor()
+            try:
+                await executor.run(args.command, args.timeout)
+            finally:
+                if not pooled:
+                    await executor.close()
+            latencies.append(time.perf_counter() - started)
+
+    if shared is not None:
+        # Соединения пула открываются до замера, как у работающего бота
+        await asyncio.gather(*(shared.run('true', args.timeout) for _ in range(args.pool_size)))
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one() for _ in range(args.commands)))
+    finally:
+        if shared is not None:
+            await shared.close()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'elapsed': elapsed,
+        'throughput': args.commands / elapsed,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'connects': shared.connects if shared is not None else args.commands,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Пул SSH-соединений против соединения на команду")
+    parser.add_argument('--host', help="адрес роутера (по умолчанию - встроенный сервер)")
+    parser.add_argument('--port', type=int, default=22)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', help="пароль (иначе - вход по ключу)")
+    parser.add_argument('--key-file', help="закрытый ключ для входа по ключу")
+    parser.add_argument('--known-hosts', help="файл известных ключей (по умолчанию проверка отключена)")
+    parser.add_argument('--command', default='echo ok', help="выполняемая команда")
+    parser.add_argument('--commands', type=int, default=200, help="число команд")
+    parser.add_argument('--concurrency', type=int, default=4, help="команд одновременно")
+    parser.add_argument('--pool-size', type=int, default=2, help="SSH_POOL_SIZE")
+    parser.add_argument('--max-sessions', type=int, default=4, help="SSH_MAX_SESSIONS")
+    parser.add_argument('--timeout', type=float, default=30, help="таймаут команды, секунды")
+    return parser.parse_args(argv)
+
+
+async def run(args):
+    server = None
+    host, port, password = args.host, args.port, args.password
+    if host is None:
+        server, port = await start_local_server()
+        host, password = '127.0.0.1', LOCAL_PASSWORD
+
+    def make_executor(pool_size=args.pool_size):
+        return SSHExecutor(
+            host=host,
+            port=port,
+            username=args.user,
+            mode=ConnectionMode.PASSWORD if password else ConnectionMode.KEY,
+            password=password,
+            key_file=args.key_file,
+            known_hosts=args.known_hosts,
+            pool_size=pool_size,
+            max_sessions=args.max_sessions,
+        )
+
+    try:
+        pooled = await measure(make_executor, args, pooled=True)
+        per_command = await measure(lambda: make_executor(pool_size=1), args, pooled=False)
+    finally:
+        if server is not None:
+            server.close()
+
+    print(f"Команда: {args.command!r}, команд: {args.commands}, одновременно: {args.concurrency}")
+    print(f"{'':<22}{'команд/с':>10}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}{'подключений':>13}")
+    for name, result in (("пул соединений", pooled), ("соединение на команду", per_command)):
+        print(
+            f"{name:<22}{result['throughput']:>10.1f}{result['p50'] * 1000:>10.1f}"
+            f"{result['p95'] * 1000:>10.1f}{result['p99'] * 1000:>10.1f}{result['connects']:>13}"
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(run(parse_args()))
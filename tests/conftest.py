@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Config требует токен и список пользователей; .env при тестах не нужен
+os.environ.setdefault('BOT_TOKEN', '1234567890:' + 'A' * 35)
+os.environ.setdefault('ALLOWED_USERS', '1')
+
+
+class FakeClock:
+    """Часы, которые идут только по команде."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakeExecutor:
+    """
+    Исполнитель команд роутера без процессов.
+
+    respond(command) возвращает (stdout, stderr) или бросает исключение;
+    ответ выдается через delay секунд (таймаут - как у настоящих
+    исполнителей, asyncio.TimeoutError).
+    """
+
+    def __init__(self, respond=None, delay: float = 0):
+        self.respond = respond or (lambda command: (f"{command}\n", ''))
+        self.delay = delay
+        self.commands = []
+
+    async def run(self, command: str, timeout: float):
+        self.commands.append(command)
+        return await asyncio.wait_for(self._answer(command), timeout)
+
+    async def stream(self, command: str, timeout: float):
+        from app.executors import StderrOutput
+
+        self.commands.append(command)
+        stdout, stderr = await asyncio.wait_for(self._answer(command), timeout)
+        for line in stdout.splitlines():
+            await asyncio.sleep(0)
+            yield line
+        if stderr:
+            raise StderrOutput(stderr)
+
+    async def close(self):
+        pass
+
+    async def _answer(self, command: str):
+        await asyncio.sleep(self.delay)
+        return self.respond(command)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def bot():
+    """Бот без запуска Application: обработчики вызываются напрямую."""
+    from app.bot import VPNBot
+    from app.config import Config
+    from app.router_client import RouterLocalClient
+
+    config = Config()
+    return VPNBot(config, RouterLocalClient(config))
+
+
+@pytest.fixture
+def router_client(monkeypatch):
+    """Клиент роутера с настоящими планировщиком и повторами поверх FakeExecutor."""
+    from app.config import Config
+    from app.router_client import RouterLocalClient
+
+    monkeypatch.setenv('RETRY_DELAY', '0')
+    client = RouterLocalClient(Config())
+    client.executor = FakeExecutor()
+    return client
@@ -0,0 +1,72 @@
+import asyncio
+import re
+
+import pytest
+
+from app.batch import BATCH_MARKER
+from app.bot import VPNBot
+from app.config import Config
+from app.router_client import RouterResponse
+
+KVAS_CALL = re.compile(r"kvas (add|del) (\S+) -y")
+
+
+class FakeMessage:
+    def __init__(self):
+        self.texts = []
+
+    async def reply_text(self, text, **kwargs):
+        self.texts.append(text)
+        return self
+
+    async def edit_text(self, text, **kwargs):
+        self.texts.append(text)
+        return self
+
+
+@pytest.fixture
+def router_entries():
+    return {'*.example.com', 'listed.org'}
+
+
+@pytest.fixture
+def bulk_bot(router_client, router_entries):
+    def respond(command):
+        lines = []
+        for verb, domain in KVAS_CALL.findall(command):
+            if verb == 'add':
+                # КВАС добавляет домен вместе с поддоменами
+                router_entries.add('*.' + domain)
+                lines.append(f"{domain} {RouterResponse.ADD_SUCCESS}")
+            else:
+                router_entries.difference_update({domain, '*.' + domain})
+                lines.append(f"{domain} {RouterResponse.DELETE_SUCCESS}")
+            lines.append(f"{BATCH_MARKER} {domain}")
+        return '\n'.join(lines) + '\n', ''
+
+    router_client.executor.respond = respond
+    bot = VPNBot(Config(), router_client)
+    bot.loads = 0
+
+    async def load(progress=None):
+        bot.loads += 1
+        return set(router_entries)
+
+    bot.site_cache._loader = load
+    return bot
+
+
+def test_bulk_add_keeps_cache_in_sync(bulk_bot, router_client, router_entries):
+    domains = ['new.com', 'listed.org', 'cdn.example.com', 'bad_domain']
+
+    async def scenario():
+        await bulk_bot.site_cache.get()
+        await bulk_bot._apply_bulk(FakeMessage(), 'add', domains)
+        return set(await bulk_bot.site_cache.get())
+
+    cached = asyncio.run(scenario())
+    # Уже записанные и покрытые "*.родитель" домены на роутер не отправлялись
+    assert [KVAS_CALL.findall(command) for command in router_client.executor.commands] == [[('add', 'new.com')]]
+    # Кэш обновлен по результатам пакета, а не перечитан с роутера
+    assert bulk_bot.loads == 1
+    assert cached == router_entries == {'*.example.com', 'listed.org', '*.new.com'}
@@ -0,0 +1,219 @@
+import asyncio
+import re
+
+import pytest
+
+from app.batch import BATCH_MARKER
+from app.coalescer import MutationCoalescer
+from app.list_source import KvasListFile
+from app.router_client import RouterResponse
+
+KVAS_CALL = re.compile(r"kvas (add|del) (\S+) -y")
+
+
+class FakeKvas:
+    """Список разблокировки роутера: отвечает на пакетные `kvas add/del`."""
+
+    def __init__(self, listed=()):
+        self.listed = set(listed)
+        self.calls = []
+
+    def __call__(self, command):
+        output = []
+        for verb, domain in KVAS_CALL.findall(command):
+            self.calls.append((verb, domain))
+            if verb == 'add':
+                output.append(f"{domain} уже есть в списке" if domain in self.listed
+                              else f"{domain} {RouterResponse.ADD_SUCCESS}")
+                self.listed.add(domain)
+            else:
+                output.append(f"{domain} {RouterResponse.DELETE_SUCCESS}" if domain in self.listed
+                              else RouterResponse.DELETE_NOT_FOUND)
+                self.listed.discard(domain)
+            output.append(f"{BATCH_MARKER} {domain}")
+        return '\n'.join(output) + '\n', ''
+
+
+@pytest.fixture
+def kvas(router_client):
+    router = FakeKvas()
+    router_client.executor.respond = router
+    return router
+
+
+def make_coalescer(router_client, window=0.01, is_listed=None):
+    return MutationCoalescer(router_client, window=window, timeout=5, is_listed=is_listed)
+
+
+def test_window_batches_operations(router_client, kvas):
+    async def scenario():
+        coalescer = make_coalescer(router_client)
+        results = await asyncio.gather(
+            coalescer.submit('add', 'a.com'),
+            coalescer.submit('add', 'b.com'),
+            coalescer.submit('add', 'a.com'),
+        )
+        return coalescer, results
+
+    coalescer, results = asyncio.run(scenario())
+    assert RouterResponse.ADD_SUCCESS in results[0]
+    assert RouterResponse.ADD_SUCCESS in results[1]
+    assert 'уже' in results[2]
+    assert len(router_client.executor.commands) == 1
+    assert kvas.calls == [('add', 'a.com'), ('add', 'b.com')]
+    assert coalescer.stats()['batches'] == 1
+
+
+def test_add_then_delete_skips_router_when_state_known(router_client, kvas):
+    async def scenario():
+        coalescer = make_coalescer(router_client, is_listed=lambda domain: False)
+        return await asyncio.gather(coalescer.submit('add', 'a.com'), coalescer.submit('del', 'a.com'))
+
+    added, deleted = asyncio.run(scenario())
+    assert RouterResponse.ADD_SUCCESS in added
+    assert RouterResponse.DELETE_SUCCESS in deleted
+    assert router_client.executor.commands == []
+
+
+def test_operation_during_batch_uses_confirmed_state(router_client, kvas):
+    router_client.executor.delay = 0.05
+
+    async def scenario():
+        # Кэш устарел: по нему домена нет, хотя первый пакет его добавит
+        coalescer = make_coalescer(router_client, is_listed=lambda domain: False)
+        first = asyncio.ensure_future(coalescer.submit('add', 'a.com'))
+        await asyncio.sleep(0.02)
+        assert coalescer.pending_state('a.com') is True
+        assert coalescer.stats()['applying'] == 1
+        second = await coalescer.submit('add', 'a.com')
+        return await first, second
+
+    first, second = asyncio.run(scenario())
+    assert RouterResponse.ADD_SUCCESS in first
+    assert 'уже' in second
+    # Второе добавление решено по итогу первого пакета, без обращения к роутеру
+    assert kvas.calls == [('add', 'a.com')]
+
+
+def test_single_operation_is_not_resolved_from_cache(router_client, kvas):
+    kvas.listed.add('a.com')
+
+    async def scenario():
+        # Кэш ошибочно считает, что домена нет: одиночное удаление все равно идет на роутер
+        coalescer = make_coalescer(router_client, window=0, is_listed=lambda domain: False)
+        return await coalescer.submit('del', 'a.com')
+
+    assert RouterResponse.DELETE_SUCCESS in asyncio.run(scenario())
+    assert kvas.calls == [('del', 'a.com')]
+
+
+def test_router_error_reaches_every_waiter(router_client):
+    router_client.executor.respond = lambda command: ('', 'kvas: failed')
+    router_client.retry_policy.max_retries = 0
+
+    async def scenario():
+        coalescer = make_coalescer(router_client)
+        return await asyncio.gather(
+            coalescer.submit('add', 'a.com'), coalescer.submit('add', 'b.com'), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, Exception) for result in results)
+
+
+class FakeApply:
+    """Команда применения списка: считает циклы применения КВАС."""
+
+    def __init__(self, error=''):
+        self.error = error
+        self.cycles = 0
+
+    def __call__(self, command):
+        assert command == 'kvas ipset refill'
+        self.cycles += 1
+        return '', self.error
+
+
+@pytest.fixture
+def list_file(tmp_path):
+    path = tmp_path / 'hosts.list'
+    path.write_text("*.listed.com\nplain.org\n")
+    return KvasListFile(str(path))
+
+
+def file_coalescer(router_client, list_file):
+    return MutationCoalescer(
+        router_client, window=0.01, timeout=5, list_file=list_file, apply_command='kvas ipset refill'
+    )
+
+
+def test_burst_is_applied_in_one_cycle(router_client, list_file):
+    router_client.executor.respond = apply = FakeApply()
+
+    async def scenario():
+        coalescer = file_coalescer(router_client, list_file)
+        results = await asyncio.gather(
+            coalescer.submit('add', 'a.com'),
+            coalescer.submit('add', 'b.com'),
+            coalescer.submit('add', 'listed.com'),
+            coalescer.submit('del', 'plain.org'),
+            coalescer.submit('del', 'absent.org'),
+            coalescer.submit('add', 'c.com'),
+            coalescer.submit('del', 'c.com'),
+        )
+        return coalescer, results
+
+    coalescer, results = asyncio.run(scenario())
+    assert apply.cycles == 1
+    assert coalescer.list_applies == 1
+    assert RouterResponse.ADD_SUCCESS in results[0] and RouterResponse.ADD_SUCCESS in results[1]
+    assert 'уже' in results[2]
+    assert RouterResponse.DELETE_SUCCESS in results[3]
+    assert results[4] == RouterResponse.DELETE_NOT_FOUND
+    # Добавление и удаление c.com: каждый получает свой результат
+    assert RouterResponse.ADD_SUCCESS in results[5] and RouterResponse.DELETE_SUCCESS in results[6]
+    assert asyncio.run(list_file.read()) == {'*.listed.com', '*.a.com', '*.b.com'}
+
+
+def test_unchanged_list_is_not_applied(router_client, list_file):
+    router_client.executor.respond = apply = FakeApply()
+
+    async def scenario():
+        coalescer = file_coalescer(router_client, list_file)
+        return await asyncio.gather(coalescer.submit('add', 'listed.com'), coalescer.submit('del', 'absent.org'))
+
+    asyncio.run(scenario())
+    assert apply.cycles == 0
+
+
+def test_failed_apply_rolls_back_and_falls_back_to_kvas(router_client, list_file):
+    original = open(list_file.path, 'rb').read()
+    apply = FakeApply(error='Неизвестная команда')
+    kvas = FakeKvas()
+    router_client.executor.respond = lambda command: apply(command) if command.startswith('kvas ipset') else kvas(command)
+    router_client.retry_policy.max_retries = 0
+
+    async def scenario():
+        coalescer = file_coalescer(router_client, list_file)
+        return await coalescer.submit('add', 'a.com')
+
+    assert RouterResponse.ADD_SUCCESS in asyncio.run(scenario())
+    assert open(list_file.path, 'rb').read() == original
+    assert kvas.calls == [('add', 'a.com')]
+
+
+def test_cancelled_flush_releases_waiters(router_client, kvas):
+    router_client.executor.delay = 10
+
+    async def scenario():
+        coalescer = make_coalescer(router_client, window=0)
+        waiter = asyncio.ensure_future(coalescer.submit('add', 'a.com'))
+        await asyncio.sleep(0.05)
+        for task in list(coalescer._tasks):
+            task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(waiter, 1)
+        return coalescer.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['pending'] == 0 and stats['applying'] == 0
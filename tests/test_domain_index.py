@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from app.domain_index import DomainIndex
+
+LABELS = ('goo', 'gle', 'you', 'tube', 'ya', 'ndex', 'vk', 'mail', 'cdn', 'img', 'api', 'x')
+ZONES = ('com', 'ru', 'org', 'net', 'io')
+
+
+def make_entries(rng: random.Random, count: int):
+    entries = set()
+    while len(entries) < count:
+        name = ''.join(rng.choice(LABELS) for _ in range(rng.randint(1, 3)))
+        entry = f"{name}{rng.randint(0, 99)}.{rng.choice(ZONES)}"
+        if rng.random() < 0.3:
+            entry = '*.' + entry
+        entries.add(entry)
+    return entries
+
+
+def brute_force(entries, query: str):
+    """Поиск перебором по описанию DomainIndex.search."""
+    query = query.strip().lower()
+
+    def bare(entry):
+        return entry[2:] if entry.startswith('*.') else entry
+
+    if query.startswith('*'):
+        match = lambda domain: domain.endswith(query[1:])  # noqa: E731
+    elif query.endswith('*'):
+        match = lambda domain: domain.startswith(query[:-1])  # noqa: E731
+    else:
+        match = lambda domain: bool(query) and query in domain  # noqa: E731
+    return sorted(entry for entry in entries if match(bare(entry)))
+
+
+def check(index: DomainIndex, entries, query: str):
+    found, total = index.search(query, limit=len(entries) + 1)
+    expected = brute_force(entries, query)
+    assert sorted(found) == expected, query
+    assert total == len(expected), query
+    # Результаты упорядочены по домену
+    bare = [entry[2:] if entry.startswith('*.') else entry for entry in found]
+    assert bare == sorted(bare), query
+
+
+def make_queries(rng: random.Random, entries):
+    queries = ['go', 'o', 'tube', 'goo*', '*.ru', '*ru', '*', 'cdn1', 'nothing-here', 'YOU']
+    for entry in rng.sample(sorted(entries), 30):
+        bare = entry[2:] if entry.startswith('*.') else entry
+        start = rng.randint(0, len(bare) - 1)
+        part = bare[start:start + rng.randint(1, 6)]
+        queries += [part, part + '*', '*' + bare[-rng.randint(1, 6):]]
+    return queries
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_search_matches_brute_force(seed):
+    rng = random.Random(seed)
+    entries = make_entries(rng, 3000)
+    index = DomainIndex(entries)
+    for query in make_queries(rng, entries):
+        check(index, entries, query)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_updates_match_brute_force(seed):
+    rng = random.Random(seed)
+    entries = make_entries(rng, 1000)
+    index = DomainIndex(entries)
+    pool = sorted(make_entries(rng, 1000) | entries)
+    # Хватает удалений, чтобы индекс триграмм пересобрался
+    for _ in range(3000):
+        entry = rng.choice(pool)
+        if entry in entries:
+            index.remove(entry)
+            entries.discard(entry)
+        else:
+            index.add(entry)
+            entries.add(entry)
+    for query in make_queries(rng, entries):
+        check(index, entries, query)
+
+
+def test_both_forms_of_one_domain():
+    index = DomainIndex(['youtube.com', '*.youtube.com'])
+    assert sorted(index.search('tube', 10)[0]) == ['*.youtube.com', 'youtube.com']
+    index.remove('youtube.com')
+    assert index.search('tube', 10) == (['*.youtube.com'], 1)
+    index.remove('*.youtube.com')
+    assert index.search('tube', 10) == ([], 0)
+    assert len(index) == 0
+
+
+def test_limit_keeps_total():
+    index = DomainIndex(f"site{number}.com" for number in range(100))
+    found, total = index.search('site', 10)
+    assert len(found) == 10
+    assert total == 100
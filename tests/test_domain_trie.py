@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from app.domain_trie import DomainTrie
+
+LABELS = ('a', 'b', 'cdn', 'com', 'org')
+
+
+def reference_lookup(entries, domain):
+    """Проверка перебором: точное совпадение или самая короткая покрывающая "*.родитель"."""
+    if f"*.{domain}" in entries:
+        return 'exact', f"*.{domain}"
+    if domain in entries:
+        return 'exact', domain
+    labels = domain.split('.')
+    for start in range(len(labels) - 1, 0, -1):
+        parent = '.'.join(labels[start:])
+        if f"*.{parent}" in entries:
+            return 'covered', f"*.{parent}"
+    return None, None
+
+
+def random_domain(rng):
+    return '.'.join(rng.choice(LABELS) for _ in range(rng.randint(1, 4)))
+
+
+def random_entry(rng):
+    domain = random_domain(rng)
+    return f"*.{domain}" if rng.random() < 0.5 else domain
+
+
+def test_lookup_examples():
+    trie = DomainTrie(['*.youtube.com', 'google.com', '*.img.google.com'])
+    assert trie.lookup('youtube.com') == ('exact', '*.youtube.com')
+    assert trie.lookup('i.ytimg.youtube.com') == ('covered', '*.youtube.com')
+    assert trie.lookup('google.com') == ('exact', 'google.com')
+    assert trie.lookup('mail.google.com') == (None, None)
+    assert trie.lookup('a.img.google.com') == ('covered', '*.img.google.com')
+    assert trie.lookup('com') == (None, None)
+    assert trie.lookup('YouTube.COM') == ('exact', '*.youtube.com')
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    trie = DomainTrie()
+    entries = set()
+    for step in range(3000):
+        entry = random_entry(rng)
+        if rng.random() < 0.6:
+            trie.add(entry)
+            entries.add(entry)
+        else:
+            trie.remove(entry)
+            entries.discard(entry)
+        assert len(trie) == len(entries)
+        if step % 10 == 0:
+            domain = random_domain(rng)
+            assert trie.lookup(domain) == reference_lookup(entries, domain), (domain, sorted(entries))
+
+    for _ in range(500):
+        domain = random_domain(rng)
+        assert trie.lookup(domain) == reference_lookup(entries, domain)
+    # После удалений не остается лишних узлов: дерево как построенное заново
+    assert trie._root == DomainTrie(entries)._root
+
+
+def test_remove_cleans_up_nodes():
+    trie = DomainTrie(['*.a.b.example.com', 'a.b.example.com', 'example.com'])
+    trie.remove('a.b.example.com')
+    assert trie.lookup('a.b.example.com') == ('exact', '*.a.b.example.com')
+    trie.remove('*.a.b.example.com')
+    assert trie._root == {'com': {'example': 2}}
+    trie.remove('example.com')
+    trie.remove('example.com')
+    trie.remove('missing.org')
+    assert trie._root == {}
+    assert len(trie) == 0
+
+
+def test_duplicates_are_counted_once():
+    trie = DomainTrie(['a.com', 'a.com', '*.a.com'])
+    assert len(trie) == 2
+    trie.remove('a.com')
+    assert trie.lookup('a.com') == ('exact', '*.a.com')
+    assert len(trie) == 1
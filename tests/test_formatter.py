@@ -0,0 +1,74 @@
+"""
+Сравнение OutputFormatter с эталонами.
+
+Файлы *.expected.txt в fixtures/formatter получены исходной (до переписывания
+в один проход) реализацией clean_terminal_output из первой версии репозитория
+на входах *.txt из того же каталога. Файлы captured_* - сохраненный вывод
+команд (`python scripts/formatter_bench.py --add-fixture NAME --input FILE`);
+так же добавляется вывод `kvas list` с роутера.
+"""
+import glob
+import importlib.util
+import os
+
+import pytest
+
+from app.formatter import OutputFormatter
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'formatter')
+
+CASES = sorted(
+    os.path.basename(path)[:-len('.txt')]
+    for path in glob.glob(os.path.join(FIXTURES, '*.txt'))
+    if not path.endswith('.expected.txt')
+)
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_bench():
+    spec = importlib.util.spec_from_file_location(
+        'formatter_bench', os.path.join(ROOT, 'scripts', 'formatter_bench.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def read(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding='utf-8', newline='') as fixture:
+        return fixture.read()
+
+
+def test_corpus_is_present():
+    assert len(CASES) >= 10
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_matches_baseline(case):
+    assert OutputFormatter.clean_terminal_output(read(f"{case}.txt")) == read(f"{case}.expected.txt")
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_streamed_lines_match_baseline(case):
+    lines = iter(read(f"{case}.txt").split('\n'))
+    assert OutputFormatter.clean_terminal_output(lines) == read(f"{case}.expected.txt")
+
+
+def test_benchmark_baseline_matches_corpus():
+    baseline = load_bench().baseline_clean_terminal_output
+    for case in CASES:
+        assert baseline(read(f"{case}.txt")) == read(f"{case}.expected.txt"), case
+
+
+def test_benchmark_paths_agree(capsys):
+    assert load_bench().main(['--sizes', '50,500', '--repeat', '1']) == 0
+    assert 'РАСХОЖДЕНИЕ' not in capsys.readouterr().out
+
+
+def test_extract_entry():
+    assert OutputFormatter.extract_entry("  3  \x1b[33m*.YouTube.com\x1b[0m\x1b[K") == '*.youtube.com'
+    assert OutputFormatter.extract_entry("12) example.org") == 'example.org'
+    assert OutputFormatter.extract_entry("Список разблокировки содержит 12 записей:") is None
+    assert OutputFormatter.extract_entry("-----") is None
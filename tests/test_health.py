@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.health import CPU_COUNT_COMMAND, HealthSampler, parse_health_output
+
+HEALTH_OUTPUT = (
+    "12345.67 54321.00\n"
+    "{load} 0.50 0.40 1/120 4567\n"
+    "MemTotal:         255000 kB\n"
+    "MemFree:           20000 kB\n"
+    "MemAvailable:     120000 kB\n"
+    "vpn=up\n"
+)
+
+
+class FakeClient:
+    """Клиент роутера: ответы по командам, запросы записываются."""
+
+    def __init__(self, cpu_count='4', load='1.00'):
+        self.cpu_count = cpu_count
+        self.load = load
+        self.commands = []
+
+    async def execute_command(self, command, timeout=30):
+        self.commands.append(command)
+        if command == CPU_COUNT_COMMAND:
+            if isinstance(self.cpu_count, Exception):
+                raise self.cpu_count
+            return self.cpu_count
+        return HEALTH_OUTPUT.format(load=self.load)
+
+
+def make_sampler(client, clock, **kwargs):
+    return HealthSampler(client, interval=30, max_interval=240, history=10, clock=clock, **kwargs)
+
+
+def test_parse_health_output():
+    sample = parse_health_output(HEALTH_OUTPUT.format(load='1.25'), taken_at=100, duration=0.5)
+    assert sample.uptime == pytest.approx(12345.67)
+    assert sample.load == (1.25, 0.5, 0.4)
+    assert sample.mem_total == 255000
+    assert sample.mem_available == 120000
+    assert sample.vpn_up is True
+
+
+def test_cpu_count_is_requested_once(clock):
+    client = FakeClient(cpu_count='4\n')
+    sampler = make_sampler(client, clock, busy_load=1.0)
+
+    async def scenario():
+        for _ in range(3):
+            await sampler.sample()
+
+    asyncio.run(scenario())
+    assert client.commands.count(CPU_COUNT_COMMAND) == 1
+    assert sampler.cpu_count == 4
+    assert sampler.busy_load == 4.0
+    assert len(sampler.samples) == 3
+
+
+def test_cpu_count_is_retried_after_failure(clock):
+    client = FakeClient(cpu_count=RuntimeError('router busy'))
+    sampler = make_sampler(client, clock)
+
+    async def scenario():
+        first = await sampler.sample()
+        client.cpu_count = '2'
+        await sampler.sample()
+        return first
+
+    # Замер выполняется и без числа ядер
+    assert asyncio.run(scenario()) is not None
+    assert client.commands.count(CPU_COUNT_COMMAND) == 2
+    assert sampler.cpu_count == 2
+
+
+def test_configured_cpu_count_is_not_requested(clock):
+    client = FakeClient()
+    sampler = make_sampler(client, clock, cpu_count=2)
+    asyncio.run(sampler.sample())
+    assert CPU_COUNT_COMMAND not in client.commands
+
+
+def test_interval_backs_off_under_per_cpu_load(clock):
+    client = FakeClient(cpu_count='4', load='3.00')
+    sampler = make_sampler(client, clock, busy_load=1.0)
+
+    async def scenario():
+        return sampler.next_interval(await sampler.sample())
+
+    # Нагрузка 3.0 на четырех ядрах - не занятость
+    assert asyncio.run(scenario()) == 30
+    client.load = '4.50'
+    assert asyncio.run(scenario()) == 60
+    assert sampler.next_interval(None) == 120
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import shutil
+
+import pytest
+
+from app.formatter import OutputFormatter
+from app.list_source import KvasListFile
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'kvas')
+
+EXPECTED = frozenset({'youtube.com', '*.googlevideo.com', 'instagram.com', 'facebook.com', '*.ytimg.com'})
+
+
+@pytest.fixture
+def list_path(tmp_path):
+    path = tmp_path / 'hosts.list'
+    shutil.copy(os.path.join(FIXTURES, 'hosts.list'), path)
+    return str(path)
+
+
+def test_parse_fixture(list_path):
+    assert asyncio.run(KvasListFile(list_path).read()) == EXPECTED
+
+
+def test_file_matches_kvas_list_output():
+    with open(os.path.join(FIXTURES, 'kvas_list_output.txt'), encoding='utf-8') as output:
+        from_output = {entry for entry in map(OutputFormatter.extract_entry, output) if entry}
+    with open(os.path.join(FIXTURES, 'hosts.list'), encoding='utf-8') as list_file:
+        assert frozenset(KvasListFile.parse(list_file)) == from_output == EXPECTED
+
+
+def test_unchanged_file_is_not_reparsed(list_path):
+    source = KvasListFile(list_path)
+    first = asyncio.run(source.read())
+    second = asyncio.run(source.read())
+    assert second is first
+    assert source.stats() == {'reads': 1, 'unchanged': 1, 'missing': 0}
+
+
+def test_rewritten_file_is_reparsed(list_path):
+    source = KvasListFile(list_path)
+    asyncio.run(source.read())
+    # КВАС перезаписывает файл целиком: меняются размер и inode
+    replacement = list_path + '.new'
+    with open(replacement, 'w', encoding='utf-8') as list_file:
+        list_file.write('youtube.com\nnew-site.org\n')
+    os.replace(replacement, list_path)
+
+    assert asyncio.run(source.read()) == {'youtube.com', 'new-site.org'}
+    assert source.reads == 2
+
+
+def test_forget_forces_reparse(list_path):
+    source = KvasListFile(list_path)
+    asyncio.run(source.read())
+    source.forget()
+    asyncio.run(source.read())
+    assert source.reads == 2
+
+
+def test_missing_file(tmp_path):
+    source = KvasListFile(str(tmp_path / 'absent.list'))
+    assert asyncio.run(source.read()) is None
+    assert source.missing == 1
+
+
+def test_apply_keeps_other_lines(tmp_path):
+    path = tmp_path / 'hosts.list'
+    path.write_bytes(b"# \xd1\x81\xd0\xbf\xd0\xb8\xd1\x81\xd0\xbe\xd0\xba\n*.old.com\nold.com\nkeep.org\n")
+    source = KvasListFile(str(path))
+
+    changed, previous = asyncio.run(source.apply({'old.com': 'del', 'keep.org': 'add', 'new.net': 'add'}))
+    assert changed == {'old.com': True, 'keep.org': False, 'new.net': True}
+    assert path.read_bytes() == "# список\nkeep.org\n*.new.net\n".encode()
+
+    asyncio.run(source.restore(previous))
+    assert path.read_bytes() == previous
+    assert asyncio.run(source.read()) == {'*.old.com', 'old.com', 'keep.org'}
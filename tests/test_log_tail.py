@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from app.log_tail import BLOCK_SIZE, MAX_LINE_SIZE, MAX_PENDING_LINES, tail_records
+
+LOG_SIZE = 500 * 1024 * 1024
+
+
+def record(index: int, level: str = 'INFO', logger: str = 'app.bot') -> str:
+    return f"2025-01-01 12:00:{index % 60:02d},000 - {logger} - {level} - message {index}\n"
+
+
+@pytest.fixture
+def big_log(tmp_path):
+    """Журнал на 500 МБ: разреженный файл, записи - только в конце."""
+    path = tmp_path / 'router_bot.log'
+    with open(path, 'wb') as log:
+        log.truncate(LOG_SIZE)
+        log.seek(LOG_SIZE)
+        log.write(''.join(record(index) for index in range(1000)).encode())
+        log.write(record(1000, 'ERROR').encode())
+        log.write(b"Traceback (most recent call last):\nasyncio.exceptions.TimeoutError\n")
+        log.write(''.join(record(index) for index in range(1001, 1100)).encode())
+    return str(path)
+
+
+def test_tail_of_big_log_reads_only_the_end(big_log):
+    lines, read = tail_records(big_log, 20)
+    assert lines == [record(index).rstrip('\n') for index in range(1080, 1100)]
+    assert read <= 2 * BLOCK_SIZE
+
+
+def test_filtered_tail_keeps_traceback(big_log):
+    lines, read = tail_records(big_log, 1, 'error')
+    assert lines == [
+        record(1000, 'ERROR').rstrip('\n'),
+        'Traceback (most recent call last):',
+        'asyncio.exceptions.TimeoutError',
+    ]
+    assert read <= 2 * BLOCK_SIZE
+
+
+def test_rare_match_stops_at_max_bytes(big_log):
+    max_bytes = 4 * 1024 * 1024
+    lines, read = tail_records(big_log, 10, 'critical', max_bytes=max_bytes)
+    assert lines == []
+    # Предел проверяется на каждом блоке, даже посреди строки без перевода
+    assert max_bytes <= read < max_bytes + BLOCK_SIZE
+
+
+def test_rotated_files_continue_the_tail(tmp_path):
+    path = tmp_path / 'router_bot.log'
+    (tmp_path / 'router_bot.log.1').write_text(''.join(record(index) for index in range(10)))
+    path.write_text(''.join(record(index) for index in range(10, 15)))
+
+    lines, _ = tail_records(str(path), 8)
+    assert lines == [record(index).rstrip('\n') for index in range(7, 15)]
+
+
+def test_continuation_lines_are_capped(tmp_path):
+    path = tmp_path / 'router_bot.log'
+    with open(path, 'w') as log:
+        log.write(record(0, 'ERROR'))
+        log.write(''.join(f"  frame {index}\n" for index in range(MAX_PENDING_LINES * 3)))
+        log.write('x' * (MAX_LINE_SIZE * 4) + '\n')
+        log.write(record(1))
+
+    lines, _ = tail_records(str(path), 1, 'error')
+    assert lines[0] == record(0, 'ERROR').rstrip('\n')
+    assert len(lines) == MAX_PENDING_LINES
+    # Сохраняется начало трассировки - строки, ближайшие к заголовку записи
+    assert lines[1] == '  frame 0'
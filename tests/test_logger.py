@@ -0,0 +1,103 @@
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+from app.logger import DroppingQueueHandler, SampleFilter, _build_handlers
+
+
+class SlowHandler(logging.Handler):
+    """Приемник журнала с задержкой на каждую запись (медленная флеш-память)."""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+        self.records = []
+        self.opened = threading.Event()
+
+    def emit(self, record: logging.LogRecord):
+        self.opened.wait()
+        time.sleep(self.delay)
+        self.records.append(record.getMessage())
+
+
+def make_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_slow_sink_does_not_block_caller():
+    sink = SlowHandler(delay=0.001)
+    queue_handler = DroppingQueueHandler(queue.Queue(100))
+    listener = logging.handlers.QueueListener(queue_handler.queue, sink)
+    logger = make_logger('tests.slow_sink', queue_handler)
+    listener.start()
+    try:
+        started = time.perf_counter()
+        for index in range(1000):
+            logger.info("record %d", index)
+        elapsed = time.perf_counter() - started
+    finally:
+        sink.opened.set()
+        # Маркер остановки тоже ставится в очередь: ждем, пока в ней появится место
+        while queue_handler.queue.full():
+            time.sleep(0.01)
+        listener.stop()
+
+    # Приемник заблокирован: без очереди 1000 записей ждали бы его
+    assert elapsed < 0.5
+    assert queue_handler.dropped > 0
+    assert len(sink.records) + queue_handler.dropped == 1000
+    # Записанное идет в исходном порядке
+    written = [int(message.split()[1]) for message in sink.records]
+    assert written == sorted(written)
+
+
+def test_nothing_dropped_when_queue_keeps_up():
+    sink = SlowHandler(delay=0)
+    sink.opened.set()
+    queue_handler = DroppingQueueHandler(queue.Queue(10000))
+    listener = logging.handlers.QueueListener(queue_handler.queue, sink)
+    logger = make_logger('tests.fast_sink', queue_handler)
+    listener.start()
+    try:
+        for index in range(1000):
+            logger.info("record %d", index)
+    finally:
+        listener.stop()
+
+    assert queue_handler.dropped == 0
+    assert len(sink.records) == 1000
+
+
+def test_sample_filter_keeps_warnings():
+    sample = SampleFilter(10)
+    levels = [logging.DEBUG] * 100 + [logging.WARNING] * 5
+    records = [logging.LogRecord('app.access', level, __file__, 0, 'x', None, None) for level in levels]
+    kept = [record.levelno for record in records if sample.filter(record)]
+    assert kept.count(logging.DEBUG) == 10
+    assert kept.count(logging.WARNING) == 5
+
+
+def test_rotation_stays_within_budget(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('LOG_MAX_BYTES', str(64 * 1024))
+    monkeypatch.setenv('LOG_BACKUP_COUNT', '2')
+    handlers = _build_handlers('DEV')
+    file_handler = next(h for h in handlers if isinstance(h, logging.handlers.RotatingFileHandler))
+    logger = make_logger('tests.rotation', file_handler)
+    try:
+        for index in range(5000):
+            logger.info("record %d %s", index, 'x' * 50)
+    finally:
+        file_handler.close()
+
+    files = sorted(os.listdir(tmp_path))
+    assert files == ['router_bot.log', 'router_bot.log.1', 'router_bot.log.2']
+    # Каждый файл может превысить свою долю не более чем на одну запись
+    assert sum(os.path.getsize(tmp_path / name) for name in files) <= 64 * 1024 + 3 * 200
@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+import app.memory
+from app.memory import MemoryMonitor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Допустимый рост RSS между коротким прогоном и полным, МБ
+RSS_GROWTH_LIMIT_MB = 8
+
+# Абсолютный предел установившегося RSS после полного прогона, МБ
+RSS_LIMIT_MB = 96
+
+# Обновлений в полном прогоне не меньше
+FULL_RUN_UPDATES = 10000
+
+
+def run_loadtest(actions: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'scripts', 'loadtest.py'),
+         '--users', '10', '--actions', str(actions), '--kvas-delay', '0',
+         '--max-rss', str(RSS_LIMIT_MB), '--json'],
+        cwd=ROOT, capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout)
+
+
+def test_rss_stays_bounded_over_10k_updates():
+    short = run_loadtest(40)
+    full = run_loadtest(1000)
+
+    assert short['errors'] == full['errors'] == 0
+    assert full['updates'] >= FULL_RUN_UPDATES
+    # Установившийся RSS после полного прогона - в абсолютных пределах
+    assert full['steady_rss_kb'] < RSS_LIMIT_MB * 1024
+    growth_mb = (full['steady_rss_kb'] - short['steady_rss_kb']) / 1024
+    assert growth_mb < RSS_GROWTH_LIMIT_MB
+
+
+def test_trimmers_run_until_within_budget(monkeypatch, clock):
+    readings = iter([(200, 200), (150, 200), (90, 200)])
+    monkeypatch.setattr(app.memory, 'read_rss', lambda: next(readings))
+    monkeypatch.setattr(app.memory, 'release_memory', lambda: None)
+
+    called = []
+    monitor = MemoryMonitor(interval=60, budget_kb=100, clock=clock)
+    monitor.add_trimmer('pages', lambda: called.append('pages'))
+    monitor.add_trimmer('broken', lambda: 1 / 0)
+    monitor.add_trimmer('index', lambda: called.append('index'))
+    monitor.add_trimmer('cache', lambda: called.append('cache'))
+
+    assert monitor.check() == 90
+    assert called == ['pages', 'index']
+    assert monitor.last_trim == (clock.now, ['pages', 'index'])
+    assert monitor.trims == 1
+
+
+def test_nothing_trimmed_within_budget(monkeypatch):
+    monkeypatch.setattr(app.memory, 'read_rss', lambda: (50, 60))
+    monitor = MemoryMonitor(interval=60, budget_kb=100)
+    monitor.add_trimmer('cache', lambda: 1 / 0)
+
+    assert monitor.check() == 50
+    assert monitor.trims == 0
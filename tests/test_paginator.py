@@ -0,0 +1,58 @@
+import html
+
+from app.paginator import TELEGRAM_MESSAGE_LIMIT, ListPaginator
+
+ENTRIES = 20000
+
+
+def make_entries(count: int):
+    return tuple(sorted(f"*.site{index}.example-domain.com" for index in range(count)))
+
+
+def test_every_page_fits_message_limit():
+    entries = make_entries(ENTRIES)
+    paginator = ListPaginator(entries, max_page_size=50)
+
+    assert paginator.page_count == -(-ENTRIES // paginator.page_size)
+    for page in range(paginator.page_count):
+        assert len(paginator.render(page)) <= TELEGRAM_MESSAGE_LIMIT
+
+
+def test_pages_cover_list_once_in_order():
+    entries = make_entries(ENTRIES)
+    paginator = ListPaginator(entries, max_page_size=50)
+
+    shown = []
+    for page in range(paginator.page_count):
+        shown.extend(paginator.render(page).split('\n\n', 1)[1].split('\n'))
+    assert shown == list(entries)
+
+
+def test_long_entries_shrink_page_size():
+    entries = tuple(f"{index:05d}" + 'x' * 500 + '<&>' for index in range(100))
+    paginator = ListPaginator(entries, max_page_size=50)
+
+    assert paginator.page_size < 50
+    for page in range(paginator.page_count):
+        text = paginator.render(page)
+        assert len(text) <= TELEGRAM_MESSAGE_LIMIT
+        assert html.escape('<&>') in text
+
+
+def test_page_number_is_clamped():
+    paginator = ListPaginator(make_entries(120), max_page_size=50)
+
+    assert paginator.render(-5) == paginator.render(0)
+    assert paginator.render(99) == paginator.render(2)
+
+
+def test_keyboard_navigation():
+    paginator = ListPaginator(make_entries(120), max_page_size=50)
+
+    first = [button.callback_data for button in paginator.keyboard(0).inline_keyboard[0]]
+    middle = [button.callback_data for button in paginator.keyboard(1).inline_keyboard[0]]
+    last = [button.callback_data for button in paginator.keyboard(2).inline_keyboard[0]]
+    assert first == ['sites:noop', 'sites:1']
+    assert middle == ['sites:0', 'sites:noop', 'sites:2']
+    assert last == ['sites:1', 'sites:noop']
+    assert ListPaginator(make_entries(10), max_page_size=50).keyboard(0) is None
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
+
+from app.progress import ProgressReporter
+
+
+class FakeMessage:
+    """Статусное сообщение: правки записываются, ошибки берутся из очереди."""
+
+    def __init__(self, text='Выполняется...'):
+        self.text = text
+        self.edits = []
+        self.errors = []
+
+    async def edit_text(self, text, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.text = text
+        self.edits.append(text)
+
+
+@pytest.fixture
+def message():
+    return FakeMessage()
+
+
+def test_updates_are_throttled(message, clock):
+    reporter = ProgressReporter(message, min_interval=2, clock=clock)
+
+    async def scenario():
+        await reporter.update('1')
+        clock.advance(2)
+        await reporter.update('2')
+        clock.advance(1)
+        await reporter.update('3')
+        await reporter.finish('готово')
+
+    asyncio.run(scenario())
+    assert message.edits == ['2', 'готово']
+
+
+@pytest.mark.parametrize('error', [TimedOut(), NetworkError('connection reset'), BadRequest('Message is not modified')])
+def test_edit_errors_do_not_abort(message, clock, error):
+    reporter = ProgressReporter(message, min_interval=0, clock=clock)
+    message.errors.append(error)
+
+    async def scenario():
+        failed = await reporter.finish('1')
+        return failed, await reporter.finish('2')
+
+    assert asyncio.run(scenario()) == (False, True)
+    assert message.edits == ['2']
+
+
+def test_retry_after_postpones_updates(message, clock):
+    reporter = ProgressReporter(message, min_interval=1, clock=clock)
+    message.errors.append(RetryAfter(10))
+
+    async def scenario():
+        clock.advance(1)
+        await reporter.update('1')
+        clock.advance(5)
+        await reporter.update('2')
+        clock.advance(6)
+        await reporter.update('3')
+
+    asyncio.run(scenario())
+    assert message.edits == ['3']
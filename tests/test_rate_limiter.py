@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.rate_limiter import TokenBucketLimiter
+
+
+@pytest.fixture
+def limiter(clock):
+    # 6 в минуту - один токен в 10 секунд
+    return TokenBucketLimiter(6, burst=3, clock=clock)
+
+
+def test_burst_then_reject(limiter):
+    assert [limiter.allow('user') for _ in range(4)] == [True, True, True, False]
+
+
+def test_refill_over_time(limiter, clock):
+    for _ in range(3):
+        limiter.allow('user')
+    clock.advance(9.9)
+    assert not limiter.allow('user')
+    clock.advance(0.1)
+    assert limiter.allow('user')
+    assert not limiter.allow('user')
+
+
+def test_refill_is_capped_by_burst(limiter, clock):
+    limiter.allow('user')
+    clock.advance(3600)
+    assert [limiter.allow('user') for _ in range(4)] == [True, True, True, False]
+
+
+def test_retry_after(limiter, clock):
+    assert limiter.retry_after('user') == 0
+    for _ in range(3):
+        limiter.allow('user')
+    assert limiter.retry_after('user') == pytest.approx(10)
+    clock.advance(4)
+    assert limiter.retry_after('user') == pytest.approx(6)
+    assert limiter.retry_after('user', cost=2) == pytest.approx(16)
+
+
+def test_users_are_independent(limiter):
+    for _ in range(3):
+        limiter.allow('first')
+    assert not limiter.allow('first')
+    assert limiter.allow('second')
+
+
+def test_full_buckets_are_forgotten(limiter, clock):
+    for user in range(100):
+        limiter.allow(user)
+    assert len(limiter) == 100
+    # За 30 секунд ведро наполняется полностью
+    clock.advance(30)
+    limiter.allow('other')
+    assert len(limiter) == 1
+
+
+def test_rejected_request_costs_nothing(limiter, clock):
+    for _ in range(3):
+        limiter.allow('user')
+    for _ in range(10):
+        assert not limiter.allow('user')
+    clock.advance(10)
+    assert limiter.allow('user')
+
+
+def make_update(text=None, data=None, document=None):
+    message = None if text is None and document is None else SimpleNamespace(text=text, document=document)
+    query = None if data is None else SimpleNamespace(data=data)
+    return SimpleNamespace(message=message, callback_query=query, effective_user=SimpleNamespace(id=1))
+
+
+LIST_READS = [make_update('/find example'), make_update('/sync'), make_update(data='sites:3'), make_update(data='find:1')]
+
+
+@pytest.mark.parametrize('update', LIST_READS)
+def test_list_reads_are_costly_while_cache_is_stale(bot, update):
+    assert not bot.site_cache.is_fresh
+    assert bot._request_category(update) == 'costly'
+
+
+@pytest.mark.parametrize('update', LIST_READS)
+def test_list_reads_are_cheap_from_fresh_cache(bot, update):
+    bot.site_cache._entries = ('example.com',)
+    bot.site_cache._loaded_at = bot.site_cache._clock()
+    assert bot.site_cache.is_fresh
+    assert bot._request_category(update) == 'cheap'
+
+
+def test_request_categories(bot):
+    assert bot._request_category(make_update('📜 Список сайтов')) == 'costly'
+    assert bot._request_category(make_update(document=object())) == 'costly'
+    assert bot._request_category(make_update(data='sync:apply')) == 'costly'
+    assert bot._request_category(make_update(data='sync:cancel')) == 'cheap'
+    assert bot._request_category(make_update('/start')) == 'cheap'
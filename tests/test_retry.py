@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.retry import CircuitBreaker, CircuitOpenError, CommandStderrError, RetryPolicy
+from app.scheduler import SchedulerQueueFull
+
+
+async def no_sleep(delay):
+    pass
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=clock)
+
+
+def test_breaker_opens_after_consecutive_timeouts(breaker, clock):
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_timeout()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.advance(60)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_local_errors_leave_breaker_alone(breaker):
+    policy = RetryPolicy(max_retries=3, base_delay=0, max_delay=0, breaker=breaker, sleep=no_sleep)
+    breaker.record_timeout()
+    breaker.record_timeout()
+
+    async def scenario():
+        for error in (SchedulerQueueFull('full'), OSError('fork failed')):
+            assert not await policy.after_failure('kvas add a.com', error, 0)
+
+    asyncio.run(scenario())
+    # Локальные ошибки не сбросили счетчик таймаутов
+    assert breaker.failures == 2
+    asyncio.run(policy.after_failure('kvas list', CommandStderrError('error'), 3))
+    assert breaker.failures == 0
+
+
+def test_coalesced_timeout_is_counted_once(router_client):
+    router_client.executor.delay = 10
+    router_client.retry_policy.max_retries = 0
+
+    async def scenario():
+        return await asyncio.gather(
+            *(router_client.execute_command('kvas list', timeout=0.05) for _ in range(5)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+    assert all(type(result).__name__ == 'CommandTimeoutError' for result in results)
+    assert router_client.executor.commands == ['kvas list']
+    assert router_client.retry_policy.breaker.failures == 1
+
+
+def test_coalesced_retry_runs_once_for_all_waiters(router_client):
+    answers = iter([('', 'temporary error'), ('ok\n', '')])
+    router_client.executor.respond = lambda command: next(answers)
+
+    async def scenario():
+        return await asyncio.gather(*(router_client.execute_command('kvas list') for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ['ok'] * 5
+    assert router_client.executor.commands == ['kvas list', 'kvas list']
+    assert router_client.retry_policy.retries == 1
+
+
+def test_reboot_is_never_retried(router_client):
+    router_client.executor.respond = lambda command: ('', 'error')
+
+    with pytest.raises(CommandStderrError):
+        asyncio.run(router_client.execute_command('reboot'))
+    assert router_client.executor.commands == ['reboot']
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.retry import CommandStderrError
+from app.scheduler import CommandScheduler, SchedulerQueueFull
+
+LIST_OUTPUT = ''.join(f"*.site{index}.com\n" for index in range(50))
+
+
+async def read_all(client, limit=None):
+    lines = []
+    async for line in client.stream_command('kvas list'):
+        lines.append(line)
+        if limit is not None and len(lines) >= limit:
+            break
+    return lines
+
+
+def test_concurrent_streams_share_one_command(router_client):
+    router_client.executor.respond = lambda command: (LIST_OUTPUT, '')
+    router_client.executor.delay = 0.01
+
+    async def scenario():
+        return await asyncio.gather(*(read_all(router_client) for _ in range(4)))
+
+    results = asyncio.run(scenario())
+    assert all(lines == LIST_OUTPUT.split() for lines in results)
+    assert router_client.executor.commands == ['kvas list']
+    stats = router_client.scheduler.stats()
+    assert stats['executed'] == 1
+    assert stats['coalesced'] == 3
+
+
+def test_early_exit_does_not_cut_other_readers(router_client):
+    router_client.executor.respond = lambda command: (LIST_OUTPUT, '')
+    router_client.executor.delay = 0.01
+
+    async def scenario():
+        return await asyncio.gather(read_all(router_client, limit=2), read_all(router_client))
+
+    short, full = asyncio.run(scenario())
+    assert short == LIST_OUTPUT.split()[:2]
+    assert full == LIST_OUTPUT.split()
+    assert router_client.executor.commands == ['kvas list']
+
+
+def test_stream_error_reaches_every_reader(router_client):
+    router_client.executor.respond = lambda command: ('', 'kvas: command failed')
+    router_client.executor.delay = 0.01
+    router_client.retry_policy.max_retries = 0
+
+    async def scenario():
+        return await asyncio.gather(
+            *(read_all(router_client) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, CommandStderrError) for result in results)
+    assert router_client.executor.commands == ['kvas list']
+
+
+def test_later_stream_starts_new_command(router_client):
+    router_client.executor.respond = lambda command: (LIST_OUTPUT, '')
+
+    async def scenario():
+        await read_all(router_client)
+        await read_all(router_client)
+
+    asyncio.run(scenario())
+    assert router_client.executor.commands == ['kvas list', 'kvas list']
+
+
+def test_mutations_run_one_at_a_time_and_queue_is_bounded():
+    scheduler = CommandScheduler(max_queue=2)
+    running = []
+    overlaps = []
+
+    async def mutation(name):
+        running.append(name)
+        overlaps.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(name)
+        return name
+
+    async def scenario():
+        tasks = [
+            asyncio.ensure_future(scheduler.run(f'kvas add {index}.com', lambda index=index: mutation(index)))
+            for index in range(3)
+        ]
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerQueueFull):
+            await scheduler.run('kvas add late.com', lambda: mutation('late'))
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+    assert max(overlaps) == 1
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from app.executors import ShellSessionExecutor, StderrOutput
+
+SLOW_COMMAND = 'echo before; sleep 5; echo leaked; echo leaked >&2'
+
+
+def run(scenario):
+    async def wrapped():
+        executor = ShellSessionExecutor()
+        try:
+            return await scenario(executor)
+        finally:
+            await executor.close()
+
+    return asyncio.run(wrapped())
+
+
+def test_commands_share_one_shell():
+    async def scenario(executor):
+        first = await executor.run('echo one; echo oops >&2', timeout=5)
+        second = await executor.run('printf two', timeout=5)
+        return first, second, executor.restarts
+
+    first, second, restarts = run(scenario)
+    assert first == ('one\n', 'oops\n')
+    assert second == ('two', '')
+    assert restarts == 0
+
+
+def test_timeout_restarts_shell_without_leaking_output():
+    async def scenario(executor):
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(SLOW_COMMAND, timeout=0.2)
+        return await executor.run('echo next', timeout=5), executor.restarts
+
+    assert run(scenario) == (('next\n', ''), 1)
+
+
+def test_cancel_restarts_shell_without_leaking_output():
+    async def scenario(executor):
+        task = asyncio.ensure_future(executor.run(SLOW_COMMAND, timeout=30))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await executor.run('echo next', timeout=5), executor.restarts
+
+    assert run(scenario) == (('next\n', ''), 1)
+
+
+def test_stream_early_exit_restarts_shell():
+    async def scenario(executor):
+        lines = executor.stream('printf "a\\nb\\n"; sleep 5; echo leaked', timeout=30)
+        first = await lines.__anext__()
+        await lines.aclose()
+        return first, await executor.run('echo next', timeout=5), executor.restarts
+
+    assert run(scenario) == ('a', ('next\n', ''), 1)
+
+
+def test_stream_reports_stderr_after_output():
+    async def scenario(executor):
+        received = []
+        with pytest.raises(StderrOutput) as error:
+            async for line in executor.stream('echo a; echo b; echo bad >&2', timeout=5):
+                received.append(line)
+        return received, error.value.stderr, executor.restarts
+
+    assert run(scenario) == (['a', 'b'], 'bad\n', 0)
@@ -0,0 +1,75 @@
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from app.bot import VPNBot
+from app.config import Config
+from app.router_client import RouterResponse
+
+KVAS_CALL = re.compile(r"kvas (add|del) (\S+) -y")
+
+
+class FakeMessage:
+    """Сообщение пользователя: ответы бота и их правки записываются."""
+
+    def __init__(self, text=''):
+        self.text = text
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+        return FakeMessage(text)
+
+    async def edit_text(self, text, **kwargs):
+        self.text = text
+        return self
+
+
+@pytest.fixture
+def site_bot(router_client, monkeypatch):
+    monkeypatch.setenv('MUTATION_WINDOW', '0')
+    monkeypatch.setenv('KVAS_LIST_FILE', '')
+
+    def respond(command):
+        verb, domain = KVAS_CALL.search(command).groups()
+        if verb == 'add':
+            return f"{domain} {RouterResponse.ADD_SUCCESS}\n", ''
+        return f"{domain} {RouterResponse.DELETE_SUCCESS}\n", ''
+
+    router_client.executor.respond = respond
+    return VPNBot(Config(), router_client)
+
+
+def send(handler, text):
+    message = FakeMessage(text)
+    update = SimpleNamespace(message=message, effective_user=SimpleNamespace(id=1))
+    asyncio.run(handler(update, SimpleNamespace(user_data={})))
+    return message
+
+
+@pytest.mark.parametrize('text', ['google.com,', 'Google.com google.com', ' google.com ; '])
+def test_add_accepts_trailing_separator_and_duplicates(site_bot, router_client, text):
+    message = send(site_bot.add_site, text)
+    assert not any('Некорректный' in reply for reply in message.replies)
+    assert [KVAS_CALL.search(command).groups() for command in router_client.executor.commands] == [
+        ('add', 'google.com')
+    ]
+
+
+@pytest.mark.parametrize('text', ['x.com x.com', 'x.com,'])
+def test_delete_accepts_trailing_separator_and_duplicates(site_bot, router_client, text):
+    message = send(site_bot.delete_site, text)
+    assert not any('Некорректный' in reply for reply in message.replies)
+    assert [KVAS_CALL.search(command).groups() for command in router_client.executor.commands] == [
+        ('del', 'x.com')
+    ]
+
+
+@pytest.mark.parametrize('handler', ['add_site', 'delete_site'])
+@pytest.mark.parametrize('text', [',', ' ; ', 'not_a_domain'])
+def test_invalid_input_is_rejected(site_bot, router_client, handler, text):
+    message = send(getattr(site_bot, handler), text)
+    assert any('Некорректный' in reply for reply in message.replies)
+    assert router_client.executor.commands == []
@@ -0,0 +1,175 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app.executors import StderrOutput
+
+
+class FakeSSHError(Exception):
+    pass
+
+
+class FakeStream:
+    def __init__(self, text: str):
+        self._lines = text.splitlines(keepends=True)
+
+    async def readline(self) -> str:
+        await asyncio.sleep(0)
+        return self._lines.pop(0) if self._lines else ''
+
+    async def read(self) -> str:
+        text = ''.join(self._lines)
+        self._lines = []
+        return text
+
+
+class FakeProcess:
+    def __init__(self, connection: 'FakeConnection', command: str):
+        self.connection = connection
+        self.command = command
+        stderr = 'error\n' if command.startswith('fail') else ''
+        self.stdout = FakeStream(f"{command}\nline 2\n")
+        self.stderr = FakeStream(stderr)
+        self._stderr = stderr
+
+    async def communicate(self):
+        await asyncio.sleep(self.connection.server.delay)
+        if self.connection.is_closed():
+            raise FakeSSHError('connection lost')
+        return f"{self.command}\n", self._stderr
+
+    def close(self):
+        self.connection.active -= 1
+
+
+class FakeConnection:
+    def __init__(self, server: 'FakeServer'):
+        self.server = server
+        self.closed = False
+        self.active = 0
+        self.peak = 0
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def create_process(self, command, **options):
+        if self.closed:
+            raise FakeSSHError('channel open failed')
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.server.peak = max(self.server.peak, sum(c.active for c in self.server.connections))
+        return FakeProcess(self, command)
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+class FakeServer:
+    """Заглушка модуля asyncssh: соединения без сети с задержкой выполнения команд."""
+
+    Error = FakeSSHError
+    DEVNULL = object()
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.connections = []
+        self.peak = 0
+
+    async def connect(self, host, **options):
+        await asyncio.sleep(0.01)
+        connection = FakeConnection(self)
+        self.connections.append(connection)
+        return connection
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setitem(sys.modules, 'asyncssh', SimpleNamespace(Error=FakeSSHError))
+    return server
+
+
+def make_executor(server, **options):
+    from app.ssh_executor import SSHExecutor
+
+    executor = SSHExecutor('router.local', **options)
+    executor._asyncssh = server
+    return executor
+
+
+def test_sequential_commands_share_one_connection(server):
+    async def scenario():
+        executor = make_executor(server)
+        results = [await executor.run(f"echo {index}", timeout=5) for index in range(10)]
+        await executor.close()
+        return executor, results
+
+    executor, results = asyncio.run(scenario())
+    assert results[3] == ('echo 3\n', '')
+    assert executor.connects == 1
+    assert executor.commands == 10
+
+
+def test_concurrent_commands_fill_pool(server):
+    async def scenario():
+        executor = make_executor(server, pool_size=2, max_sessions=4)
+        results = await asyncio.gather(*(executor.run(f"cmd {index}", timeout=5) for index in range(30)))
+        stats = executor.stats()
+        await executor.close()
+        return executor, results, stats
+
+    executor, results, stats = asyncio.run(scenario())
+    assert [stdout for stdout, _ in results] == [f"cmd {index}\n" for index in range(30)]
+    assert executor.connects == 2
+    assert server.peak == 8
+    assert all(connection.peak <= 4 for connection in server.connections)
+    assert stats['active_sessions'] == 0
+
+
+def test_broken_connection_is_reopened(server):
+    async def scenario():
+        executor = make_executor(server)
+        await executor.run('first', timeout=5)
+        server.connections[0].close()
+        result = await executor.run('second', timeout=5)
+        await executor.close()
+        return executor, result
+
+    executor, result = asyncio.run(scenario())
+    assert result == ('second\n', '')
+    assert executor.connects == 2
+
+
+def test_timeout_releases_session(server):
+    async def scenario():
+        executor = make_executor(server, pool_size=1, max_sessions=1)
+        server.delay = 1
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run('slow', timeout=0.1)
+        server.delay = 0
+        result = await executor.run('fast', timeout=5)
+        await executor.close()
+        return result
+
+    assert asyncio.run(scenario()) == ('fast\n', '')
+
+
+def test_stream_lines_and_stderr(server):
+    async def scenario():
+        executor = make_executor(server)
+        lines = [line async for line in executor.stream('kvas list', timeout=5)]
+        with pytest.raises(StderrOutput):
+            async for _ in executor.stream('fail now', timeout=5):
+                pass
+        stats = executor.stats()
+        await executor.close()
+        return lines, stats
+
+    lines, stats = asyncio.run(scenario())
+    assert lines == ['kvas list', 'line 2']
+    assert stats['active_sessions'] == 0
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.startup import StartupProfiler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Бюджет импорта main.py (с запасом на медленные машины); на роутере - около 50 мс
+IMPORT_BUDGET_MS = 500
+
+# Модули, которые не должны загружаться до проверки конфигурации
+HEAVY_MODULES = ('telegram', 'httpx', 'dotenv', 'asyncssh', 'app.bot', 'app.router_client')
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, '-c', code],
+        cwd=ROOT, capture_output=True, text=True, timeout=60, check=True,
+    )
+
+
+def test_main_does_not_import_heavy_modules():
+    result = run_python("import sys, main; print('\\n'.join(sys.modules))")
+    loaded = set(result.stdout.split())
+    assert not [name for name in HEAVY_MODULES if name in loaded]
+
+
+def test_main_import_time_budget():
+    result = run_python("import main", '-X', 'importtime')
+    # Строки вида "import time:  self [us] | cumulative | package"
+    totals = [
+        int(line.split('|')[1])
+        for line in result.stderr.splitlines()
+        if line.startswith('import time:') and line.split('|')[-1].strip() == 'main'
+    ]
+    assert totals
+    assert totals[0] / 1000 < IMPORT_BUDGET_MS
+
+
+def test_profiler_phases_and_first_requests(clock):
+    profiler = StartupProfiler(clock=clock)
+    with profiler.phase('импорт модулей'):
+        clock.advance(0.2)
+    clock.advance(0.1)
+    profiler.on_request('getMe')
+    clock.advance(0.1)
+    profiler.on_request('getUpdates')
+    profiler.on_request('getUpdates')
+
+    assert profiler.phases == [('импорт модулей', pytest.approx(0.2))]
+    assert profiler.first_requests == {'getMe': pytest.approx(0.3), 'getUpdates': pytest.approx(0.4)}
+    assert 'getUpdates' in profiler.report()
@@ -0,0 +1,60 @@
+import pytest
+
+from app.batch import chunked, iter_domains
+from app.sync import SyncPlan
+
+# Многобайтные символы, CRLF, комментарии и разные разделители
+DATA = (
+    "# желаемый список\r\n"
+    "youtube.com, *.googlevideo.com;instagram.com\r\n"
+    "пример.рф   例子.中国\n"
+    "\n"
+    "Facebook.COM # соцсеть, комментарий до конца строки\n"
+    "x.org\ty.org\n"
+    "последний.рф"
+).encode()
+
+EXPECTED = [
+    'youtube.com', '*.googlevideo.com', 'instagram.com', 'пример.рф', '例子.中国',
+    'facebook.com', 'x.org', 'y.org', 'последний.рф',
+]
+
+
+def test_whole_file():
+    assert list(iter_domains([DATA])) == EXPECTED
+
+
+def test_any_chunk_boundary():
+    # Граница фрагмента попадает на каждую позицию, в том числе внутрь символа UTF-8
+    for size in range(1, len(DATA) + 1):
+        assert list(iter_domains(chunked(DATA, size))) == EXPECTED, size
+
+
+def test_chunked_does_not_copy():
+    data = bytearray(DATA)
+    chunks = list(chunked(data, 7))
+    assert all(isinstance(chunk, memoryview) and chunk.obj is data for chunk in chunks)
+    assert b''.join(chunks) == DATA
+
+
+def test_invalid_utf8_is_reported():
+    with pytest.raises(UnicodeDecodeError):
+        list(iter_domains(chunked(b'youtube.com\n\xff\xfe.com\n', 4)))
+
+
+def test_sync_plan_is_minimal_delta():
+    current = ['*.youtube.com', 'facebook.com', 'old-site.net']
+    desired = ['youtube.com', 'facebook.com', 'new-site.org', 'new-site.org', 'bad domain', '*.ytimg.com']
+    plan = SyncPlan(desired, current, lambda domain: ' ' not in domain)
+
+    assert plan.add == ['new-site.org', 'ytimg.com']
+    assert plan.delete == ['old-site.net']
+    assert plan.unchanged == 2
+    assert plan.invalid == ['bad domain']
+    assert not plan.is_empty
+
+
+def test_sync_plan_mass_delete_warning():
+    plan = SyncPlan(['a.com'], ['a.com', 'b.com', 'c.com'], lambda domain: True)
+    assert '❗' in plan.render_preview()
+    assert SyncPlan(['a.com'], ['a.com'], lambda domain: True).is_empty
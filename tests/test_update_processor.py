@@ -0,0 +1,111 @@
+import asyncio
+import os
+
+from telegram import Bot, Update
+
+from app.update_processor import ChatOrderedUpdateProcessor
+
+CHAT_A = 1
+CHAT_B = 2
+
+
+def make_update(bot: Bot, update_id: int, chat_id: int) -> Update:
+    data = {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 1700000000,
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'User'},
+            'text': f"update {update_id}",
+        },
+    }
+    return Update.de_json(data, bot)
+
+
+class Recorder:
+    """Обработчик обновлений: отмечает начало и конец каждого."""
+
+    def __init__(self):
+        self.events = []
+
+    async def handle(self, name: str, delay: float, fail: bool = False):
+        self.events.append(('start', name))
+        await asyncio.sleep(delay)
+        self.events.append(('end', name))
+        if fail:
+            raise RuntimeError(name)
+
+    def finished(self, prefix: str):
+        return [name for event, name in self.events if event == 'end' and name.startswith(prefix)]
+
+    def position(self, event: str, name: str) -> int:
+        return self.events.index((event, name))
+
+
+async def feed(processor, recorder, script):
+    """Обновления в порядке поступления, каждое - отдельной задачей, как в Application."""
+    await processor.initialize()
+    bot = Bot(os.environ['BOT_TOKEN'])
+    # Обновления собираются заранее: поступление не должно отставать от обработки
+    updates = [make_update(bot, update_id, chat_id) for update_id, (_, chat_id, _) in enumerate(script, start=1)]
+    tasks = []
+    for update, (name, _, delay) in zip(updates, script):
+        coroutine = recorder.handle(name, delay, fail=name.endswith('!'))
+        tasks.append(asyncio.create_task(processor.process_update(update, coroutine)))
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+
+def test_chat_order_kept_while_other_chats_run():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=8)
+    recorder = Recorder()
+    script = [
+        ('A1', CHAT_A, 0.3),
+        ('B1', CHAT_B, 0.02),
+        ('A2', CHAT_A, 0.01),
+        ('B2', CHAT_B, 0.05),
+        ('A3', CHAT_A, 0),
+        ('B3', CHAT_B, 0.01),
+    ]
+    asyncio.run(feed(processor, recorder, script))
+
+    assert recorder.finished('A') == ['A1', 'A2', 'A3']
+    assert recorder.finished('B') == ['B1', 'B2', 'B3']
+    # Обновления одного чата не пересекаются
+    assert recorder.position('start', 'A2') > recorder.position('end', 'A1')
+    assert recorder.position('start', 'B3') > recorder.position('end', 'B2')
+    # Чат B не ждет медленного обновления чата A
+    assert recorder.position('end', 'B3') < recorder.position('end', 'A1')
+    assert processor.stats() == {'busy_chats': 0, 'queued_updates': 0}
+
+
+def test_failed_update_does_not_break_chat_queue():
+    processor = ChatOrderedUpdateProcessor(max_concurrent_updates=8)
+    recorder = Recorder()
+    asyncio.run(feed(processor, recorder, [
+        ('A1!', CHAT_A, 0.01),
+        ('A2', CHAT_A, 0),
+        ('B1', CHAT_B, 0),
+    ]))
+    assert recorder.finished('A') == ['A1!', 'A2']
+    assert recorder.finished('B') == ['B1']
+
+
+def test_queued_updates_are_reported():
+    async def scenario():
+        processor = ChatOrderedUpdateProcessor(max_concurrent_updates=8)
+        recorder = Recorder()
+        running = asyncio.ensure_future(feed(processor, recorder, [
+            ('A1', CHAT_A, 0.05),
+            ('A2', CHAT_A, 0),
+            ('A3', CHAT_A, 0),
+            ('B1', CHAT_B, 0.05),
+        ]))
+        while ('start', 'B1') not in recorder.events:
+            await asyncio.sleep(0.001)
+        stats = processor.stats()
+        await running
+        return stats
+
+    assert asyncio.run(scenario()) == {'busy_chats': 2, 'queued_updates': 2}
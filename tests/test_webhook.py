@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from telegram import Bot, Update
+
+from app.http_server import LocalHTTPServer
+from app.webhook import SECRET_HEADER, WebhookReceiver
+
+SECRET = 'test-secret'
+PATH = '/telegram'
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_update(update_id: int, text: str, user_id: int = 1) -> dict:
+    """Обновление в том виде, в котором его присылает Telegram."""
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 1700000000,
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'User'},
+            'text': text,
+        },
+    }
+
+
+def http_request(method: str, body: bytes = b'', headers: dict = None, path: str = PATH) -> bytes:
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+
+async def read_response(reader: asyncio.StreamReader):
+    status_line = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return int(status_line.split()[1]), body
+
+
+async def with_server(scenario):
+    application = SimpleNamespace(
+        bot=Bot(os.environ['BOT_TOKEN']),
+        update_queue=asyncio.Queue(),
+    )
+    receiver = WebhookReceiver(application, SECRET)
+    server = LocalHTTPServer('127.0.0.1', 0, {PATH: receiver.handle})
+    await server.start()
+    port = server._server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        return await scenario(reader, writer, application.update_queue)
+    finally:
+        writer.close()
+        await server.stop()
+
+
+def test_updates_are_queued_over_keep_alive():
+    async def scenario(reader, writer, queue):
+        statuses = []
+        for update_id in range(1, 51):
+            body = json.dumps(make_update(update_id, f"/find site{update_id}")).encode()
+            writer.write(http_request('POST', body, {SECRET_HEADER: SECRET}))
+            statuses.append((await read_response(reader))[0])
+        return statuses, [queue.get_nowait() for _ in range(queue.qsize())]
+
+    statuses, updates = asyncio.run(with_server(scenario))
+    assert statuses == [200] * 50
+    assert all(isinstance(update, Update) for update in updates)
+    assert [update.update_id for update in updates] == list(range(1, 51))
+    assert updates[0].effective_user.id == 1
+    assert updates[-1].message.text == '/find site50'
+
+
+def test_rejected_requests_are_not_queued():
+    async def scenario(reader, writer, queue):
+        body = json.dumps(make_update(1, '/start')).encode()
+        statuses = []
+        for request in (
+            http_request('POST', body, {SECRET_HEADER: 'wrong'}),
+            http_request('POST', body),
+            http_request('GET', headers={SECRET_HEADER: SECRET}),
+            http_request('POST', b'{not json', {SECRET_HEADER: SECRET}),
+            http_request('POST', b'[]', {SECRET_HEADER: SECRET}),
+            http_request('POST', body, {SECRET_HEADER: SECRET}, path='/other'),
+        ):
+            writer.write(request)
+            statuses.append((await read_response(reader))[0])
+        return statuses, queue.qsize()
+
+    statuses, queued = asyncio.run(with_server(scenario))
+    assert statuses == [403, 403, 405, 400, 400, 404]
+    assert queued == 0
+
+
+def test_oversized_body_closes_connection():
+    async def scenario(reader, writer, queue):
+        writer.write(b"POST /telegram HTTP/1.1\r\nContent-Length: 999999999\r\n\r\n")
+        status, _ = await read_response(reader)
+        return status, await reader.read()
+
+    status, rest = asyncio.run(with_server(scenario))
+    assert status == 400
+    assert rest == b''
+
+
+def run_loadtest(delivery: str) -> dict:
+    """Прогон scripts/loadtest.py с доставкой обновлений через getUpdates или вебхук."""
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'scripts', 'loadtest.py'),
+         '--users', '4', '--actions', '5', '--mix', 'help=1,find=1,list=1',
+         '--delivery', delivery, '--json'],
+        cwd=ROOT, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout)
+
+
+def test_webhook_latency_against_polling():
+    polling = run_loadtest('polling')
+    webhook = run_loadtest('webhook')
+
+    for report in (polling, webhook):
+        print(
+            f"{report['delivery']}: p50 {report['latency']['p50'] * 1000:.1f} мс, "
+            f"p95 {report['latency']['p95'] * 1000:.1f} мс"
+        )
+    assert polling['errors'] == webhook['errors'] == 0
+    assert polling['updates'] == webhook['updates'] == 20
+    # Без вебхука обновление ждет очередного getUpdates (poll_interval - 1 с)
+    assert webhook['latency']['p50'] < polling['latency']['p50'] / 5
+    assert webhook['latency']['p95'] < polling['latency']['p95']
+    assert polling['api_calls']['getUpdates'] > 1
+    assert 'getUpdates' not in webhook['api_calls']